@@ -0,0 +1,277 @@
+#include <chrono>
+#include <cstdlib>
+#include <iostream>
+#include <random>
+#include <sstream>
+#include <string>
+#include <vector>
+
+#include "Automaton/Automaton.h"
+#include "Automaton/CompiledDFA.h"
+#include "generators.h"
+
+#ifdef _WIN32
+#define WIN32_LEAN_AND_MEAN
+#include <windows.h>
+#include <psapi.h>
+#else
+#include <sys/resource.h>
+#endif
+
+// Cases run when none are given on the command line, as family:parameter.
+// epsilon_chain's subsets grow with the square of n, so it stops at 10000;
+// epsilon_pairs covers the long chains.
+static const std::vector<std::string> default_cases = {
+    "nth_from_end:10",      "nth_from_end:14",     "epsilon_chain:1000",
+    "epsilon_chain:4000",   "epsilon_chain:10000", "epsilon_pairs:10000",
+    "epsilon_pairs:40000",  "epsilon_tree:20000",  "epsilon_tree:80000",
+    "dense_random:20",      "dense_random:40",     "large_alphabet:2000",
+    "large_alphabet:10000",
+};
+
+static size_t peak_rss_bytes()
+{
+#ifdef _WIN32
+    PROCESS_MEMORY_COUNTERS counters;
+    GetProcessMemoryInfo(GetCurrentProcess(), &counters, sizeof(counters));
+    return counters.PeakWorkingSetSize;
+#elif defined(__APPLE__)
+    struct rusage usage;
+    getrusage(RUSAGE_SELF, &usage);
+    return usage.ru_maxrss;
+#else
+    struct rusage usage;
+    getrusage(RUSAGE_SELF, &usage);
+    return static_cast<size_t>(usage.ru_maxrss) * 1024;
+#endif
+}
+
+static std::string json_string(const std::string &text)
+{
+    std::string quoted = "\"";
+    for (char symbol : text)
+    {
+        if (symbol == '"' || symbol == '\\')
+        {
+            quoted += '\\';
+        }
+        quoted += symbol;
+    }
+    return quoted + "\"";
+}
+
+// getStates() leaves out states that are only targets or finals; the
+// exported CSR offsets have one row per state up to the state bound.
+static state_t state_count(Automaton &automaton)
+{
+    return automaton.exportTransitions().offsets.size() - 1;
+}
+
+template <typename Function>
+static double time_ms(Function function)
+{
+    auto start = std::chrono::steady_clock::now();
+    function();
+    return std::chrono::duration<double, std::milli>(
+               std::chrono::steady_clock::now() - start)
+        .count();
+}
+
+struct Options
+{
+    uint32_t seed = 1;
+    int strings = 20000;
+    int length = 64;
+    int closureQueries = 100000;
+    unsigned threads = 1;
+    bool freeze = false;
+    std::string saveDirectory;
+};
+
+static std::string run_case(const std::string &name, const Options &options)
+{
+    size_t colon = name.find(':');
+    const NFAFamily *family = find_family(name.substr(0, colon));
+    if (family == nullptr || colon == std::string::npos)
+    {
+        throw std::invalid_argument("unknown case " + name);
+    }
+    int parameter = std::atoi(name.c_str() + colon + 1);
+
+    Automaton nfa;
+    double generateMs =
+        time_ms([&] { nfa = family->generate(parameter, options.seed); });
+    if (!options.saveDirectory.empty())
+    {
+        std::string file = name;
+        file[colon] = '_';
+        nfa.save(options.saveDirectory + "/" + file + ".nfa2dfa");
+    }
+    TransitionArrays arrays = nfa.exportTransitions();
+    size_t builtNfaBytes = nfa.getMemoryBytes();
+    double freezeMs = 0;
+    if (options.freeze)
+    {
+        freezeMs = time_ms([&] { nfa.freeze(); });
+    }
+
+    double closureIndexMs = time_ms([&] { nfa.precomputeClosures(); });
+    state_t stateCount = arrays.offsets.size() - 1;
+    size_t closureSize = 0;
+    double closureMs = time_ms(
+        [&]
+        {
+            for (int i = 0; i < options.closureQueries; i++)
+            {
+                closureSize += nfa.getEpsilonClosure(i % stateCount).size();
+            }
+        });
+
+    DeterminizeOptions determinizeOptions;
+    determinizeOptions.threads = options.threads;
+    Automaton dfa;
+    double determinizeMs =
+        time_ms([&] { dfa = nfa.determinize(determinizeOptions); });
+    Automaton minimal;
+    double minimizeMs = time_ms([&] { minimal = dfa.minimize(); });
+
+    std::mt19937 random(options.seed);
+    std::vector<std::string> inputs(options.strings);
+    for (std::string &input : inputs)
+    {
+        for (int i = 0; i < options.length; i++)
+        {
+            input += family->alphabet[random() % family->alphabet.size()];
+        }
+    }
+    size_t accepted = 0;
+    double acceptMs = time_ms(
+        [&]
+        {
+            for (const std::string &input : inputs)
+            {
+                accepted += dfa.isAccepted(input);
+            }
+        });
+    CompiledDFA compiled = dfa.compile();
+    size_t compiledAccepted = 0;
+    double compiledMs = time_ms(
+        [&]
+        {
+            for (const std::string &input : inputs)
+            {
+                compiledAccepted += compiled.isAccepted(input);
+            }
+        });
+    if (accepted != compiledAccepted)
+    {
+        throw std::logic_error(name + ": compiled matcher disagrees");
+    }
+
+    std::ostringstream json;
+    json << "{\"case\": \"" << name << "\", \"family\": \"" << family->name
+         << "\", \"parameter\": " << parameter
+         << ", \"alphabet\": " << json_string(family->alphabet)
+         << ", \"nfa_states\": " << stateCount
+         << ", \"nfa_edges\": " << arrays.targets.size()
+         << ", \"generate_ms\": " << generateMs
+         << ", \"built_nfa_bytes\": " << builtNfaBytes
+         << ", \"frozen\": " << (options.freeze ? "true" : "false")
+         << ", \"freeze_ms\": " << freezeMs
+         << ", \"nfa_bytes\": " << nfa.getMemoryBytes()
+         << ", \"closure_index_ms\": " << closureIndexMs
+         << ", \"closure_queries_per_s\": "
+         << options.closureQueries / (closureMs / 1000)
+         << ", \"closure_avg_size\": "
+         << static_cast<double>(closureSize) / options.closureQueries
+         << ", \"threads\": " << options.threads
+         << ", \"determinize_ms\": " << determinizeMs
+         << ", \"dfa_states\": " << state_count(dfa)
+         << ", \"minimize_ms\": " << minimizeMs
+         << ", \"min_dfa_states\": " << state_count(minimal)
+         << ", \"accept_per_s\": " << options.strings / (acceptMs / 1000)
+         << ", \"compiled_accept_per_s\": "
+         << options.strings / (compiledMs / 1000)
+         << ", \"accepted\": " << accepted
+         << ", \"peak_rss_bytes\": " << peak_rss_bytes() << "}";
+    return json.str();
+}
+
+int main(int argc, char *argv[])
+{
+    Options options;
+    std::vector<std::string> cases;
+    for (int i = 1; i < argc; i++)
+    {
+        std::string argument = argv[i];
+        auto value = [&]() -> std::string
+        {
+            if (i + 1 >= argc)
+            {
+                std::cerr << argument << " needs a value" << std::endl;
+                std::exit(2);
+            }
+            return argv[++i];
+        };
+        if (argument == "--list")
+        {
+            for (const std::string &name : default_cases)
+            {
+                std::cout << name << std::endl;
+            }
+            return 0;
+        }
+        else if (argument == "--families")
+        {
+            for (const NFAFamily &family : nfa_families())
+            {
+                std::cout << family.name << "\t" << family.description
+                          << std::endl;
+            }
+            return 0;
+        }
+        else if (argument == "--seed")
+        {
+            options.seed = std::stoul(value());
+        }
+        else if (argument == "--strings")
+        {
+            options.strings = std::stoi(value());
+        }
+        else if (argument == "--length")
+        {
+            options.length = std::stoi(value());
+        }
+        else if (argument == "--threads")
+        {
+            options.threads = std::stoul(value());
+        }
+        else if (argument == "--freeze")
+        {
+            options.freeze = true;
+        }
+        else if (argument == "--save-nfa")
+        {
+            options.saveDirectory = value();
+        }
+        else
+        {
+            cases.push_back(argument);
+        }
+    }
+    if (cases.empty())
+    {
+        cases = default_cases;
+    }
+
+    // Peak RSS is process-wide, so run_benchmarks.py starts one process per
+    // case to keep the figure meaningful.
+    std::cout << "{\"implementation\": \"cpp\", \"cases\": [";
+    for (size_t i = 0; i < cases.size(); i++)
+    {
+        std::cout << (i == 0 ? "" : ", ") << run_case(cases[i], options)
+                  << std::flush;
+    }
+    std::cout << "]}" << std::endl;
+    return 0;
+}
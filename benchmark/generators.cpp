@@ -0,0 +1,175 @@
+#include "generators.h"
+
+#include <random>
+
+// (a|b)*a(a|b)^n: n + 2 NFA states, 2^(n + 1) DFA states.
+static Automaton nth_from_end(int n, uint32_t)
+{
+    Automaton nfa;
+    nfa.addTransition(0, 0, 'a');
+    nfa.addTransition(0, 0, 'b');
+    nfa.addTransition(0, 1, 'a');
+    for (state_t i = 1; i <= n; i++)
+    {
+        nfa.addTransition(i, i + 1, 'a');
+        nfa.addTransition(i, i + 1, 'b');
+    }
+    nfa.setInitialState(0);
+    nfa.addFinalState(n + 1);
+    return nfa;
+}
+
+// n states linked by epsilon edges, each also looping on its own symbol,
+// so every closure is a suffix of the chain.
+static Automaton epsilon_chain(int n, uint32_t)
+{
+    Automaton nfa;
+    for (state_t i = 0; i < n; i++)
+    {
+        nfa.addTransition(i, i, "abc"[i % 3]);
+        if (i + 1 < n)
+        {
+            nfa.addTransition(i, i + 1, '\0');
+        }
+    }
+    nfa.setInitialState(0);
+    nfa.addFinalState(n - 1);
+    return nfa;
+}
+
+// Even states step to the next state on epsilon, odd states on 'a', and
+// every seventh state jumps back to the middle of the chain on 'b'. Closures
+// stay small, so the DFA has one state per epsilon pair and chains of tens
+// of thousands of states determinize in milliseconds.
+static Automaton epsilon_pairs(int n, uint32_t)
+{
+    Automaton nfa;
+    for (state_t i = 0; i + 1 < n; i++)
+    {
+        nfa.addTransition(i, i + 1, i % 2 == 0 ? '\0' : 'a');
+        if (i % 7 == 0)
+        {
+            nfa.addTransition(i, i / 2, 'b');
+        }
+    }
+    nfa.setInitialState(0);
+    nfa.addFinalState(n - 1);
+    return nfa;
+}
+
+// A complete binary tree over {a, b} whose leaves return to the root on
+// epsilon; the DFA has about as many states as the NFA.
+static Automaton epsilon_tree(int n, uint32_t)
+{
+    Automaton nfa;
+    for (state_t i = 0; i < n; i++)
+    {
+        if (2 * i + 2 < n)
+        {
+            nfa.addTransition(i, 2 * i + 1, 'a');
+            nfa.addTransition(i, 2 * i + 2, 'b');
+        }
+        else
+        {
+            nfa.addTransition(i, 0, '\0');
+            if (i % 3 == 0)
+            {
+                nfa.addFinalState(i);
+            }
+        }
+    }
+    nfa.setInitialState(0);
+    return nfa;
+}
+
+// Tabakov-Vardi random NFA over {a, b}: 1.25 * n edges per symbol and
+// half of the states final, the density at which subset construction is
+// hardest on average.
+static Automaton dense_random(int n, uint32_t seed)
+{
+    std::mt19937 random(seed);
+    Automaton nfa;
+    int edges = n * 5 / 4;
+    for (char symbol : {'a', 'b'})
+    {
+        for (int i = 0; i < edges; i++)
+        {
+            nfa.addTransition(random() % n, random() % n, symbol);
+        }
+    }
+    for (state_t i = 0; i < n; i++)
+    {
+        if (random() % 2 == 0)
+        {
+            nfa.addFinalState(i);
+        }
+    }
+    nfa.setInitialState(0);
+    return nfa;
+}
+
+// n states over 94 printable symbols; every state has a handful of
+// random successors, each on a random symbol, plus an epsilon edge.
+static Automaton large_alphabet(int n, uint32_t seed)
+{
+    std::mt19937 random(seed);
+    Automaton nfa;
+    for (state_t i = 0; i < n; i++)
+    {
+        for (int k = 0; k < 6; k++)
+        {
+            nfa.addTransition(i, random() % n,
+                              static_cast<char>('!' + random() % 94));
+        }
+        if (random() % 4 == 0)
+        {
+            nfa.addTransition(i, random() % n, '\0');
+        }
+        if (random() % 8 == 0)
+        {
+            nfa.addFinalState(i);
+        }
+    }
+    nfa.setInitialState(0);
+    return nfa;
+}
+
+static std::string printable()
+{
+    std::string symbols;
+    for (char symbol = '!'; symbol <= '~'; symbol++)
+    {
+        symbols += symbol;
+    }
+    return symbols;
+}
+
+const std::vector<NFAFamily> &nfa_families()
+{
+    static const std::vector<NFAFamily> families = {
+        {"nth_from_end", "(a|b)*a(a|b)^n", "ab", nth_from_end},
+        {"epsilon_chain", "n-state epsilon chain with self-loops", "abc",
+         epsilon_chain},
+        {"epsilon_pairs", "n-state chain alternating epsilon and 'a' edges",
+         "ab", epsilon_pairs},
+        {"epsilon_tree", "binary tree with epsilon back edges", "ab",
+         epsilon_tree},
+        {"dense_random", "random NFA with 1.25n edges per symbol", "ab",
+         dense_random},
+        {"large_alphabet", "random NFA over 94 printable symbols", printable(),
+         large_alphabet},
+    };
+    return families;
+}
+
+const NFAFamily *find_family(const std::string &name)
+{
+    for (const NFAFamily &family : nfa_families())
+    {
+        if (family.name == name)
+        {
+            return &family;
+        }
+    }
+    return nullptr;
+}
@@ -0,0 +1,24 @@
+#ifndef BENCHMARK_GENERATORS_H_
+#define BENCHMARK_GENERATORS_H_
+
+#include <cstdint>
+#include <functional>
+#include <string>
+#include <vector>
+
+#include "Automaton/Automaton.h"
+
+// A parameterised NFA family used by the benchmark suite. `alphabet` lists
+// the symbols random inputs are drawn from.
+struct NFAFamily
+{
+    std::string name;
+    std::string description;
+    std::string alphabet;
+    std::function<Automaton(int parameter, uint32_t seed)> generate;
+};
+
+const std::vector<NFAFamily> &nfa_families();
+const NFAFamily *find_family(const std::string &name);
+
+#endif  // BENCHMARK_GENERATORS_H_
@@ -0,0 +1,269 @@
+"""Runs the determinization benchmark suite and compares result files.
+
+    python benchmark/run_benchmarks.py run --output results.json
+    python benchmark/run_benchmarks.py compare base.json results.json
+
+Every case runs in its own process so that peak RSS is per case. The C++
+side is the NFA2DFA_benchmark binary; the Python side loads the NFA that
+the binary generated for the same case and drives it through
+Automaton_bindings, so both measure the same automaton.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, os.pardir))
+
+# metric name -> "lower" / "higher" is better, or "equal" for results that
+# must not change between runs
+METRICS = {
+    "closure_index_ms": "lower",
+    "closure_queries_per_s": "higher",
+    "determinize_ms": "lower",
+    "minimize_ms": "lower",
+    "accept_per_s": "higher",
+    "compiled_accept_per_s": "higher",
+    "peak_rss_bytes": "lower",
+    "nfa_bytes": "lower",
+    "dfa_states": "equal",
+    "min_dfa_states": "equal",
+    "accepted": "equal",
+}
+
+
+def default_binary():
+    name = "NFA2DFA_benchmark.exe" if os.name == "nt" else "NFA2DFA_benchmark"
+    return os.path.join(parent_dir, "build", "bin", name)
+
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def count_states(automaton):
+    # getStates() leaves out states that are only targets or finals; the
+    # exported CSR offsets have one row per state up to the state bound
+    return len(automaton.exportTransitions()[0]) - 1
+
+
+def python_case(args):
+    sys.path.insert(0, args.module_dir)
+    import Automaton_bindings as Automaton  # type: ignore
+
+    nfa = Automaton.Automaton.load(args.nfa)
+    state_count = count_states(nfa)
+    # Loading from a file yields a frozen automaton.
+    nfa_bytes = nfa.getMemoryBytes()
+
+    _, closure_index_ms = timed(nfa.precomputeClosures)
+    _, closure_ms = timed(lambda: sum(len(nfa.getEpsilonClosure(i % state_count))
+                                      for i in range(args.closure_queries)))
+    dfa, determinize_ms = timed(lambda: nfa.determinize(threads=args.threads))
+    minimal, minimize_ms = timed(dfa.minimize)
+
+    rng = random.Random(args.seed)
+    inputs = ["".join(rng.choice(args.alphabet) for _ in range(args.length))
+              for _ in range(args.strings)]
+    accepted, accept_ms = timed(lambda: sum(dfa.isAccepted(s) for s in inputs))
+    compiled = dfa.compile()
+    results, compiled_ms = timed(lambda: compiled.matchMany(inputs))
+
+    print(json.dumps({
+        "case": args.case,
+        "nfa_states": state_count,
+        "nfa_bytes": nfa_bytes,
+        "closure_index_ms": closure_index_ms,
+        "closure_queries_per_s": args.closure_queries / (closure_ms / 1000),
+        "determinize_ms": determinize_ms,
+        "dfa_states": count_states(dfa),
+        "minimize_ms": minimize_ms,
+        "min_dfa_states": count_states(minimal),
+        "accept_per_s": args.strings / (accept_ms / 1000),
+        "compiled_accept_per_s": args.strings / (compiled_ms / 1000),
+        "accepted": int(results.sum()),
+        "accepted_isAccepted": accepted,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }))
+
+
+def run_process(command, timeout):
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None, "timeout"
+    if completed.returncode != 0:
+        return None, completed.stderr.strip() or f"exit code {completed.returncode}"
+    return json.loads(completed.stdout), None
+
+
+def run(args):
+    cases = args.cases
+    if not cases:
+        listing = subprocess.run([args.binary, "--list"], capture_output=True, text=True, check=True)
+        cases = listing.stdout.split()
+
+    results = {
+        "metadata": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "strings": args.strings,
+            "length": args.length,
+            "threads": args.threads,
+            "freeze": args.freeze,
+        },
+        "cpp": [],
+        "python": [],
+    }
+    common = ["--seed", str(args.seed), "--strings", str(args.strings), "--length", str(args.length),
+              "--threads", str(args.threads)]
+
+    with tempfile.TemporaryDirectory() as nfa_dir:
+        for case in cases:
+            freeze = ["--freeze"] if args.freeze else []
+            output, error = run_process([args.binary, *common, *freeze, "--save-nfa", nfa_dir, case], args.timeout)
+            cpp = output["cases"][0] if output else {"case": case, "error": error}
+            results["cpp"].append(cpp)
+            print(f"cpp     {case:24} " + summary(cpp), file=sys.stderr)
+
+            if args.skip_python or error:
+                continue
+            nfa_file = os.path.join(nfa_dir, case.replace(":", "_") + ".nfa2dfa")
+            output, error = run_process([
+                sys.executable, os.path.abspath(__file__), "python-case",
+                "--module-dir", args.module_dir, "--nfa", nfa_file, "--case", case,
+                "--alphabet=" + cpp["alphabet"], *common,
+                "--closure-queries", str(args.closure_queries),
+            ], args.timeout)
+            python = output if output else {"case": case, "error": error}
+            results["python"].append(python)
+            print(f"python  {case:24} " + summary(python), file=sys.stderr)
+
+    text = json.dumps(results, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+def summary(result):
+    if "error" in result:
+        return "ERROR " + result["error"].splitlines()[-1]
+    return (f"determinize {result['determinize_ms']:9.1f} ms  "
+            f"dfa {result['dfa_states']:7}  "
+            f"rss {(result['peak_rss_bytes'] or 0) / 2**20:7.1f} MiB")
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    regressions = 0
+    for implementation in ("cpp", "python"):
+        base_cases = {case["case"]: case for case in base.get(implementation, [])}
+        for case in new.get(implementation, []):
+            old = base_cases.get(case["case"])
+            if old is None:
+                continue
+            if "error" in case and "error" not in old:
+                print(f"REGRESSION {implementation} {case['case']}: {case['error']}")
+                regressions += 1
+                continue
+            if "error" in case or "error" in old:
+                continue
+            for metric, better in METRICS.items():
+                before, after = old.get(metric), case.get(metric)
+                if before is None or after is None:
+                    continue
+                if better == "equal":
+                    worse = before != after
+                    change = f"{before} -> {after}"
+                elif metric.endswith("_ms") and max(before, after) < args.min_ms:
+                    continue
+                else:
+                    ratio = after / before if before else 1.0
+                    worse = ratio > 1 + args.threshold if better == "lower" else ratio < 1 - args.threshold
+                    change = f"{before:.4g} -> {after:.4g} ({(ratio - 1) * 100:+.1f}%)"
+                if worse:
+                    regressions += 1
+                    print(f"REGRESSION {implementation} {case['case']} {metric}: {change}")
+                elif args.verbose:
+                    print(f"ok         {implementation} {case['case']} {metric}: {change}")
+
+    print(f"{regressions} regression(s) at threshold {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_workload(subparser):
+        subparser.add_argument("--seed", type=int, default=1)
+        subparser.add_argument("--strings", type=int, default=20000)
+        subparser.add_argument("--length", type=int, default=64)
+        subparser.add_argument("--closure-queries", type=int, default=20000)
+        subparser.add_argument("--threads", type=int, default=1, help="determinize threads, 0 for all")
+
+    run_parser = subparsers.add_parser("run", help="run the suite and write results as JSON")
+    run_parser.add_argument("cases", nargs="*", help="family:parameter cases (default: the binary's --list)")
+    run_parser.add_argument("--binary", default=default_binary())
+    run_parser.add_argument("--module-dir", default=os.path.join(parent_dir, "python_package"))
+    run_parser.add_argument("--output", "-o")
+    run_parser.add_argument("--timeout", type=float, default=600)
+    run_parser.add_argument("--skip-python", action="store_true")
+    run_parser.add_argument("--freeze", action="store_true", help="freeze the C++ NFA before measuring it")
+    add_workload(run_parser)
+
+    compare_parser = subparsers.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative change that counts as a regression (default 0.10)")
+    compare_parser.add_argument("--min-ms", type=float, default=5.0,
+                                help="ignore timings where both runs are below this many ms (default 5)")
+    compare_parser.add_argument("--verbose", "-v", action="store_true")
+
+    case_parser = subparsers.add_parser("python-case", help=argparse.SUPPRESS)
+    case_parser.add_argument("--module-dir", required=True)
+    case_parser.add_argument("--nfa", required=True)
+    case_parser.add_argument("--case", required=True)
+    case_parser.add_argument("--alphabet", required=True)
+    add_workload(case_parser)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "compare":
+        sys.exit(compare(args))
+    else:
+        python_case(args)
+
+
+if __name__ == "__main__":
+    main()
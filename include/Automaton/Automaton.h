@@ -1,24 +1,139 @@
 #ifndef AUTOMATON_H_
 #define AUTOMATON_H_
 
+#include <cstddef>
+#include <cstdint>
+#include <memory>
+#include <optional>
+#include <span>
 #include <string>
 #include <vector>
 
+#include "Automaton/Determinize.h"
+
 using state_t = int;
 
+class ByteClasses;
+class CompiledDFA;
+class EpsilonClosureIndex;
+struct SubsetExpansion;
+
+// Moves to `to` on any byte in [symbol, last], or without consuming input
+// when `epsilon` is set. `{to, symbol}` keeps its original meaning: a
+// single byte, with '\0' standing for epsilon.
 struct Transition
 {
     state_t to;
     char symbol;
+    char last = symbol;
+    bool epsilon = symbol == '\0';
+
+    unsigned char getFirst() const
+    {
+        return static_cast<unsigned char>(symbol);
+    }
+    unsigned char getLast() const { return static_cast<unsigned char>(last); }
+    bool matches(char byte) const
+    {
+        auto value = static_cast<unsigned char>(byte);
+        return !epsilon && getFirst() <= value && value <= getLast();
+    }
+};
+
+// Outgoing edges in CSR form: the edges of state s are the entries
+// [offsets[s], offsets[s + 1]) of the other arrays. Edge k covers the
+// bytes [symbols[k], lasts[k]] unless epsilon[k] is set.
+struct TransitionArrays
+{
+    std::vector<int64_t> offsets;
+    std::vector<state_t> targets;
+    std::vector<uint8_t> symbols;
+    std::vector<uint8_t> lasts;
+    std::vector<uint8_t> epsilon;
+};
+
+// Read-only access to the outgoing edges of each state, whether they are
+// stored per state or in CSR form. States from size() on have no edges.
+class TransitionView
+{
+   private:
+    const std::vector<std::vector<Transition>> *rows = nullptr;
+    const size_t *offsets = nullptr;
+    const Transition *edges = nullptr;
+    state_t count = 0;
+
+   public:
+    TransitionView(const std::vector<std::vector<Transition>> &rows)
+        : rows(&rows), count(rows.size())
+    {
+    }
+    TransitionView(std::span<const size_t> offsets,
+                   std::span<const Transition> edges)
+        : offsets(offsets.data()),
+          edges(edges.data()),
+          count(offsets.empty() ? 0 : offsets.size() - 1)
+    {
+    }
+
+    state_t size() const { return count; }
+    std::span<const Transition> operator[](state_t state) const
+    {
+        if (state < 0 || count <= state)
+        {
+            return {};
+        }
+        if (rows != nullptr)
+        {
+            return (*rows)[state];
+        }
+        return {edges + offsets[state], edges + offsets[state + 1]};
+    }
 };
 
 class Automaton
 {
    private:
     std::vector<state_t> states;
-    std::vector<std::vector<Transition>> transitions;
+    // Edges are kept per state while the automaton is built. freeze()
+    // packs them into CSR arrays, each state's edges sorted with epsilon
+    // edges first and then by first byte; the next edit unpacks them.
+    std::vector<std::vector<Transition>> rows;
+    std::vector<size_t> edgeOffsets;
+    std::vector<Transition> edges;
+    bool frozen = false;
+    // The largest last - first among frozen byte edges, which bounds how
+    // far before a byte the edges covering it can start.
+    uint8_t widestRange = 0;
     std::vector<state_t> finalStates;
-    state_t initialState;
+    state_t initialState = 0;
+    std::vector<bool> stateSeen;
+    std::vector<bool> finalMask;
+    std::shared_ptr<const EpsilonClosureIndex> closureIndex;
+    // Scratch for getEpsilonClosure().
+    std::vector<unsigned> closureMarks;
+    unsigned closureStamp = 0;
+
+    void addState(state_t state);
+    void registerStates(const std::vector<state_t> &finals);
+    void pushTransition(state_t from, Transition transition);
+    void thaw();
+    static bool frozenEdgeBefore(Transition a, Transition b);
+    static size_t sortEdges(Transition *begin, Transition *end);
+    void sortFrozenEdges();
+    std::span<const Transition> edgesCovering(state_t state,
+                                              unsigned char byte) const;
+    state_t stateBound();
+    void closeSubset(std::vector<state_t> &subset, std::vector<unsigned> &marks,
+                     unsigned stamp);
+    bool expandSubset(std::span<const state_t> subset,
+                      const ByteClasses &classes,
+                      const std::vector<bool> &finalMask,
+                      SubsetExpansion &expansion);
+    Automaton determinizeParallel(
+        const DeterminizeOptions &options, unsigned threads,
+        const std::vector<bool> &finalMask, DeterminizeStats &result,
+        std::vector<std::vector<state_t>> *dfaSubsets,
+        std::chrono::steady_clock::time_point start);
 
    public:
     static int convertQx2Int(std::string q);
@@ -28,26 +143,108 @@ class Automaton
               std::vector<state_t> finalStates, state_t initialState);
     ~Automaton() = default;
     void addTransition(state_t from, state_t to, char symbol);
+    // Any byte in [first, last]; '\0' is an ordinary byte here.
+    void addTransition(state_t from, state_t to, char first, char last);
+    void addEpsilonTransition(state_t from, state_t to);
+    // Matches the UTF-8 encoding of any code point in [first, last],
+    // surrogates excluded. Intermediate states are numbered from the
+    // current state bound upwards; see reserveStates().
+    void addCodePointTransition(state_t from, state_t to, char32_t first,
+                                char32_t last);
+    void addTransitions(const state_t *from, const state_t *to,
+                        const char *symbols, size_t count);
+    // Range edges; `epsilon` may be null when no edge is an epsilon edge.
+    void addTransitions(const state_t *from, const state_t *to,
+                        const char *firsts, const char *lasts,
+                        const uint8_t *epsilon, size_t count);
+    // Keeps state ids below `count` out of addCodePointTransition's way.
+    void reserveStates(state_t count);
     void addFinalState(state_t state);
+    void addFinalStates(const state_t *states, size_t count);
     void setInitialState(state_t state);
-    bool isFinalState(state_t state);
+    bool isFinalState(state_t state) const
+    {
+        return 0 <= state && state < finalMask.size() && finalMask[state];
+    }
     state_t getInitialState();
     state_t getNextState(state_t state, char symbol);
     bool isDeterministic();
     bool isAccepted(std::string input);
     bool isAccepted(std::string input, state_t state);
+    void precomputeClosures();
+    // Covers every state below the current state bound.
+    std::shared_ptr<const EpsilonClosureIndex> getClosureIndex();
     std::vector<state_t> getEpsilonClosure(state_t state);
     std::vector<state_t> getEpsilonClosure(std::vector<state_t> states);
+    // Targets of the edges matching `symbol`; '\0' asks for epsilon edges.
     std::vector<state_t> getTransitions(state_t state, char symbol);
     std::vector<state_t> getTransitions(std::vector<state_t> states,
                                         char symbol);
 
     Automaton determinize();
+    // Throws DeterminizeAborted when a limit in `options` is hit; `stats`
+    // is filled in either way. `subsets`, when given, receives the sorted
+    // NFA states that make up each DFA state.
+    Automaton determinize(const DeterminizeOptions &options,
+                          DeterminizeStats *stats = nullptr,
+                          std::vector<std::vector<state_t>> *subsets = nullptr);
+    Automaton minimize();
+    // Minimizes a DFA without merging final states whose `acceptClasses`
+    // entries (indexed by state) differ. `representatives`, when given,
+    // receives a state of this automaton for each state of the result.
+    Automaton minimize(const std::vector<state_t> &acceptClasses,
+                       std::vector<state_t> *representatives = nullptr);
+    CompiledDFA compile();
     void output();
 
-    std::vector<state_t> getStates();
+    // Language operations; the checks explore subsets on the fly and stop
+    // at the first counterexample.
+    // Product automaton of the reachable state pairs.
+    Automaton intersect(Automaton &other);
+    // A new start state with epsilon edges to both automata.
+    Automaton unite(Automaton &other);
+    // A DFA over all 256 bytes accepting what this automaton rejects.
+    Automaton complement();
+    bool isEmpty();
+    // A string accepted by exactly one of the two automata, or nullopt if
+    // they accept the same language.
+    std::optional<std::string> findDifference(Automaton &other);
+    // A string this automaton accepts and `other` rejects, or nullopt if
+    // its language is included in that of `other`.
+    std::optional<std::string> findInclusionCounterexample(Automaton &other);
+    bool isEquivalent(Automaton &other) { return !findDifference(other); }
+    bool isSubsetOf(Automaton &other)
+    {
+        return !findInclusionCounterexample(other);
+    }
+
+    // Packs the edges into CSR form, which drops the per-state vector
+    // overhead and turns symbol lookups into binary searches. Any later
+    // edit unpacks them again.
+    void freeze();
+    bool isFrozen() const { return frozen; }
+    // Bytes held by the states, edges and final states.
+    size_t getMemoryBytes() const;
+
+    const std::vector<state_t> &getStates() const { return states; }
+    const std::vector<state_t> &getFinalStates() const { return finalStates; }
+    // Views that stay valid until the next edit.
+    TransitionView getTransitionView() const;
+    std::span<const Transition> getOutgoing(state_t state) const
+    {
+        return getTransitionView()[state];
+    }
     std::vector<std::vector<Transition>> getTransitions();
-    std::vector<state_t> getFinalStates();
+    TransitionArrays exportTransitions();
+    ByteClasses getByteClasses();
+
+    // Versioned binary format; `sourceHash` records the structureHash() of
+    // the automaton this one was derived from, or 0. Edges are saved in
+    // frozen order, and load() returns a frozen automaton without sorting.
+    void save(const std::string &path, uint64_t sourceHash = 0);
+    static Automaton load(const std::string &path,
+                          uint64_t *sourceHash = nullptr);
+    uint64_t structureHash();
 };
 
 #endif  // AUTOMATON_H_
\ No newline at end of file
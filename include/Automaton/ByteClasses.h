@@ -0,0 +1,43 @@
+#ifndef BYTE_CLASSES_H_
+#define BYTE_CLASSES_H_
+
+#include <array>
+#include <cstdint>
+#include <vector>
+
+#include "Automaton/Automaton.h"
+
+// Splits the 256 byte values into contiguous classes such that every
+// transition range is a union of whole classes. Bytes of one class behave
+// identically in the automaton the classes were built from, so tables can
+// have one column per class instead of one per byte.
+class ByteClasses
+{
+   private:
+    std::array<uint8_t, 256> classOf;
+    std::array<uint16_t, 257> starts;
+    int count;
+
+    void split(const std::array<bool, 257> &boundary);
+
+   public:
+    // A single class holding every byte.
+    ByteClasses();
+    explicit ByteClasses(TransitionView transitions);
+    // Classes fine enough for both automata at once.
+    ByteClasses(TransitionView transitions, TransitionView others);
+
+    int getCount() const { return count; }
+    uint8_t get(unsigned char byte) const { return classOf[byte]; }
+    unsigned char getFirst(int symbolClass) const
+    {
+        return static_cast<unsigned char>(starts[symbolClass]);
+    }
+    unsigned char getLast(int symbolClass) const
+    {
+        return static_cast<unsigned char>(starts[symbolClass + 1] - 1);
+    }
+    const std::array<uint8_t, 256> &getClassOf() const { return classOf; }
+};
+
+#endif  // BYTE_CLASSES_H_
@@ -0,0 +1,55 @@
+#ifndef COMPILED_DFA_H_
+#define COMPILED_DFA_H_
+
+#include <cstddef>
+#include <cstdint>
+#include <string_view>
+#include <vector>
+
+#include "Automaton/Automaton.h"
+#include "Automaton/ByteClasses.h"
+
+// A deterministic automaton frozen into a dense next-state table with one
+// row per state and one column per byte class, and a bitmap of final
+// states. Missing transitions are stored as -1.
+class CompiledDFA
+{
+   private:
+    ByteClasses classes;
+    size_t stride;
+    std::vector<int32_t> table;
+    std::vector<uint64_t> finalBits;
+    int32_t initialState;
+    int32_t stateCount;
+
+   public:
+    CompiledDFA(TransitionView transitions,
+                const std::vector<state_t> &finalStates,
+                state_t initialState, state_t stateCount);
+
+    int32_t getInitialState() const { return initialState; }
+    int32_t getStateCount() const { return stateCount; }
+    const ByteClasses &getByteClasses() const { return classes; }
+    // Unchecked: `state` must be in [0, getStateCount()).
+    int32_t getNextState(int32_t state, unsigned char symbol) const
+    {
+        return table[static_cast<size_t>(state) * stride + classes.get(symbol)];
+    }
+    bool isFinalState(int32_t state) const
+    {
+        return state >= 0 && (finalBits[state >> 6] >> (state & 63)) & 1;
+    }
+
+    bool isAccepted(std::string_view input) const;
+    // Writes one 0/1 result per input. `threads == 0` uses every hardware
+    // thread; small batches always run on the calling thread.
+    void matchMany(const std::string_view *inputs, size_t count,
+                   uint8_t *results, unsigned threads = 0) const;
+    // Input i is data[offsets[i], offsets[i + 1]); `offsets` holds
+    // count + 1 non-decreasing entries that must not exceed `size`.
+    void matchBuffer(const char *data, size_t size, const int64_t *offsets,
+                     size_t count, uint8_t *results,
+                     unsigned threads = 0) const;
+};
+
+#endif  // COMPILED_DFA_H_
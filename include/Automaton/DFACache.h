@@ -0,0 +1,35 @@
+#ifndef DFA_CACHE_H_
+#define DFA_CACHE_H_
+
+#include <cstddef>
+#include <cstdint>
+#include <string>
+
+#include "Automaton/Automaton.h"
+
+// A directory of binary automaton files keyed by the structure hash of the
+// NFA they were derived from, so repeated conversions of an unchanged NFA
+// are loaded instead of recomputed.
+class DFACache
+{
+   private:
+    std::string directory;
+    size_t hits = 0;
+    size_t misses = 0;
+
+    template <typename Operation>
+    Automaton lookup(Automaton &nfa, const char *name, Operation operation);
+
+   public:
+    explicit DFACache(std::string directory);
+
+    Automaton determinize(Automaton &nfa);
+    Automaton minimize(Automaton &nfa);
+    std::string getPath(uint64_t hash, const std::string &name) const;
+
+    const std::string &getDirectory() const { return directory; }
+    size_t getHits() const { return hits; }
+    size_t getMisses() const { return misses; }
+};
+
+#endif  // DFA_CACHE_H_
@@ -0,0 +1,81 @@
+#ifndef DETERMINIZE_H_
+#define DETERMINIZE_H_
+
+#include <atomic>
+#include <chrono>
+#include <cstddef>
+#include <functional>
+#include <memory>
+#include <stdexcept>
+
+// A flag shared between copies, so one thread can abort a determinize()
+// running on another.
+class CancellationToken
+{
+   private:
+    std::shared_ptr<std::atomic<bool>> cancelled =
+        std::make_shared<std::atomic<bool>>(false);
+
+   public:
+    void cancel() { cancelled->store(true, std::memory_order_relaxed); }
+    bool isCancelled() const
+    {
+        return cancelled->load(std::memory_order_relaxed);
+    }
+};
+
+struct DeterminizeStats
+{
+    size_t subsets = 0;
+    size_t closureComputations = 0;
+    size_t transitions = 0;
+    size_t peakSubsetSize = 0;
+    // Estimated bytes held by the subset table and the DFA under
+    // construction.
+    size_t memoryBytes = 0;
+    double closureIndexMs = 0;
+    double exploreMs = 0;
+    double buildMs = 0;
+    double totalMs = 0;
+};
+
+// Limits of zero mean unlimited.
+struct DeterminizeOptions
+{
+    size_t maxStates = 0;
+    size_t memoryBudget = 0;
+    std::chrono::steady_clock::time_point deadline =
+        std::chrono::steady_clock::time_point::max();
+    CancellationToken cancellation;
+    // Called with the running stats every `progressInterval` discovered
+    // subsets.
+    std::function<void(const DeterminizeStats &)> progress;
+    size_t progressInterval = 1024;
+    // Threads exploring subsets; 0 uses every hardware thread. The DFA is
+    // the same for any count. With more than one thread, `progress` is
+    // still only called on the calling thread.
+    unsigned threads = 1;
+};
+
+class DeterminizeAborted : public std::runtime_error
+{
+   public:
+    enum class Reason
+    {
+        MaxStates,
+        MemoryBudget,
+        Deadline,
+        Cancelled,
+    };
+
+    DeterminizeAborted(Reason reason, const DeterminizeStats &stats);
+
+    Reason getReason() const { return reason; }
+    const DeterminizeStats &getStats() const { return stats; }
+
+   private:
+    Reason reason;
+    DeterminizeStats stats;
+};
+
+#endif  // DETERMINIZE_H_
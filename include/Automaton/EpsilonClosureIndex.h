@@ -0,0 +1,54 @@
+#ifndef EPSILON_CLOSURE_INDEX_H_
+#define EPSILON_CLOSURE_INDEX_H_
+
+#include <cstddef>
+#include <span>
+#include <vector>
+
+#include "Automaton/Automaton.h"
+
+// The epsilon graph condensed once into its strongly connected components,
+// whose members share one closure. Closures themselves are not stored: on an
+// epsilon chain they would take quadratic space. They are expanded on demand
+// by walking the condensation, which costs time linear in the closure plus
+// the condensation edges between its components.
+class EpsilonClosureIndex
+{
+   private:
+    std::vector<state_t> componentOf;
+    std::vector<size_t> memberOffsets;
+    std::vector<state_t> members;
+    std::vector<size_t> successorOffsets;
+    std::vector<state_t> successors;
+
+   public:
+    EpsilonClosureIndex(TransitionView transitions, state_t stateCount);
+
+    state_t getStateCount() const { return componentOf.size(); }
+    state_t getComponentCount() const { return memberOffsets.size() - 1; }
+    state_t getComponent(state_t state) const { return componentOf[state]; }
+    std::span<const state_t> getMembers(state_t component) const
+    {
+        return {members.data() + memberOffsets[component],
+                members.data() + memberOffsets[component + 1]};
+    }
+    // Components reached by one epsilon edge, without repeats.
+    std::span<const state_t> getSuccessors(state_t component) const
+    {
+        return {successors.data() + successorOffsets[component],
+                successors.data() + successorOffsets[component + 1]};
+    }
+
+    // Appends the states of the closure of `state` that are not marked with
+    // `stamp` to `closure`, unsorted, and marks them. A component is marked
+    // as a whole together with everything it reaches, so callers pass the
+    // same stamp to take the union of several closures and must not mark
+    // states themselves. `marks` needs an entry for every state below
+    // getStateCount() and for `state`; states the index does not cover have
+    // no epsilon edges and are their own closure.
+    void appendClosure(state_t state, std::vector<state_t> &closure,
+                       std::vector<unsigned> &marks, unsigned stamp) const;
+    size_t getMemoryBytes() const;
+};
+
+#endif  // EPSILON_CLOSURE_INDEX_H_
@@ -0,0 +1,107 @@
+#ifndef INCREMENTAL_DFA_H_
+#define INCREMENTAL_DFA_H_
+
+#include <cstdint>
+#include <memory>
+#include <span>
+#include <vector>
+
+#include "Automaton/Automaton.h"
+#include "Automaton/ByteClasses.h"
+#include "Automaton/EpsilonClosureIndex.h"
+#include "Automaton/SubsetTable.h"
+
+// The DFA states an edit touched, each list ascending.
+struct DFAChanges
+{
+    // Reachable after the edit but not before.
+    std::vector<state_t> added;
+    // Reachable before the edit but not after.
+    std::vector<state_t> removed;
+    // Reachable before and after, with new edges or a new final flag.
+    std::vector<state_t> changed;
+    bool initialChanged = false;
+};
+
+// Keeps the subset construction of an NFA up to date while edges and final
+// states are added to it. A DFA state's id is the id of its subset and
+// stays the same for as long as the subset is reachable, so a view of the
+// DFA can apply the changes of each edit instead of being redrawn.
+// A byte edge from state s only re-expands the subsets holding s, plus any
+// new subsets they lead to, and a final flag only touches the subsets
+// holding its state. An epsilon edge that changes closures re-expands
+// every reachable subset, though unchanged subsets keep their ids.
+class IncrementalDFA
+{
+   private:
+    std::vector<std::vector<Transition>> transitions;
+    std::vector<bool> finalMask;
+    state_t initialState;
+    std::unique_ptr<EpsilonClosureIndex> closureIndex;
+    ByteClasses classes;
+
+    // Indexed by subset id. Subsets that fall out of reach are kept, so
+    // that their ids come back if they become reachable again; `expanded`
+    // is cleared when an edit makes a row stale.
+    SubsetTable subsets;
+    std::vector<std::vector<Transition>> rows;
+    std::vector<bool> finals;
+    std::vector<bool> expanded;
+    std::vector<bool> reachable;
+    // The subsets holding each NFA state.
+    std::vector<std::vector<state_t>> containing;
+    state_t initial = 0;
+    state_t reachableCount = 0;
+
+    std::vector<unsigned> marks;
+    unsigned stamp = 0;
+    std::vector<state_t> scratch;
+    std::vector<std::vector<state_t>> targets;
+    std::vector<uint8_t> symbolClasses;
+
+    void reserveStates(state_t bound);
+    state_t addSubset(const std::vector<state_t> &subset);
+    bool expand(state_t id);
+    DFAChanges update(state_t previousInitial);
+
+   public:
+    explicit IncrementalDFA(Automaton nfa);
+
+    // Each edit returns the DFA states it touched.
+    DFAChanges addTransition(state_t from, state_t to, char first, char last);
+    DFAChanges addEpsilonTransition(state_t from, state_t to);
+    DFAChanges setFinalState(state_t state, bool final);
+    DFAChanges setInitialState(state_t state);
+
+    state_t getInitialState() const { return initial; }
+    state_t getStateCount() const { return reachableCount; }
+    // All subsets seen so far, reachable or not.
+    state_t getSubsetCount() const { return subsets.size(); }
+    bool isReachable(state_t state) const
+    {
+        return 0 <= state && state < reachable.size() && reachable[state];
+    }
+    // The reachable DFA states, ascending.
+    std::vector<state_t> getStates() const;
+    // The edges of a reachable DFA state, ordered by byte.
+    const std::vector<Transition> &getTransitions(state_t state) const
+    {
+        return rows[state];
+    }
+    bool isFinalState(state_t state) const { return finals[state]; }
+    // The sorted NFA states making up a DFA state.
+    std::span<const state_t> getSubset(state_t state) const
+    {
+        return subsets.get(state);
+    }
+
+    Automaton getNFA() const;
+    // The reachable states renumbered breadth-first from 0. It accepts the
+    // same language as determinize(getNFA()) and, when getNFA() is not
+    // already deterministic, has the same number of states. determinize()
+    // returns a deterministic NFA unchanged, so its numbering and any
+    // unreachable states are kept there.
+    Automaton getDFA() const;
+};
+
+#endif  // INCREMENTAL_DFA_H_
@@ -0,0 +1,73 @@
+#ifndef LAZY_DFA_H_
+#define LAZY_DFA_H_
+
+#include <cstddef>
+#include <cstdint>
+#include <memory>
+#include <string_view>
+#include <unordered_map>
+#include <vector>
+
+#include "Automaton/Automaton.h"
+#include "Automaton/ByteClasses.h"
+#include "Automaton/EpsilonClosureIndex.h"
+
+// Runs an NFA through DFA states that are built only when the input reaches
+// them, with one transition column per byte class rather than per byte.
+// States live in a cache bounded by `cacheBytes`; when it fills up the
+// cache is cleared and rebuilt from the current state. If clears keep
+// coming with little input consumed in between, matching switches to
+// simulating the NFA over a bitset of active states for a while.
+// A LazyDFA mutates its cache while matching and is not thread-safe.
+class LazyDFA
+{
+   private:
+    struct SubsetHash
+    {
+        size_t operator()(const std::vector<state_t> &subset) const;
+    };
+
+    Automaton nfa;
+    std::shared_ptr<const EpsilonClosureIndex> closureIndex;
+    std::vector<size_t> edgeOffsets;
+    std::vector<Transition> edges;
+    std::vector<uint64_t> nfaFinalBits;
+    std::vector<state_t> startSubset;
+    ByteClasses classes;
+    size_t cacheBytes;
+
+    std::unordered_map<std::vector<state_t>, int32_t, SubsetHash> ids;
+    std::vector<const std::vector<state_t> *> subsets;
+    std::vector<int32_t> next;
+    std::vector<bool> finals;
+    int32_t startState = -2;
+    size_t cacheUsage = 0;
+    size_t cacheClears = 0;
+    size_t fallbackCount = 0;
+    size_t bytesScanned = 0;
+    size_t bytesAtClear = 0;
+    size_t simulateUntil = 0;
+    int thrashCount = 0;
+    std::vector<uint64_t> current;
+    std::vector<uint64_t> following;
+    std::vector<state_t> reached;
+    std::vector<unsigned> marks;
+    unsigned stamp = 0;
+
+    int32_t addState(const std::vector<state_t> &subset, size_t progress);
+    bool simulate(const std::vector<state_t> &subset, std::string_view input);
+
+   public:
+    LazyDFA(Automaton automaton, size_t cacheBytes = 1 << 20);
+
+    bool isAccepted(std::string_view input);
+    void clearCache();
+
+    size_t getCacheBytes() const { return cacheBytes; }
+    size_t getCacheUsage() const { return cacheUsage; }
+    int32_t getCachedStateCount() const { return subsets.size(); }
+    size_t getCacheClears() const { return cacheClears; }
+    size_t getFallbackCount() const { return fallbackCount; }
+};
+
+#endif  // LAZY_DFA_H_
@@ -0,0 +1,30 @@
+#ifndef MAPPED_FILE_H_
+#define MAPPED_FILE_H_
+
+#include <cstddef>
+#include <string>
+
+// A read-only memory mapping of a whole file, unmapped on destruction.
+class MappedFile
+{
+   private:
+    const char *data = nullptr;
+    size_t size = 0;
+#ifdef _WIN32
+    void *file = nullptr;
+    void *mapping = nullptr;
+#else
+    int descriptor = -1;
+#endif
+
+   public:
+    explicit MappedFile(const std::string &path);
+    ~MappedFile();
+    MappedFile(const MappedFile &) = delete;
+    MappedFile &operator=(const MappedFile &) = delete;
+
+    const char *getData() const { return data; }
+    size_t getSize() const { return size; }
+};
+
+#endif  // MAPPED_FILE_H_
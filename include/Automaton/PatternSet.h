@@ -0,0 +1,70 @@
+#ifndef PATTERN_SET_H_
+#define PATTERN_SET_H_
+
+#include <cstddef>
+#include <cstdint>
+#include <span>
+#include <string_view>
+#include <vector>
+
+#include "Automaton/Automaton.h"
+#include "Automaton/CompiledDFA.h"
+
+// Many automata matched in one pass over the input. The patterns are
+// joined into one NFA whose start state has an epsilon edge to each of
+// them, and the minimal DFA built from it records the ids of the patterns
+// that accept in each of its states. A pattern's id is its position in the
+// list it was built from; lower ids take priority in matchFirst().
+class PatternSet
+{
+   private:
+    CompiledDFA dfa;
+    // The ids accepted in state s, ascending, are
+    // acceptIds[acceptOffsets[s], acceptOffsets[s + 1]).
+    std::vector<int32_t> acceptOffsets;
+    std::vector<int32_t> acceptIds;
+    int32_t patternCount;
+
+    PatternSet(CompiledDFA dfa, std::vector<int32_t> acceptOffsets,
+               std::vector<int32_t> acceptIds, int32_t patternCount);
+
+   public:
+    // The union NFA. State 0 is the new start state; pattern i's states
+    // follow those of the patterns before it, and `patternOf`, when given,
+    // receives the pattern of every state (-1 for the start state).
+    static Automaton unite(std::vector<Automaton> &patterns,
+                           std::vector<int32_t> *patternOf = nullptr);
+    // Throws DeterminizeAborted when a limit in `options` is hit.
+    static PatternSet build(std::vector<Automaton> &patterns,
+                            const DeterminizeOptions &options = {},
+                            DeterminizeStats *stats = nullptr);
+
+    int32_t getPatternCount() const { return patternCount; }
+    int32_t getStateCount() const { return dfa.getStateCount(); }
+    const CompiledDFA &getDFA() const { return dfa; }
+    // Empty for the dead state and for states out of range.
+    std::span<const int32_t> getAcceptIds(int32_t state) const
+    {
+        if (state < 0 || state >= getStateCount())
+        {
+            return {};
+        }
+        return {acceptIds.data() + acceptOffsets[state],
+                acceptIds.data() + acceptOffsets[state + 1]};
+    }
+
+    // The state reached on `input`, or -1 once no pattern can match.
+    int32_t run(std::string_view input) const;
+    // The ids of the patterns that accept the whole input, ascending.
+    std::span<const int32_t> match(std::string_view input) const
+    {
+        return getAcceptIds(run(input));
+    }
+    // The lowest id among them, or -1.
+    int32_t matchFirst(std::string_view input) const;
+    // Writes the state reached on each input, for getAcceptIds().
+    void runMany(const std::string_view *inputs, size_t count,
+                 int32_t *states) const;
+};
+
+#endif  // PATTERN_SET_H_
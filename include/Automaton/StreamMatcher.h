@@ -0,0 +1,52 @@
+#ifndef STREAM_MATCHER_H_
+#define STREAM_MATCHER_H_
+
+#include <cstddef>
+#include <cstdint>
+#include <string>
+#include <vector>
+
+#include "Automaton/CompiledDFA.h"
+
+// Runs a CompiledDFA over input that arrives in chunks, carrying the
+// current state from one feed() to the next.
+//
+// By default matching is anchored at the first byte after construction or
+// reset(), and every offset at which the bytes consumed so far are
+// accepted is reported as a match end offset. That includes offset 0 when
+// the DFA accepts the empty input; it is reported by the first feed(), or
+// by finish() if nothing was fed. In line mode every line is
+// matched on its own (the '\n' is not part of the line) and the 1-based
+// numbers of accepted lines are reported instead; the last line is only
+// reported by finish() if it has no trailing newline.
+class StreamMatcher
+{
+   private:
+    const CompiledDFA *dfa;
+    bool lineMode;
+    int32_t state;
+    int64_t offset = 0;
+    int64_t line = 1;
+    int64_t lineStart = 0;
+    bool startReported = false;
+
+    void reportStart(std::vector<int64_t> &matches);
+
+   public:
+    explicit StreamMatcher(const CompiledDFA &dfa, bool lineMode = false);
+
+    void feed(const char *data, size_t size, std::vector<int64_t> &matches);
+    void finish(std::vector<int64_t> &matches);
+    void reset();
+
+    int32_t getState() const { return state; }
+    int64_t getOffset() const { return offset; }
+    bool isLineMode() const { return lineMode; }
+    bool isAccepting() const { return dfa->isFinalState(state); }
+};
+
+// Memory-maps `path` and scans it in one pass with a StreamMatcher.
+std::vector<int64_t> scanFile(const CompiledDFA &dfa, const std::string &path,
+                              bool lineMode = false);
+
+#endif  // STREAM_MATCHER_H_
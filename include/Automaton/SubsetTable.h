@@ -0,0 +1,91 @@
+#ifndef SUBSET_TABLE_H_
+#define SUBSET_TABLE_H_
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <span>
+#include <unordered_set>
+#include <vector>
+
+#include "Automaton/Automaton.h"
+
+// Stores each distinct subset once, as a sorted run in a shared pool, and
+// maps it to its DFA state id through a hash set keyed by that id.
+class SubsetTable
+{
+   public:
+    SubsetTable() : ids(16, IdHash{this}, IdEqual{this}) {}
+
+    static size_t hash(std::span<const state_t> subset)
+    {
+        uint64_t hash = 14695981039346656037ull;
+        for (state_t state : subset)
+        {
+            hash = (hash ^ static_cast<uint32_t>(state)) * 1099511628211ull;
+        }
+        return static_cast<size_t>(hash ^ (hash >> 32));
+    }
+
+    state_t size() const { return static_cast<state_t>(offsets.size() - 1); }
+
+    // The returned view is invalidated by the next intern().
+    std::span<const state_t> get(state_t id) const
+    {
+        if (id < 0)
+        {
+            return probe;
+        }
+        return {pool.data() + offsets[id], pool.data() + offsets[id + 1]};
+    }
+
+    size_t getMemoryBytes() const
+    {
+        // Each hash node holds an id and a next pointer, plus the bucket.
+        return pool.capacity() * sizeof(state_t) +
+               offsets.capacity() * sizeof(size_t) +
+               ids.size() * 2 * sizeof(void *) +
+               ids.bucket_count() * sizeof(void *);
+    }
+
+    state_t intern(std::span<const state_t> subset)
+    {
+        probe = subset;
+        auto found = ids.find(-1);
+        if (found != ids.end())
+        {
+            return *found;
+        }
+        state_t id = size();
+        pool.insert(pool.end(), subset.begin(), subset.end());
+        offsets.push_back(pool.size());
+        ids.insert(id);
+        return id;
+    }
+
+   private:
+    // Id -1 stands for the subset being looked up.
+    struct IdHash
+    {
+        const SubsetTable *table;
+        size_t operator()(state_t id) const { return hash(table->get(id)); }
+    };
+
+    struct IdEqual
+    {
+        const SubsetTable *table;
+        bool operator()(state_t a, state_t b) const
+        {
+            auto lhs = table->get(a);
+            auto rhs = table->get(b);
+            return std::equal(lhs.begin(), lhs.end(), rhs.begin(), rhs.end());
+        }
+    };
+
+    std::vector<state_t> pool;
+    std::vector<size_t> offsets = {0};
+    std::span<const state_t> probe;
+    std::unordered_set<state_t, IdHash, IdEqual> ids;
+};
+
+#endif  // SUBSET_TABLE_H_
@@ -6,33 +6,21 @@ current_dir = os.path.dirname(current_file_path)
 parent_dir = os.path.abspath(os.path.join(current_dir, os.pardir))  # Get the parent directory
 
 sys.path.append(os.path.join(parent_dir, 'python_package'))  # Add python_packages to sys.path
+sys.path.insert(0, current_dir)  # for the helper modules next to this script
 
 import tkinter as tk
 from tkinter import simpledialog, messagebox, filedialog
 import math
 import json
+import numpy as np
 import Automaton_bindings as Automaton # type: ignore
+import graph_layout
+import nfa_json
+
+# above this many states edges are drawn without labels or arrowheads
+DETAIL_LIMIT = 300
+
 
-centers = [
-    [100, 100], [140, 100], [180, 100], [220, 100], [260, 100], [300, 100],
-    [340, 100], [380, 100], [420, 100], [460, 100], [100, 140], [140, 140],
-    [180, 140], [220, 140], [260, 140], [300, 140], [340, 140], [380, 140],
-    [420, 140], [460, 140], [100, 180], [140, 180], [180, 180], [220, 180],
-    [260, 180], [300, 180], [340, 180], [380, 180], [420, 180], [460, 180],
-    [100, 220], [140, 220], [180, 220], [220, 220], [260, 220], [300, 220],
-    [340, 220], [380, 220], [420, 220], [460, 220], [100, 260], [140, 260],
-    [180, 260], [220, 260], [260, 260], [300, 260], [340, 260], [380, 260],
-    [420, 260], [460, 260], [100, 300], [140, 300], [180, 300], [220, 300],
-    [260, 300], [300, 300], [340, 300], [380, 300], [420, 300], [460, 300],
-    [100, 340], [140, 340], [180, 340], [220, 340], [260, 340], [300, 340],
-    [340, 340], [380, 340], [420, 340], [460, 340], [100, 380], [140, 380],
-    [180, 380], [220, 380], [260, 380], [300, 380], [340, 380], [380, 380],
-    [420, 380], [460, 380], [100, 420], [140, 420], [180, 420], [220, 420],
-    [260, 420], [300, 420], [340, 420], [380, 420], [420, 420], [460, 420],
-    [100, 460], [140, 460], [180, 460], [220, 460], [260, 460], [300, 460],
-    [340, 460], [380, 460], [420, 460], [460, 460]
-]
- 
 class NFAEditor:
     def __init__(self, root):
         self.root = root
@@ -40,13 +28,25 @@ class NFAEditor:
         self.canvas = tk.Canvas(self.root, width=800, height=600, bg='white')
         self.canvas.pack()
 
+        # one binding per event for all states; the item under the pointer
+        # is mapped back to its state through item_states
+        self.canvas.tag_bind("state", '<Button-1>', lambda event: self.select_state(event, self.event_state()))
+        self.canvas.tag_bind("state", '<B1-Motion>', lambda event: self.move_state(event, self.event_state()))
+        # drag with the right button to pan
+        self.canvas.bind('<ButtonPress-3>', lambda event: self.canvas.scan_mark(event.x, event.y))
+        self.canvas.bind('<B3-Motion>', lambda event: self.canvas.scan_dragto(event.x, event.y, gain=1))
+
         self.state_counter = 0
         self.states = {}
         self.transitions = {}
+        self.adjacency = {}  # state id -> keys of self.transitions touching it
+        self.item_states = {}
+        self.reduced_detail = False
         self.selected_states = []
         self.start_state = None
         self.final_states = set()
         self.last_selected_color = 'blue'  # 新增属性记录上次选中的颜色
+        self.dfa_view = None
 
         self.init_buttons()
 
@@ -75,27 +75,44 @@ class NFAEditor:
         self.convert_button = tk.Button(self.root, text="Convert to DFA", command=self.convert_to_dfa)
         self.convert_button.pack(side=tk.LEFT)
 
-    def add_state(self):
-        if self.state_counter >= len(centers):
-            print("No more predefined centers available.")
-            return
+        self.layout_button = tk.Button(self.root, text="Auto Layout", command=self.auto_layout)
+        self.layout_button.pack(side=tk.LEFT)
+
+        self.minimize_var = tk.BooleanVar(value=False)
+        self.minimize_check = tk.Checkbutton(self.root, text="Minimize", variable=self.minimize_var)
+        self.minimize_check.pack(side=tk.LEFT)
 
-        x, y = centers[self.state_counter]
-        state_id = f"q{self.state_counter}"
-        self.state_counter += 1
+        self.live_dfa_var = tk.BooleanVar(value=False)
+        self.live_dfa_check = tk.Checkbutton(self.root, text="Live DFA", variable=self.live_dfa_var,
+                                             command=self.toggle_live_dfa)
+        self.live_dfa_check.pack(side=tk.LEFT)
 
-        state_circle = self.canvas.create_oval(x - 20, y - 20, x + 20, y + 20, outline='black', width=2)
-        state_text = self.canvas.create_text(x, y, text=state_id, fill='black')
+    def add_state(self):
+        x, y = nfa_json.grid_position(self.state_counter).values()
+        self.create_state(f"q{self.state_counter}", x, y)
+        self.update_scroll_region()
+
+    def create_state(self, state_id, x, y):
+        self.state_counter = max(self.state_counter, nfa_json.state_number(state_id) + 1)
+        state_circle = self.canvas.create_oval(x - 20, y - 20, x + 20, y + 20, outline='black', width=2, tags="state")
+        state_text = self.canvas.create_text(x, y, text=state_id, fill='black', tags="state")
 
         self.states[state_id] = (state_circle, state_text, x, y)
+        self.adjacency[state_id] = set()
+        self.item_states[state_circle] = self.item_states[state_text] = state_id
 
-        self.canvas.tag_bind(state_circle, '<Button-1>', lambda event, sid=state_id: self.select_state(event, sid))
-        self.canvas.tag_bind(state_text, '<Button-1>', lambda event, sid=state_id: self.select_state(event, sid))
+    def event_state(self):
+        current = self.canvas.find_withtag("current")
+        return self.item_states.get(current[0]) if current else None
 
-        self.canvas.tag_bind(state_circle, '<B1-Motion>', lambda event, sid=state_id: self.move_state(event, sid))
-        self.canvas.tag_bind(state_text, '<B1-Motion>', lambda event, sid=state_id: self.move_state(event, sid))
+    def update_scroll_region(self):
+        bbox = self.canvas.bbox("all")
+        if bbox:
+            self.canvas.config(scrollregion=(min(bbox[0], 0), min(bbox[1], 0), bbox[2] + 50, bbox[3] + 50))
 
     def select_state(self, event, state_id):
+        if state_id is None:
+            return
         if state_id in self.selected_states:
             self.canvas.itemconfig(self.states[state_id][0], outline='black')
             self.selected_states.remove(state_id)
@@ -128,30 +145,39 @@ class NFAEditor:
     def delete_state(self):
         if len(self.selected_states) == 1:
             state_id = self.selected_states.pop()
-            self.clear_inner_circle(state_id)
-            self.canvas.delete(self.states[state_id][0])
-            self.canvas.delete(self.states[state_id][1])
-            del self.states[state_id]
+            self.remove_state(state_id)
+            # the NFA loses edges, which the live DFA cannot follow
+            self.refresh_dfa_view()
+
+            self.delete_state_button.config(state=tk.DISABLED)
+            self.set_start_button.config(state=tk.DISABLED)
+            self.set_final_button.config(state=tk.DISABLED)
 
-            if state_id == self.start_state:
-                self.start_state = None
+    def remove_state(self, state_id):
+        """Deletes a state with its markers and every transition touching it."""
+        self.clear_inner_circle(state_id)
+        circle, text, x, y = self.states.pop(state_id)
+        self.canvas.delete(circle)
+        self.canvas.delete(text)
 
-            if state_id in self.final_states:
-                self.final_states.remove(state_id)
+        if state_id == self.start_state:
+            self.start_state = None
 
-            transitions_to_remove = []
-            for (from_state, to_state), (transition, transition_text, char) in self.transitions.items():
-                if from_state == state_id or to_state == state_id:
-                    self.canvas.delete(transition)
-                    self.canvas.delete(transition_text)
-                    transitions_to_remove.append((from_state, to_state))
+        if state_id in self.final_states:
+            self.final_states.remove(state_id)
 
-            for key in transitions_to_remove:
-                del self.transitions[key]
+        del self.item_states[circle], self.item_states[text]
+        for key in self.adjacency.pop(state_id):
+            self.remove_transition(key)
 
-            self.delete_state_button.config(state=tk.DISABLED)
-            self.set_start_button.config(state=tk.DISABLED)
-            self.set_final_button.config(state=tk.DISABLED)
+    def remove_transition(self, key):
+        transition, transition_text, char = self.transitions.pop(key)
+        self.canvas.delete(transition)
+        if transition_text is not None:
+            self.canvas.delete(transition_text)
+        for state_id in key:
+            if state_id in self.adjacency:
+                self.adjacency[state_id].discard(key)
 
     def add_transition(self, transition_char=None):
         if len(self.selected_states) == 1:
@@ -162,55 +188,30 @@ class NFAEditor:
             return
 
         if transition_char is None:
-            transition_char = simpledialog.askstring("Input", "Enter transition character (leave empty for ε):")
+            transition_char = simpledialog.askstring(
+                "Input", "Enter a transition character or range such as a-z (leave empty for ε):")
             # deal with cancel 
             if transition_char is None:
                 return
             if transition_char == "":
                 transition_char = "ε"
+            try:
+                nfa_json.parse_label(transition_char)
+            except ValueError as error:
+                messagebox.showerror("Error", str(error))
+                return
 
-        x1, y1 = self.states[from_state][2], self.states[from_state][3]
-        x2, y2 = self.states[to_state][2], self.states[to_state][3]
-
-        if from_state == to_state:
-            if (from_state, to_state) in self.transitions:
-                existing_transition, existing_text, existing_chars = self.transitions[(from_state, to_state)]
-                if transition_char in existing_chars:
-                    return
-                else:
-                    new_chars = existing_chars + "+" + transition_char
-                    self.canvas.itemconfig(existing_text, text=new_chars)
-                    self.transitions[(from_state, to_state)] = (existing_transition, existing_text, new_chars)
-            else:
-                loop_radius = 30
-                loop = self.canvas.create_oval(x1 - loop_radius, y1 - loop_radius, x1 + loop_radius, y1 + loop_radius, outline='black')
-                text_x = x1
-                text_y = y1 - loop_radius - 10
-                transition_text = self.canvas.create_text(text_x, text_y, text=transition_char, fill='green', font=('Helvetica', 12, 'bold'))
-                self.transitions[(from_state, to_state)] = (loop, transition_text, transition_char)
+        if (from_state, to_state) in self.transitions:
+            existing_transition, existing_text, existing_chars = self.transitions[(from_state, to_state)]
+            if transition_char in existing_chars.split("+"):
+                return
+            new_chars = existing_chars + "+" + transition_char
+            if existing_text is not None:
+                self.canvas.itemconfig(existing_text, text=new_chars)
+            self.transitions[(from_state, to_state)] = (existing_transition, existing_text, new_chars)
         else:
-            # Calculate points on the edge of the circles
-            angle = math.atan2(y2 - y1, x2 - x1)
-            x1_edge = x1 + 20 * math.cos(angle)
-            y1_edge = y1 + 20 * math.sin(angle)
-            x2_edge = x2 - 20 * math.cos(angle)
-            y2_edge = y2 - 20 * math.sin(angle)
-
-            if (from_state, to_state) in self.transitions:
-                existing_transition, existing_text, existing_chars = self.transitions[(from_state, to_state)]
-                if transition_char in existing_chars:
-                    return
-                else:
-                    new_chars = existing_chars + "+" + transition_char
-                    self.canvas.itemconfig(existing_text, text=new_chars)
-                    self.transitions[(from_state, to_state)] = (existing_transition, existing_text, new_chars)
-            else:
-                transition = self.canvas.create_line(x1_edge, y1_edge, x2_edge, y2_edge, arrow=tk.LAST)
-                text_x = x2_edge - (x2_edge - x1_edge) / 4
-                text_y = y2_edge - (y2_edge - y1_edge) / 4
-                transition_text = self.canvas.create_text(text_x, text_y, text=transition_char, fill='green', font=('Helvetica', 12, 'bold'))
-
-                self.transitions[(from_state, to_state)] = (transition, transition_text, transition_char)
+            self.draw_transition(from_state, to_state, transition_char)
+        self.update_dfa_view(lambda dfa: self.add_dfa_transition(dfa, from_state, to_state, transition_char))
 
         self.canvas.itemconfig(self.states[from_state][0], outline='black')
         self.canvas.itemconfig(self.states[to_state][0], outline='black')
@@ -221,9 +222,47 @@ class NFAEditor:
         self.set_final_button.config(state=tk.DISABLED)
 
 
+    def draw_transition(self, from_state, to_state, chars):
+        line_coords, text_coords = self.transition_coords(from_state, to_state)
+        if from_state == to_state:
+            transition = self.canvas.create_oval(*line_coords, outline='black')
+        else:
+            transition = self.canvas.create_line(*line_coords, arrow=tk.NONE if self.reduced_detail else tk.LAST)
+        transition_text = None
+        if not self.reduced_detail:
+            transition_text = self.canvas.create_text(*text_coords, text=chars, fill='green', font=('Helvetica', 12, 'bold'))
+
+        self.transitions[(from_state, to_state)] = (transition, transition_text, chars)
+        self.adjacency[from_state].add((from_state, to_state))
+        self.adjacency[to_state].add((from_state, to_state))
+
+    def transition_coords(self, from_state, to_state):
+        """Returns the coordinates of the transition's line (or self-loop
+        oval) and of its label."""
+        x1, y1 = self.states[from_state][2], self.states[from_state][3]
+        x2, y2 = self.states[to_state][2], self.states[to_state][3]
+
+        if from_state == to_state:
+            loop_radius = 30
+            return (x1 - loop_radius, y1 - loop_radius, x1 + loop_radius, y1 + loop_radius), (x1, y1 - loop_radius - 10)
+
+        # Calculate points on the edge of the circles
+        angle = math.atan2(y2 - y1, x2 - x1)
+        x1_edge = x1 + 20 * math.cos(angle)
+        y1_edge = y1 + 20 * math.sin(angle)
+        x2_edge = x2 - 20 * math.cos(angle)
+        y2_edge = y2 - 20 * math.sin(angle)
+
+        # The label sits closer to the end state
+        text_x = x2_edge - (x2_edge - x1_edge) / 4
+        text_y = y2_edge - (y2_edge - y1_edge) / 4
+        return (x1_edge, y1_edge, x2_edge, y2_edge), (text_x, text_y)
+
     def move_state(self, event, state_id):
-        x, y = event.x, event.y
+        if state_id is not None:
+            self.place_state(state_id, self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
 
+    def place_state(self, state_id, x, y):
         # 删除旧的起始状态或终止状态圆圈
         self.clear_inner_circle(state_id)
 
@@ -237,33 +276,27 @@ class NFAEditor:
         if state_id in self.final_states:
             self.update_final_state_circle(state_id)
 
-        for (from_state, to_state), (transition, transition_text, transition_char) in self.transitions.items():
-            if from_state == state_id or to_state == state_id:
-                x1, y1 = self.states[from_state][2], self.states[from_state][3]
-                x2, y2 = self.states[to_state][2], self.states[to_state][3]
-
-                if from_state == to_state:
-                    # Update the self-loop position
-                    loop_radius = 30
-                    self.canvas.coords(transition, x1 - loop_radius, y1 - loop_radius, x1 + loop_radius, y1 + loop_radius)
-                    text_x = x1
-                    text_y = y1 - loop_radius - 10
-                    self.canvas.coords(transition_text, text_x, text_y)
-                else:
-                    # Calculate points on the edge of the circles
-                    angle = math.atan2(y2 - y1, x2 - x1)
-                    x1_edge = x1 + 20 * math.cos(angle)
-                    y1_edge = y1 + 20 * math.sin(angle)
-                    x2_edge = x2 - 20 * math.cos(angle)
-                    y2_edge = y2 - 20 * math.sin(angle)
-
-                    self.canvas.coords(transition, x1_edge, y1_edge, x2_edge, y2_edge)
-
-                    # Update the position of the transition text to be closer to the end state
-                    text_x = x2_edge - (x2_edge - x1_edge) / 4
-                    text_y = y2_edge - (y2_edge - y1_edge) / 4
-                    self.canvas.coords(transition_text, text_x, text_y)
-    
+        # only the transitions touching this state need to move
+        for key in self.adjacency[state_id]:
+            transition, transition_text, transition_char = self.transitions[key]
+            line_coords, text_coords = self.transition_coords(*key)
+            self.canvas.coords(transition, *line_coords)
+            if transition_text is not None:
+                self.canvas.coords(transition_text, *text_coords)
+
+    def auto_layout(self):
+        state_ids = list(self.states)
+        if not state_ids:
+            return
+        index = {state_id: i for i, state_id in enumerate(state_ids)}
+        sources = np.array([index[from_state] for from_state, to_state in self.transitions], dtype=np.int64)
+        targets = np.array([index[to_state] for from_state, to_state in self.transitions], dtype=np.int64)
+        initial = index.get(self.start_state, 0)
+        positions = graph_layout.auto_layout(len(state_ids), sources, targets, initial)
+        for state_id, (x, y) in zip(state_ids, positions.tolist()):
+            self.place_state(state_id, x, y)
+        self.update_scroll_region()
+
     def clear_inner_circle(self, state_id):
         """Helper function to clear inner circle of a start or final state"""
         if state_id == self.start_state:
@@ -278,6 +311,7 @@ class NFAEditor:
                 self.update_start_state_circle(self.start_state, clear=True)
             self.start_state = new_start_state
             self.update_start_state_circle(new_start_state)
+            self.update_dfa_view(lambda dfa: dfa.setInitialState(nfa_json.state_number(new_start_state)))
 
             self.canvas.itemconfig(self.states[new_start_state][0], outline='black')
             self.selected_states = []
@@ -294,6 +328,8 @@ class NFAEditor:
             else:
                 self.final_states.add(final_state)
                 self.update_final_state_circle(final_state)
+            self.update_dfa_view(lambda dfa: dfa.setFinalState(nfa_json.state_number(final_state),
+                                                               final_state in self.final_states))
 
             self.canvas.itemconfig(self.states[final_state][0], outline='black')
             self.selected_states = []
@@ -317,7 +353,7 @@ class NFAEditor:
             self.canvas.delete(f"final_{state_id}")
             self.canvas.create_oval(x - 10, y - 10, x + 10, y + 10, outline='red', width=2, tags=f"final_{state_id}")
 
-    def save_nfa(self):
+    def to_document(self):
         nfa = {
             "states": {state_id: {"x": x, "y": y} for state_id, (circle, text, x, y) in self.states.items()},
             "transitions": []
@@ -329,7 +365,10 @@ class NFAEditor:
 
         nfa["start_state"] = self.start_state
         nfa["final_states"] = list(self.final_states)
+        return nfa
 
+    def save_nfa(self):
+        nfa = self.to_document()
         file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
         if file_path:
             with open(file_path, 'w') as f:
@@ -344,51 +383,45 @@ class NFAEditor:
 
             self.clear_nfa()
 
-            self.state_counter = 0
-            for state_id, pos in nfa["states"].items():
-                x, y = pos["x"], pos["y"]
-                state_circle = self.canvas.create_oval(x - 20, y - 20, x + 20, y + 20, outline='black', width=2)
-                state_text = self.canvas.create_text(x, y, text=state_id, fill='black')
-
-                self.states[state_id] = (state_circle, state_text, x, y)
-                self.state_counter = max(self.state_counter, int(state_id[1:]) + 1)
-
-                self.canvas.tag_bind(state_circle, '<Button-1>', lambda event, sid=state_id: self.select_state(event, sid))
-                self.canvas.tag_bind(state_text, '<Button-1>', lambda event, sid=state_id: self.select_state(event, sid))
-
-                self.canvas.tag_bind(state_circle, '<B1-Motion>', lambda event, sid=state_id: self.move_state(event, sid))
-                self.canvas.tag_bind(state_text, '<B1-Motion>', lambda event, sid=state_id: self.move_state(event, sid))
-
+            transitions = {}
             for transition in nfa["transitions"]:
-                from_state, to_state, char = transition["from"], transition["to"], transition["char"]
-                self.selected_states = [from_state, to_state] if from_state != to_state else [from_state]
-                self.add_transition(char)
-
-            self.start_state = nfa["start_state"]
-            self.final_states = set(nfa["final_states"])
-
-            if self.start_state:
-                self.update_start_state_circle(self.start_state)
-            for final_state in self.final_states:
-                self.update_final_state_circle(final_state)
-
+                chars = transitions.setdefault((transition["from"], transition["to"]), [])
+                if transition["char"] not in chars:
+                    chars.append(transition["char"])
+
+            self.populate({state_id: (pos["x"], pos["y"]) for state_id, pos in nfa["states"].items()},
+                          {key: "+".join(chars) for key, chars in transitions.items()},
+                          nfa["start_state"], nfa["final_states"])
+            self.refresh_dfa_view()
+
+    def populate(self, positions, transitions, start_state, final_states):
+        """Draws a whole automaton at once. `positions` maps state ids to
+        (x, y) and `transitions` maps (from, to) to the "+"-joined label."""
+        self.reduced_detail = len(positions) > DETAIL_LIMIT
+        for state_id, (x, y) in positions.items():
+            self.create_state(state_id, x, y)
+        for (from_state, to_state), chars in transitions.items():
+            self.draw_transition(from_state, to_state, chars)
+
+        self.start_state = start_state
+        self.final_states = set(final_states)
+        if self.start_state:
+            self.update_start_state_circle(self.start_state)
+        for final_state in self.final_states:
+            self.update_final_state_circle(final_state)
+        self.update_scroll_region()
 
     def clear_nfa(self):
-        self.clear_inner_circle(self.start_state)
-        for final_state in self.final_states:
-            self.clear_inner_circle(final_state)
-        for state_id, (circle, text, x, y) in self.states.items():
-            self.canvas.delete(circle)
-            self.canvas.delete(text)
-        for (from_state, to_state), (line, text, char) in self.transitions.items():
-            self.canvas.delete(line)
-            self.canvas.delete(text)
+        self.canvas.delete("all")
         self.states.clear()
         self.transitions.clear()
+        self.adjacency.clear()
+        self.item_states.clear()
         self.state_counter = 0
         self.selected_states.clear()
         self.start_state = None
         self.final_states.clear()
+        self.reduced_detail = False
 
     def convert_to_dfa(self):
         if self.start_state is None:
@@ -399,56 +432,166 @@ class NFAEditor:
             messagebox.showerror("Error", "No transitions added.")
             return
 
-        nfa = Automaton.Automaton()
-        
-        # add transistions
-        for (from_state, to_state), (line, text, chars) in self.transitions.items():
-            for char in chars.split('+'):
-                from_int = int(from_state[1:])
-                to_int = int(to_state[1:])
-                if char == "ε":
-                    char = '\0'
-                nfa.addTransition(from_int, to_int, char)
+        try:
+            nfa = nfa_json.to_automaton(Automaton, self.to_document())
+        except ValueError as error:
+            messagebox.showerror("Error", str(error))
+            return
 
-        # add start state
-        if self.start_state:
-            nfa.setInitialState(int(self.start_state[1:]))
-        
-        # add final states
-        for final_state in self.final_states:
-            nfa.addFinalState(int(final_state[1:]))
-        
         dfa = nfa.determinize()
+        if self.minimize_var.get():
+            dfa = dfa.minimize()
 
         self.clear_nfa()
-        self.load_from_dfa(dfa)    
+        self.load_from_dfa(dfa)
+        self.refresh_dfa_view()
 
     def load_from_dfa(self, dfa):
-        states = dfa.getStates()
-        transitions = dfa.getTransitions()
+        offsets, targets, firsts, lasts, epsilon = dfa.exportTransitions()
+        start_state = dfa.getInitialState()
+        final_states = dfa.getFinalStates()
+        state_count = max([len(offsets) - 1, start_state + 1] + [state + 1 for state in final_states])
 
-        for state_id in states:
-            self.add_state()
+        sources = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        positions = graph_layout.auto_layout(state_count, sources, targets, start_state)
 
-        for i in range(len(transitions)):
-            src = "q" + str(i)
-            for transition in transitions[i]:
-                dst = "q" + str(transition.to)
-                char = transition.symbol
-                self.selected_states = [src, dst] if src != dst else [src]
-                self.add_transition(char)
+        labels = {}
+        for source, target, first, last in zip(sources.tolist(), targets.tolist(), firsts.tolist(), lasts.tolist()):
+            labels.setdefault((f"q{source}", f"q{target}"), []).append(nfa_json.format_label(first, last))
 
-        start_state = dfa.getInitialState()
-        start_state = "q" + str(start_state)
-        if start_state is not None:
-            self.start_state = start_state
-            self.update_start_state_circle(start_state)
+        self.populate({f"q{state}": (x, y) for state, (x, y) in enumerate(positions.tolist())},
+                      {key: "+".join(chars) for key, chars in labels.items()},
+                      f"q{start_state}", [f"q{state}" for state in final_states])
+
+    def toggle_live_dfa(self):
+        if not self.live_dfa_var.get():
+            self.dfa_view.root.destroy()
+            self.dfa_view = None
+            return
+        window = tk.Toplevel(self.root)
+        window.protocol("WM_DELETE_WINDOW", lambda: (self.live_dfa_var.set(False), self.toggle_live_dfa()))
+        self.dfa_view = DFAView(window)
+        self.refresh_dfa_view()
+
+    def refresh_dfa_view(self):
+        """Rebuilds the live DFA from the whole NFA."""
+        if self.dfa_view is None:
+            return
+        document = self.to_document()
+        try:
+            nfa = nfa_json.to_automaton(Automaton, document)
+        except ValueError:
+            # no start state yet
+            self.dfa_view.show(None)
+            return
+        self.dfa_view.show(Automaton.IncrementalDFA(nfa))
+        # code point labels number their UTF-8 paths after the document's
+        # states, so new states could clash with them
+        labels = (nfa_json.parse_label(transition["char"]) for transition in document["transitions"])
+        self.dfa_view.exact = not any(symbol is not None and symbol[2] for symbol in labels)
+
+    def update_dfa_view(self, edit):
+        """Applies one NFA edit to the live DFA, falling back to a rebuild
+        when it cannot be followed. `edit` takes the IncrementalDFA and
+        returns its changes, or None."""
+        if self.dfa_view is None:
+            return
+        if self.dfa_view.dfa is None or not self.dfa_view.exact:
+            self.refresh_dfa_view()
+            return
+        changes = edit(self.dfa_view.dfa)
+        if changes is None:
+            self.refresh_dfa_view()
+        else:
+            self.dfa_view.apply(changes)
+
+    @staticmethod
+    def add_dfa_transition(dfa, from_state, to_state, label):
+        source, target = nfa_json.state_number(from_state), nfa_json.state_number(to_state)
+        symbol = nfa_json.parse_label(label)
+        if symbol is None:
+            return dfa.addEpsilonTransition(source, target)
+        first, last, code_points = symbol
+        if code_points:
+            return None
+        return dfa.addTransition(source, target, chr(first), chr(last))
+
+
+class DFAView(NFAEditor):
+    """A read-only window showing the DFA of the editor's NFA. States are
+    named after their IncrementalDFA ids, which stay fixed across edits, so
+    each edit only redraws the states it changed."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.root.title("Live DFA")
+        self.dfa = None
+        self.exact = True
+
+    def init_buttons(self):
+        pass
+
+    def select_state(self, event, state_id):
+        pass
+
+    def show(self, dfa):
+        self.clear_nfa()
+        self.dfa = dfa
+        if dfa is None:
+            return
+        states = dfa.getStates()
+        index = {state: i for i, state in enumerate(states)}
+        edges = [(index[state], index[transition.to]) for state in states for transition in dfa.getTransitions(state)]
+        sources = np.array([source for source, target in edges], dtype=np.int64)
+        targets = np.array([target for source, target in edges], dtype=np.int64)
+        positions = graph_layout.auto_layout(len(states), sources, targets, index[dfa.getInitialState()])
+
+        self.populate({f"q{state}": (x, y) for state, (x, y) in zip(states, positions.tolist())},
+                      {key: label for state in states for key, label in self.row_labels(state).items()},
+                      f"q{dfa.getInitialState()}", [f"q{state}" for state in states if dfa.isFinalState(state)])
+
+    def row_labels(self, state):
+        labels = {}
+        for transition in self.dfa.getTransitions(state):
+            labels.setdefault((f"q{state}", f"q{transition.to}"), []).append(
+                nfa_json.format_label(ord(transition.symbol), ord(transition.last)))
+        return {key: "+".join(chars) for key, chars in labels.items()}
+
+    def apply(self, changes):
+        for state in changes.removed:
+            self.remove_state(f"q{state}")
+
+        # new states go in a row below the drawing
+        bbox = self.canvas.bbox("all")
+        y = (bbox[3] if bbox else 0) + 60
+        for k, state in enumerate(changes.added):
+            self.create_state(f"q{state}", nfa_json.GRID_ORIGIN + 60 * k, y)
+
+        for state in changes.added + changes.changed:
+            state_id = f"q{state}"
+            labels = self.row_labels(state)
+            # a changed state may only have a new final flag or a few new edges
+            for key in [key for key in self.adjacency[state_id] if key[0] == state_id]:
+                if self.transitions[key][2] != labels.get(key):
+                    self.remove_transition(key)
+            for key, chars in labels.items():
+                if key not in self.transitions:
+                    self.draw_transition(*key, chars)
+            if self.dfa.isFinalState(state) != (state_id in self.final_states):
+                if state_id in self.final_states:
+                    self.update_final_state_circle(state_id, clear=True)
+                    self.final_states.remove(state_id)
+                else:
+                    self.final_states.add(state_id)
+                    self.update_final_state_circle(state_id)
+
+        if changes.initialChanged:
+            if self.start_state in self.states:
+                self.update_start_state_circle(self.start_state, clear=True)
+            self.start_state = f"q{self.dfa.getInitialState()}"
+            self.update_start_state_circle(self.start_state)
+        self.update_scroll_region()
 
-        final_states = dfa.getFinalStates()
-        for final_state in final_states:
-            final_state = "q" + str(final_state)
-            self.final_states.add(final_state)
-            self.update_final_state_circle(final_state)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,196 @@
+"""Converts NFAs to DFAs without the GUI.
+
+    python scripts/batch_convert.py nfas/ --output-dir dfas/
+    python scripts/batch_convert.py batch.jsonl --minimize > dfas.jsonl
+    cat batch.jsonl | python scripts/batch_convert.py - --jobs 4
+
+Inputs are .json files in the format of Automaton_Converter's "Save NFA",
+directories (scanned for .json and .jsonl files), and JSON-lines files or
+"-" for stdin with one such document per line.
+
+Each converted .json file is written to --output-dir as <name>.dfa.json, or
+next to the input when no --output-dir is given. Documents from JSON-lines
+inputs go to --output (default stdout) as {"source": ..., "dfa": {...}}
+lines. A timing record per document goes to --report (default stderr).
+Documents are handed to the worker pool in chunks and results are written
+in completion order as they arrive. Only a bounded number of chunks are in
+flight, so batches can be larger than memory.
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, os.pardir))
+
+sys.path.append(os.path.join(parent_dir, 'python_package'))
+sys.path.insert(0, current_dir)
+
+import nfa_json
+
+# per worker process, imported on first use so that --help and argument
+# errors don't pay for loading the extension
+_bindings = None
+
+
+def bindings():
+    global _bindings
+    if _bindings is None:
+        import numpy  # noqa: F401 - loaded by the bindings on first use
+        import Automaton_bindings  # type: ignore
+        _bindings = Automaton_bindings
+    return _bindings
+
+
+def convert(source, text, output_path, settings):
+    """Converts one document; returns the report record and, when there is no
+    output file, the DFA document."""
+    Automaton = bindings()
+    start = time.perf_counter()
+    record = {"source": source}
+    try:
+        nfa = nfa_json.to_automaton(Automaton, json.loads(text))
+        parsed = time.perf_counter()
+
+        options = Automaton.DeterminizeOptions()
+        options.maxStates = settings["max_states"]
+        options.timeout = settings["timeout"]
+        dfa, stats = nfa.determinize(options)
+        determinized = time.perf_counter()
+        if settings["minimize"]:
+            dfa = dfa.minimize()
+        minimized = time.perf_counter()
+
+        document = nfa_json.from_automaton(dfa)
+        if output_path:
+            with open(output_path, "w") as f:
+                json.dump(document, f, indent=4)
+            document = None
+        record.update({
+            "output": output_path,
+            "nfa_states": state_count(nfa),
+            "dfa_states": state_count(dfa),
+            "parse_ms": (parsed - start) * 1000,
+            "determinize_ms": (determinized - parsed) * 1000,
+            "minimize_ms": (minimized - determinized) * 1000 if settings["minimize"] else None,
+            "total_ms": (time.perf_counter() - start) * 1000,
+            "subsets": stats.subsets,
+        })
+        return record, document
+    except Automaton.DeterminizeAborted as error:
+        record.update({"error": str(error), "reason": error.reason})
+    except (ValueError, KeyError, TypeError, OSError, RuntimeError) as error:
+        record["error"] = f"{type(error).__name__}: {error}"
+    record["total_ms"] = (time.perf_counter() - start) * 1000
+    return record, None
+
+
+def state_count(automaton):
+    # getStates() only lists states with outgoing edges; the exported CSR
+    # offsets have one row per state up to the state bound.
+    return len(automaton.exportTransitions()[0]) - 1
+
+
+def convert_chunk(chunk, settings):
+    return [convert(*document, settings) for document in chunk]
+
+
+def chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_lines(stream, label):
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            yield f"{label}:{number}", line, None
+
+
+def documents(inputs, output_dir):
+    """Yields (source, text, output path) for each document to convert;
+    the output path is None for JSON-lines documents."""
+    for path in inputs:
+        if path == "-":
+            yield from read_lines(sys.stdin, "<stdin>")
+        elif os.path.isdir(path):
+            names = sorted(name for name in os.listdir(path)
+                           if name.endswith((".json", ".jsonl")) and not name.endswith(".dfa.json"))
+            yield from documents([os.path.join(path, name) for name in names], output_dir)
+        elif path.endswith(".jsonl"):
+            with open(path) as f:
+                yield from read_lines(f, path)
+        else:
+            with open(path) as f:
+                text = f.read()
+            stem = os.path.splitext(os.path.basename(path))[0]
+            directory = output_dir or os.path.dirname(path)
+            yield path, text, os.path.join(directory, stem + ".dfa.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help=".json/.jsonl files, directories, or - for stdin")
+    parser.add_argument("--output-dir", help="where to write <name>.dfa.json (default: next to the input)")
+    parser.add_argument("--output", "-o", help="JSON-lines output for .jsonl/stdin documents (default stdout)")
+    parser.add_argument("--report", help="JSON-lines timing report (default stderr)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=16,
+                        help="documents sent to a worker at a time (default 16)")
+    parser.add_argument("--minimize", action="store_true", help="minimize each DFA")
+    parser.add_argument("--max-states", type=int, default=0, help="give up on DFAs larger than this")
+    parser.add_argument("--timeout", type=float, help="give up on a document after this many seconds")
+    args = parser.parse_args()
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    settings = {"minimize": args.minimize, "max_states": args.max_states, "timeout": args.timeout}
+    output = open(args.output, "w") if args.output else sys.stdout
+    report = open(args.report, "w") if args.report else sys.stderr
+    failures = 0
+
+    def emit(result):
+        nonlocal failures
+        record, document = result
+        failures += "error" in record
+        if document is not None:
+            output.write(json.dumps({"source": record["source"], "dfa": document}, ensure_ascii=False) + "\n")
+            output.flush()
+        report.write(json.dumps(record, ensure_ascii=False) + "\n")
+        report.flush()
+
+    start = time.perf_counter()
+    pending = documents(args.inputs, args.output_dir)
+    if args.jobs <= 1:
+        for document in pending:
+            emit(convert(*document, settings))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            in_flight = set()
+            for chunk in chunks(pending, max(1, args.chunk_size)):
+                if len(in_flight) >= args.jobs * 2:
+                    done, in_flight = concurrent.futures.wait(
+                        in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        for result in future.result():
+                            emit(result)
+                in_flight.add(pool.submit(convert_chunk, chunk, settings))
+            for future in concurrent.futures.as_completed(in_flight):
+                for result in future.result():
+                    emit(result)
+
+    print(f"{failures} failure(s), {(time.perf_counter() - start):.2f} s", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Automatic state layout for the editor, vectorized with NumPy.
+
+States are numbered 0..n-1 and edges come as parallel source/target arrays,
+which is what Automaton.exportTransitions gives after np.repeat-ing the
+offsets. Positions are returned as an (n, 2) float array in canvas pixels.
+"""
+import numpy as np
+
+# pixels between neighbouring states; a state's circle is 40 across
+SPACING = 70
+MARGIN = 100
+# repulsion is all-pairs, so above this many states only layers are used
+FORCE_LIMIT = 1000
+# rows of the all-pairs repulsion computed at once, to bound memory
+BLOCK = 512
+
+
+def layers(n, sources, targets, initial=0):
+    """Breadth-first depth of every state from `initial`; unreachable
+    states get the depth one past the deepest reachable one."""
+    order = np.argsort(sources, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+    successors = targets[order]
+
+    depth = np.full(n, -1, dtype=np.int64)
+    if n == 0:
+        return depth
+    depth[initial] = 0
+    frontier = np.array([initial])
+    level = 0
+    while frontier.size:
+        level += 1
+        starts, ends = offsets[frontier], offsets[frontier + 1]
+        counts = ends - starts
+        # gather the successor ranges of the whole frontier at once
+        index = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        frontier = np.unique(successors[index])
+        frontier = frontier[depth[frontier] < 0]
+        depth[frontier] = level
+    depth[depth < 0] = depth.max() + 1
+    return depth
+
+
+def layered_layout(n, sources, targets, initial=0):
+    """Columns by breadth-first depth; within a column states are ordered by
+    the mean row of their predecessors so that edges mostly run straight."""
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    depth = layers(n, sources, targets, initial)
+    row = np.zeros(n)
+    if n == 0:
+        return np.zeros((0, 2))
+    # edges into each column from earlier columns, grouped by column
+    forward = np.flatnonzero(depth[sources] < depth[targets])
+    forward = forward[np.argsort(depth[targets[forward]], kind="stable")]
+    edge_bounds = np.searchsorted(depth[targets[forward]], np.arange(depth.max() + 2))
+    by_depth = np.argsort(depth, kind="stable")
+    state_bounds = np.searchsorted(depth[by_depth], np.arange(depth.max() + 2))
+    for level in range(int(depth.max()) + 1):
+        members = by_depth[state_bounds[level]:state_bounds[level + 1]]
+        edges = forward[edge_bounds[level]:edge_bounds[level + 1]]
+        # barycenter of the predecessors' rows; states without one keep
+        # their number as the key
+        weight = np.bincount(targets[edges], weights=row[sources[edges]], minlength=n)[members]
+        count = np.bincount(targets[edges], minlength=n)[members]
+        key = np.where(count > 0, weight / np.maximum(count, 1), members)
+        row[members[np.argsort(key, kind="stable")]] = np.arange(members.size)
+
+    # wide levels are wrapped into several adjacent columns
+    height = max(10, int(np.sqrt(n) * 2))
+    spans = np.bincount(depth) // height + 1
+    first_column = np.concatenate([[0], np.cumsum(spans)[:-1]])
+    column = first_column[depth] + row.astype(np.int64) // height
+    return np.column_stack([column * SPACING * 2, row % height * SPACING]).astype(float) + MARGIN
+
+
+def grid_layout(n, sources, targets, initial=0):
+    """A square grid filled in breadth-first order from `initial`."""
+    order = np.argsort(layers(n, np.asarray(sources, dtype=np.int64),
+                              np.asarray(targets, dtype=np.int64), initial), kind="stable")
+    columns = max(1, int(np.ceil(np.sqrt(n))))
+    positions = np.empty((n, 2))
+    positions[order, 0] = np.arange(n) % columns * SPACING
+    positions[order, 1] = np.arange(n) // columns * SPACING
+    return positions + MARGIN
+
+
+def force_layout(n, sources, targets, initial=0, iterations=50, positions=None):
+    """Fruchterman-Reingold, started from the breadth-first grid."""
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    if positions is None:
+        positions = grid_layout(n, sources, targets, initial)
+    keep = sources != targets
+    sources, targets = sources[keep], targets[keep]
+    x, y = (np.array(positions[:, axis], dtype=np.float32) for axis in (0, 1))
+    if n < 2:
+        return np.column_stack([x, y]).astype(float)
+
+    k2 = np.float32(SPACING * SPACING)
+    temperature = SPACING * np.sqrt(n) / 8
+    dx, dy = np.empty_like(x), np.empty_like(y)
+    for _ in range(iterations):
+        for start in range(0, n, BLOCK):
+            delta_x = x[start:start + BLOCK, None] - x[None, :]
+            delta_y = y[start:start + BLOCK, None] - y[None, :]
+            force = k2 / np.maximum(delta_x * delta_x + delta_y * delta_y, 1e-2)
+            dx[start:start + BLOCK] = (delta_x * force).sum(axis=1)
+            dy[start:start + BLOCK] = (delta_y * force).sum(axis=1)
+
+        delta_x, delta_y = x[sources] - x[targets], y[sources] - y[targets]
+        pull = np.sqrt(delta_x * delta_x + delta_y * delta_y) / SPACING
+        dx -= np.bincount(sources, delta_x * pull, n) - np.bincount(targets, delta_x * pull, n)
+        dy -= np.bincount(sources, delta_y * pull, n) - np.bincount(targets, delta_y * pull, n)
+
+        length = np.maximum(np.sqrt(dx * dx + dy * dy), 1e-9)
+        scale = np.minimum(length, temperature) / length
+        x += dx * scale
+        y += dy * scale
+        temperature *= 0.93
+    positions = np.column_stack([x, y]).astype(float)
+    return positions - positions.min(axis=0) + MARGIN
+
+
+def auto_layout(n, sources, targets, initial=0):
+    if n <= FORCE_LIMIT:
+        return force_layout(n, sources, targets, initial)
+    return layered_layout(n, sources, targets, initial)
@@ -0,0 +1,131 @@
+"""The JSON automaton format written by Automaton_Converter's "Save NFA".
+
+    {"states": {"q0": {"x": 100, "y": 100}, ...},
+     "transitions": [{"from": "q0", "to": "q1", "char": "a"}, ...],
+     "start_state": "q0",
+     "final_states": ["q1"]}
+
+State ids are "q" followed by the state number and "ε" marks an epsilon
+transition. Other labels are a symbol or a range "a-z" of symbols, where a
+symbol is a character or a raw byte written "\\xNN"; non-ASCII characters
+match their UTF-8 encodings.
+
+This module has no tkinter or Automaton_bindings import so that headless
+tools can use it; functions that build automata take the bindings module as
+an argument.
+"""
+
+import re
+
+EPSILON = "ε"
+
+# the editor's grid: ten states per row, 40 pixels apart
+GRID_COLUMNS = 10
+GRID_ORIGIN = 100
+GRID_SPACING = 40
+
+
+def state_number(state_id):
+    if not isinstance(state_id, str) or not state_id.startswith("q") or not state_id[1:].isdigit():
+        raise ValueError(f"invalid state id {state_id!r}")
+    return int(state_id[1:])
+
+
+_ENDPOINT = r"(\\x[0-9a-fA-F]{2}|.)"
+_LABEL = re.compile(f"{_ENDPOINT}(?:-{_ENDPOINT})?", re.DOTALL)
+
+
+def _endpoint(text):
+    if len(text) == 4:
+        return int(text[2:], 16), True
+    return ord(text), False
+
+
+def parse_label(label):
+    """Returns None for epsilon, otherwise (first, last, code_points), where
+    code_points says the range is over Unicode code points rather than
+    bytes."""
+    if label == EPSILON:
+        return None
+    match = _LABEL.fullmatch(label)
+    if match is None:
+        raise ValueError(f"unsupported transition label {label!r}")
+    first, first_byte = _endpoint(match[1])
+    last, last_byte = _endpoint(match[2]) if match[2] else (first, first_byte)
+    if first > last:
+        raise ValueError(f"empty range in transition label {label!r}")
+    if (first_byte or last_byte) and last >= 0x80 and not last_byte:
+        raise ValueError(f"transition label {label!r} mixes bytes and characters")
+    return first, last, not (first_byte or last_byte) and last >= 0x80
+
+
+def _format_byte(byte):
+    # "+" separates labels in the editor and a backslash starts an escape
+    if 0x20 <= byte < 0x7F and chr(byte) not in "+\\":
+        return chr(byte)
+    return f"\\x{byte:02x}"
+
+
+def format_label(first, last):
+    """The label of the byte range [first, last]."""
+    if first == last:
+        return _format_byte(first)
+    return f"{_format_byte(first)}-{_format_byte(last)}"
+
+
+def grid_position(number):
+    return {"x": GRID_ORIGIN + GRID_SPACING * (number % GRID_COLUMNS),
+            "y": GRID_ORIGIN + GRID_SPACING * (number // GRID_COLUMNS)}
+
+
+def to_automaton(Automaton, nfa):
+    """Builds an Automaton_bindings.Automaton from a decoded JSON document."""
+    if nfa.get("start_state") is None:
+        raise ValueError("no start state")
+    sources, targets, firsts, lasts, epsilon = [], [], bytearray(), bytearray(), bytearray()
+    code_points = []
+    for transition in nfa["transitions"]:
+        source, target = state_number(transition["from"]), state_number(transition["to"])
+        symbol = parse_label(transition["char"])
+        if symbol is not None and symbol[2]:
+            code_points.append((source, target, chr(symbol[0]), chr(symbol[1])))
+            continue
+        sources.append(source)
+        targets.append(target)
+        firsts.append(symbol[0] if symbol else 0)
+        lasts.append(symbol[1] if symbol else 0)
+        epsilon.append(symbol is None)
+    final_states = [state_number(state) for state in nfa["final_states"]]
+    start_state = state_number(nfa["start_state"])
+    automaton = Automaton.Automaton.fromArrays(sources, targets, firsts, final_states, start_state,
+                                               lasts=lasts, epsilon=epsilon)
+    if code_points:
+        # the UTF-8 paths get states numbered after every state in the document
+        numbers = [state_number(state) for state in nfa["states"]] + final_states + [start_state]
+        numbers += [state for source, target, first, last in code_points for state in (source, target)]
+        automaton.reserveStates(max(numbers) + 1)
+        for source, target, first, last in code_points:
+            automaton.addCodePointTransition(source, target, first, last)
+    return automaton
+
+
+def from_automaton(automaton):
+    """Encodes an automaton with its states laid out on the editor's grid."""
+    offsets, targets, firsts, lasts, epsilon = (array.tolist() for array in automaton.exportTransitions())
+    # getStates() leaves out states that are only targets or finals, so
+    # every state an edge, the start or the finals name is listed; a DFA
+    # without transitions can still have its initial state
+    states = set(targets) | set(automaton.getFinalStates()) | {automaton.getInitialState()}
+    transitions = []
+    for source in range(len(offsets) - 1):
+        if offsets[source] < offsets[source + 1]:
+            states.add(source)
+        for k in range(offsets[source], offsets[source + 1]):
+            transitions.append({"from": f"q{source}", "to": f"q{targets[k]}",
+                                "char": EPSILON if epsilon[k] else format_label(firsts[k], lasts[k])})
+    return {
+        "states": {f"q{state}": grid_position(state) for state in sorted(states)},
+        "transitions": transitions,
+        "start_state": f"q{automaton.getInitialState()}",
+        "final_states": [f"q{state}" for state in sorted(automaton.getFinalStates())],
+    }
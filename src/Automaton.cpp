@@ -1,15 +1,25 @@
 #include "Automaton/Automaton.h"
 
+#include "Automaton/ByteClasses.h"
+#include "Automaton/CompiledDFA.h"
+#include "Automaton/EpsilonClosureIndex.h"
+#include "Automaton/SubsetTable.h"
+
 #include <algorithm>
+#include <array>
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <exception>
 #include <iostream>
-
-static void check_and_add(std::vector<state_t> &states, state_t state)
-{
-    if (std::find(states.begin(), states.end(), state) == states.end())
-    {
-        states.push_back(state);
-    }
-}
+#include <limits>
+#include <mutex>
+#include <optional>
+#include <span>
+#include <stdexcept>
+#include <thread>
+#include <tuple>
+#include <utility>
 
 int Automaton::convertQx2Int(std::string q) { return std::stoi(q.substr(1)); }
 
@@ -17,59 +27,324 @@ Automaton::Automaton(){};
 
 Automaton::Automaton(std::vector<std::vector<Transition>> transitions,
                      std::vector<state_t> finalStates, state_t initialState)
-    : finalStates(finalStates),
-      initialState(initialState),
-      transitions(transitions)
+    : rows(std::move(transitions)), initialState(initialState)
+{
+    registerStates(finalStates);
+};
+
+void Automaton::registerStates(const std::vector<state_t> &finals)
 {
+    TransitionView transitions = getTransitionView();
+    stateSeen.assign(stateBound(), false);
     for (state_t i = 0; i < transitions.size(); i++)
     {
-        states.push_back(i);
+        addState(i);
     }
 
     for (state_t i = 0; i < transitions.size(); i++)
     {
         for (Transition transition : transitions[i])
         {
-            check_and_add(states, transition.to);
+            addState(transition.to);
         }
     }
 
+    for (state_t state : finals)
+    {
+        addFinalState(state);
+        addState(state);
+    }
+
+    addState(initialState);
+}
+
+void Automaton::addState(state_t state)
+{
+    if (stateSeen.size() <= state)
+    {
+        stateSeen.resize(std::max<size_t>(state + 1, 2 * stateSeen.size()));
+    }
+    if (!stateSeen[state])
+    {
+        stateSeen[state] = true;
+        states.push_back(state);
+    }
+}
+
+state_t Automaton::stateBound()
+{
+    TransitionView transitions = getTransitionView();
+    state_t bound = std::max<state_t>(transitions.size(), initialState + 1);
+    for (state_t state = 0; state < transitions.size(); state++)
+    {
+        for (Transition transition : transitions[state])
+        {
+            bound = std::max(bound, transition.to + 1);
+        }
+    }
     for (state_t state : finalStates)
     {
-        check_and_add(states, state);
+        bound = std::max(bound, state + 1);
     }
+    return bound;
+}
 
-    check_and_add(states, initialState);
-};
+void Automaton::pushTransition(state_t from, Transition transition)
+{
+    thaw();
+    if (from >= rows.size())
+    {
+        rows.resize(from + 1);
+    }
+    rows[from].push_back(transition);
+    addState(from);
+    // Only epsilon edges change closures; states the index does not cover
+    // yet are answered as singletons.
+    if (transition.epsilon)
+    {
+        closureIndex.reset();
+    }
+}
 
 void Automaton::addTransition(state_t from, state_t to, char symbol)
 {
-    if (from >= transitions.size())
+    pushTransition(from, {to, symbol});
+}
+
+void Automaton::addTransition(state_t from, state_t to, char first, char last)
+{
+    if (static_cast<unsigned char>(first) > static_cast<unsigned char>(last))
     {
-        transitions.resize(from + 1);
+        throw std::invalid_argument("empty symbol range");
     }
-    transitions[from].push_back({to, symbol});
-    check_and_add(states, from);
+    pushTransition(from, {to, first, last, false});
 }
 
-void Automaton::addFinalState(state_t state) { finalStates.push_back(state); }
+void Automaton::addEpsilonTransition(state_t from, state_t to)
+{
+    pushTransition(from, {to, '\0', '\0', true});
+}
 
-void Automaton::setInitialState(state_t state) { initialState = state; }
+// Splits [first, last] into runs of code points whose UTF-8 encodings have
+// the same length and differ only in a suffix of full continuation-byte
+// ranges, so each run is one sequence of byte ranges.
+static void utf8_sequences(
+    char32_t first, char32_t last,
+    std::vector<std::vector<std::pair<uint8_t, uint8_t>>> &sequences)
+{
+    std::vector<std::pair<char32_t, char32_t>> pending = {{first, last}};
+    while (!pending.empty())
+    {
+        auto [low, high] = pending.back();
+        pending.pop_back();
+        if (low <= 0xDFFF && high >= 0xD800)
+        {
+            if (low < 0xD800) pending.push_back({low, 0xD7FF});
+            if (high > 0xDFFF) pending.push_back({0xE000, high});
+            continue;
+        }
+        bool split = false;
+        for (char32_t limit : {0x7Fu, 0x7FFu, 0xFFFFu})
+        {
+            if (low <= limit && limit < high)
+            {
+                pending.push_back({low, limit});
+                pending.push_back({limit + 1, high});
+                split = true;
+                break;
+            }
+        }
+        for (int i = 1; i < 4 && !split; i++)
+        {
+            char32_t mask = (char32_t{1} << (6 * i)) - 1;
+            if ((low & ~mask) == (high & ~mask)) continue;
+            if ((low & mask) != 0)
+            {
+                pending.push_back({low, low | mask});
+                pending.push_back({(low | mask) + 1, high});
+                split = true;
+            }
+            else if ((high & mask) != mask)
+            {
+                pending.push_back({low, (high & ~mask) - 1});
+                pending.push_back({high & ~mask, high});
+                split = true;
+            }
+        }
+        if (split) continue;
+
+        auto encode = [](char32_t codePoint, uint8_t *bytes)
+        {
+            if (codePoint < 0x80)
+            {
+                bytes[0] = codePoint;
+                return 1;
+            }
+            int length = codePoint < 0x800 ? 2 : codePoint < 0x10000 ? 3 : 4;
+            for (int k = length - 1; k > 0; k--)
+            {
+                bytes[k] = 0x80 | (codePoint & 0x3F);
+                codePoint >>= 6;
+            }
+            bytes[0] = (0xF00 >> length) | codePoint;
+            return length;
+        };
+        uint8_t lows[4], highs[4];
+        int length = encode(low, lows);
+        encode(high, highs);
+        std::vector<std::pair<uint8_t, uint8_t>> sequence;
+        for (int k = 0; k < length; k++)
+        {
+            sequence.push_back({lows[k], highs[k]});
+        }
+        sequences.push_back(std::move(sequence));
+    }
+}
+
+void Automaton::addCodePointTransition(state_t from, state_t to,
+                                       char32_t first, char32_t last)
+{
+    if (first > last || last > 0x10FFFF)
+    {
+        throw std::invalid_argument("invalid code point range");
+    }
+    std::vector<std::vector<std::pair<uint8_t, uint8_t>>> sequences;
+    utf8_sequences(first, last, sequences);
+    state_t next = std::max({stateBound(), from + 1, to + 1});
+    for (const auto &sequence : sequences)
+    {
+        state_t state = from;
+        for (size_t k = 0; k < sequence.size(); k++)
+        {
+            state_t target = k + 1 == sequence.size() ? to : next++;
+            pushTransition(state, {target, static_cast<char>(sequence[k].first),
+                                   static_cast<char>(sequence[k].second), false});
+            state = target;
+        }
+    }
+    addState(to);
+}
+
+void Automaton::reserveStates(state_t count)
+{
+    thaw();
+    if (rows.size() < count)
+    {
+        rows.resize(count);
+    }
+}
+
+void Automaton::addTransitions(const state_t *from, const state_t *to,
+                               const char *symbols, size_t count)
+{
+    if (count == 0) return;
+    thaw();
+    state_t maxFrom = *std::max_element(from, from + count);
+    if (rows.size() <= maxFrom)
+    {
+        rows.resize(maxFrom + 1);
+    }
+    bool epsilon = false;
+    for (size_t i = 0; i < count; i++)
+    {
+        rows[from[i]].push_back({to[i], symbols[i]});
+        addState(from[i]);
+        epsilon = epsilon || symbols[i] == '\0';
+    }
+    if (epsilon)
+    {
+        closureIndex.reset();
+    }
+}
+
+void Automaton::addTransitions(const state_t *from, const state_t *to,
+                               const char *firsts, const char *lasts,
+                               const uint8_t *epsilon, size_t count)
+{
+    if (count == 0) return;
+    for (size_t i = 0; i < count; i++)
+    {
+        if ((epsilon == nullptr || !epsilon[i]) &&
+            static_cast<unsigned char>(firsts[i]) >
+                static_cast<unsigned char>(lasts[i]))
+        {
+            throw std::invalid_argument("empty symbol range");
+        }
+    }
+    thaw();
+    state_t maxFrom = *std::max_element(from, from + count);
+    if (rows.size() <= maxFrom)
+    {
+        rows.resize(maxFrom + 1);
+    }
+    bool anyEpsilon = false;
+    for (size_t i = 0; i < count; i++)
+    {
+        bool isEpsilon = epsilon != nullptr && epsilon[i];
+        rows[from[i]].push_back({to[i], firsts[i], lasts[i], isEpsilon});
+        addState(from[i]);
+        anyEpsilon = anyEpsilon || isEpsilon;
+    }
+    if (anyEpsilon)
+    {
+        closureIndex.reset();
+    }
+}
+
+void Automaton::addFinalState(state_t state)
+{
+    if (finalMask.size() <= state)
+    {
+        finalMask.resize(std::max<size_t>(state + 1, 2 * finalMask.size()));
+    }
+    if (!finalMask[state])
+    {
+        finalMask[state] = true;
+        finalStates.push_back(state);
+    }
+}
 
-bool Automaton::isFinalState(state_t state)
+void Automaton::addFinalStates(const state_t *states, size_t count)
 {
-    return std::find(finalStates.begin(), finalStates.end(), state) !=
-           finalStates.end();
+    for (size_t i = 0; i < count; i++)
+    {
+        addFinalState(states[i]);
+    }
 }
 
+void Automaton::setInitialState(state_t state) { initialState = state; }
+
 state_t Automaton::getInitialState() { return initialState; }
 
+// Frozen edges are sorted by first byte after the epsilon edges, so the
+// ones covering `byte` start in [byte - widestRange, byte] and binary
+// searches find them. Callers still check each edge, as they do for the
+// whole row of an unfrozen automaton.
+std::span<const Transition> Automaton::edgesCovering(state_t state,
+                                                     unsigned char byte) const
+{
+    std::span<const Transition> row = getTransitionView()[state];
+    if (!frozen)
+    {
+        return row;
+    }
+    auto byteEdges = std::partition_point(row.begin(), row.end(),
+                                          [](Transition transition)
+                                          { return transition.epsilon; });
+    auto end = std::partition_point(byteEdges, row.end(),
+                                    [byte](Transition transition)
+                                    { return transition.getFirst() <= byte; });
+    auto begin = std::partition_point(
+        byteEdges, end, [low = byte - widestRange](Transition transition)
+        { return transition.getFirst() < low; });
+    return {begin, end};
+}
+
 state_t Automaton::getNextState(state_t state, char symbol)
 {
-    if (transitions.size() <= state) return -1;
-    for (Transition transition : transitions[state])
+    for (Transition transition : edgesCovering(state, symbol))
     {
-        if (transition.symbol == symbol)
+        if (transition.matches(symbol))
         {
             return transition.to;
         }
@@ -79,21 +354,33 @@ state_t Automaton::getNextState(state_t state, char symbol)
 
 bool Automaton::isDeterministic()
 {
-    for (std::vector<Transition> stateTransitions : transitions)
+    TransitionView transitions = getTransitionView();
+    std::vector<Transition> sorted;
+    for (state_t state = 0; state < transitions.size(); state++)
     {
-        std::vector<char> symbols;
-        for (Transition transition : stateTransitions)
+        // Frozen edges are already in order.
+        std::span<const Transition> row = transitions[state];
+        if (!frozen)
+        {
+            sorted.assign(row.begin(), row.end());
+            std::sort(sorted.begin(), sorted.end(),
+                      [](Transition a, Transition b)
+                      { return a.getFirst() < b.getFirst(); });
+            row = sorted;
+        }
+        for (size_t i = 0; i < row.size(); i++)
         {
-            if (transition.symbol == '\0')
+            if (row[i].epsilon)
             {
                 return false;
             }
-            if (std::find(symbols.begin(), symbols.end(), transition.symbol) !=
-                symbols.end())
+            if (i == 0 || row[i].getFirst() > row[i - 1].getLast()) continue;
+            // A repeated edge, which freeze() would drop, is harmless.
+            if (row[i].to != row[i - 1].to || row[i].symbol != row[i - 1].symbol ||
+                row[i].last != row[i - 1].last)
             {
                 return false;
             }
-            symbols.push_back(transition.symbol);
         }
     }
     return true;
@@ -106,65 +393,93 @@ bool Automaton::isAccepted(std::string input)
 
 bool Automaton::isAccepted(std::string input, state_t state)
 {
-    if (input.empty())
+    for (char symbol : input)
     {
-        return isFinalState(state);
+        state = getNextState(state, symbol);
+        if (state == -1)
+        {
+            return false;
+        }
     }
-    state_t nextState = getNextState(state, input[0]);
-    if (nextState == -1)
+    return isFinalState(state);
+}
+
+void Automaton::precomputeClosures()
+{
+    if (!closureIndex)
     {
-        return false;
+        closureIndex = std::make_shared<EpsilonClosureIndex>(
+            getTransitionView(), stateBound());
     }
-    return isAccepted(input.substr(1), nextState);
 }
 
-std::vector<state_t> Automaton::getEpsilonClosure(state_t state)
+// The closure accessors answer states added after the index was built as
+// singletons. An index handed out is rebuilt instead, so it always covers
+// stateBound() and callers need no such guard.
+std::shared_ptr<const EpsilonClosureIndex> Automaton::getClosureIndex()
 {
-    std::vector<state_t> closure;
-    closure.push_back(state);
-    for (state_t i = 0; i < closure.size(); i++)
+    if (closureIndex && closureIndex->getStateCount() < stateBound())
     {
-        if (transitions.size() <= closure[i]) continue;
-        for (Transition transition : transitions[closure[i]])
-        {
-            if (transition.symbol == '\0' &&
-                std::find(closure.begin(), closure.end(), transition.to) ==
-                    closure.end())
-            {
-                closure.push_back(transition.to);
-            }
-        }
+        closureIndex.reset();
     }
-    std::sort(closure.begin(), closure.end());
-    return closure;
+    precomputeClosures();
+    return closureIndex;
+}
+
+std::vector<state_t> Automaton::getEpsilonClosure(state_t state)
+{
+    return getEpsilonClosure(std::vector<state_t>{state});
 }
 
 std::vector<state_t> Automaton::getEpsilonClosure(std::vector<state_t> states)
 {
+    precomputeClosures();
+    state_t bound = closureIndex->getStateCount();
+    for (state_t state : states)
+    {
+        bound = std::max(bound, state + 1);
+    }
+    if (closureMarks.size() < bound)
+    {
+        closureMarks.resize(bound, 0);
+    }
+    closureStamp++;
     std::vector<state_t> closure;
     for (state_t state : states)
     {
-        std::vector<state_t> stateClosure = getEpsilonClosure(state);
-        for (state_t state : stateClosure)
-        {
-            if (std::find(closure.begin(), closure.end(), state) ==
-                closure.end())
-            {
-                closure.push_back(state);
-            }
-        }
+        closureIndex->appendClosure(state, closure, closureMarks, closureStamp);
     }
     std::sort(closure.begin(), closure.end());
     return closure;
 }
 
+// Replaces `subset` with its sorted epsilon closure. `marks[s] == stamp`
+// records membership, so callers pass a fresh stamp for every subset.
+void Automaton::closeSubset(std::vector<state_t> &subset,
+                            std::vector<unsigned> &marks, unsigned stamp)
+{
+    size_t count = subset.size();
+    for (size_t i = 0; i < count; i++)
+    {
+        closureIndex->appendClosure(subset[i], subset, marks, stamp);
+    }
+    subset.erase(subset.begin(), subset.begin() + count);
+    // Closures walked down an epsilon chain come out in order already.
+    if (!std::is_sorted(subset.begin(), subset.end()))
+    {
+        std::sort(subset.begin(), subset.end());
+    }
+}
+
 std::vector<state_t> Automaton::getTransitions(state_t state, char symbol)
 {
     std::vector<state_t> nextStates;
-    if (transitions.size() <= state) return nextStates;
-    for (Transition transition : transitions[state])
+    // '\0' asks for the epsilon transitions.
+    std::span<const Transition> candidates =
+        symbol == '\0' ? getOutgoing(state) : edgesCovering(state, symbol);
+    for (Transition transition : candidates)
     {
-        if (transition.symbol == symbol)
+        if (symbol == '\0' ? transition.epsilon : transition.matches(symbol))
         {
             nextStates.push_back(transition.to);
         }
@@ -179,135 +494,1163 @@ std::vector<state_t> Automaton::getTransitions(std::vector<state_t> states,
     std::vector<state_t> nextStates;
     for (state_t state : states)
     {
-        std::vector<state_t> stateTransitions = getTransitions(state, symbol);
-        for (state_t state : stateTransitions)
+        std::span<const Transition> candidates =
+            symbol == '\0' ? getOutgoing(state) : edgesCovering(state, symbol);
+        for (Transition transition : candidates)
         {
-            if (std::find(nextStates.begin(), nextStates.end(), state) ==
-                nextStates.end())
+            if (symbol == '\0' ? transition.epsilon
+                                : transition.matches(symbol))
             {
-                nextStates.push_back(state);
+                nextStates.push_back(transition.to);
             }
         }
     }
     std::sort(nextStates.begin(), nextStates.end());
+    nextStates.erase(std::unique(nextStates.begin(), nextStates.end()),
+                     nextStates.end());
     return nextStates;
 }
 
 Automaton Automaton::determinize()
 {
-    if (isDeterministic())
+    return determinize(DeterminizeOptions());
+}
+
+DeterminizeAborted::DeterminizeAborted(Reason reason,
+                                       const DeterminizeStats &stats)
+    : std::runtime_error(reason == Reason::MaxStates ? "determinize aborted: "
+                                                       "DFA state limit reached"
+                         : reason == Reason::MemoryBudget
+                             ? "determinize aborted: memory budget exceeded"
+                         : reason == Reason::Deadline
+                             ? "determinize aborted: deadline passed"
+                             : "determinize aborted: cancelled"),
+      reason(reason),
+      stats(stats)
+{
+}
+
+static double elapsed_ms(std::chrono::steady_clock::time_point since)
+{
+    return std::chrono::duration<double, std::milli>(
+               std::chrono::steady_clock::now() - since)
+        .count();
+}
+
+static std::optional<DeterminizeAborted::Reason> exceeded_limit(
+    const DeterminizeOptions &options, const DeterminizeStats &stats,
+    bool checkDeadline)
+{
+    using Reason = DeterminizeAborted::Reason;
+    if (options.maxStates != 0 && stats.subsets > options.maxStates)
     {
-        return *this;
+        return Reason::MaxStates;
     }
-    std::vector<std::vector<Transition>> newTransitions;
-    std::vector<state_t> newFinalStates;
-    std::vector<std::vector<state_t>> newStates;
-    std::vector<state_t> initialState = {
-        this->initialState};  // getEpsilonClosure(this->initialState);
-    newStates.push_back(initialState);
-    auto closure = getEpsilonClosure(initialState);
-    if (std::any_of(closure.begin(), closure.end(),
-                    [this](state_t state) { return isFinalState(state); }))
+    if (options.memoryBudget != 0 && stats.memoryBytes > options.memoryBudget)
+    {
+        return Reason::MemoryBudget;
+    }
+    if (options.cancellation.isCancelled())
+    {
+        return Reason::Cancelled;
+    }
+    if (checkDeadline && std::chrono::steady_clock::now() > options.deadline)
+    {
+        return Reason::Deadline;
+    }
+    return std::nullopt;
+}
+
+// Scratch space for expanding subsets, one per exploring thread.
+struct SubsetExpansion
+{
+    SubsetExpansion(state_t stateCount, int classCount)
+        : marks(stateCount, 0), targets(classCount)
     {
-        newFinalStates.push_back(0);
     }
-    for (state_t i = 0; i < newStates.size(); i++)
+
+    std::vector<unsigned> marks;
+    unsigned stamp = 0;
+    // The closed successor of the subset on each class listed in
+    // `symbolClasses`, which is in ascending order.
+    std::vector<std::vector<state_t>> targets;
+    std::vector<uint8_t> symbolClasses;
+    size_t closureComputations = 0;
+    size_t peakSubsetSize = 0;
+};
+
+// Gathers the successors of `subset` per byte class, so the work scales
+// with the number of classes rather than with 256 bytes. Returns whether
+// the subset holds a final state.
+bool Automaton::expandSubset(std::span<const state_t> subset,
+                             const ByteClasses &classes,
+                             const std::vector<bool> &finalMask,
+                             SubsetExpansion &expansion)
+{
+    TransitionView transitions = getTransitionView();
+    std::vector<uint8_t> &symbolClasses = expansion.symbolClasses;
+    symbolClasses.clear();
+    bool isFinal = false;
+    for (state_t state : subset)
     {
-        std::vector<char> symbols;
-        for (state_t state : newStates[i])
+        isFinal = isFinal || finalMask[state];
+        if (transitions.size() <= state) continue;
+        for (Transition transition : transitions[state])
         {
-            if (transitions.size() <= state) continue;
-            for (Transition transition : transitions[state])
+            if (transition.epsilon) continue;
+            int lastClass = classes.get(transition.getLast());
+            for (int symbolClass = classes.get(transition.getFirst());
+                 symbolClass <= lastClass; symbolClass++)
             {
-                if (transition.symbol == '\0')
-                {
-                    continue;
-                }
-                if (std::find(symbols.begin(), symbols.end(),
-                              transition.symbol) == symbols.end())
+                if (expansion.targets[symbolClass].empty())
                 {
-                    symbols.push_back(transition.symbol);
+                    symbolClasses.push_back(symbolClass);
                 }
+                expansion.targets[symbolClass].push_back(transition.to);
             }
         }
-        for (char symbol : symbols)
+    }
+
+    std::sort(symbolClasses.begin(), symbolClasses.end());
+    for (uint8_t symbolClass : symbolClasses)
+    {
+        std::vector<state_t> &target = expansion.targets[symbolClass];
+        closeSubset(target, expansion.marks, ++expansion.stamp);
+        expansion.closureComputations++;
+        expansion.peakSubsetSize =
+            std::max(expansion.peakSubsetSize, target.size());
+    }
+    return isFinal;
+}
+
+// Adds the edge on `symbolClass` to a DFA row; neighbouring classes with
+// the same successor share one edge. Returns whether an edge was added.
+static bool append_class_edge(std::vector<Transition> &row, state_t next,
+                              const ByteClasses &classes, int symbolClass)
+{
+    auto first = static_cast<char>(classes.getFirst(symbolClass));
+    auto last = static_cast<char>(classes.getLast(symbolClass));
+    if (!row.empty() && row.back().to == next &&
+        row.back().getLast() + 1 == classes.getFirst(symbolClass))
+    {
+        row.back().last = last;
+        return false;
+    }
+    row.push_back({next, first, last, false});
+    return true;
+}
+
+Automaton Automaton::determinize(
+    const DeterminizeOptions &options, DeterminizeStats *stats,
+    std::vector<std::vector<state_t>> *dfaSubsets)
+{
+    DeterminizeStats localStats;
+    DeterminizeStats &result = stats != nullptr ? *stats : localStats;
+    result = DeterminizeStats();
+    auto start = std::chrono::steady_clock::now();
+    if (isDeterministic())
+    {
+        if (dfaSubsets != nullptr)
         {
-            std::vector<state_t> nextStates =
-                getTransitions(getEpsilonClosure(newStates[i]), symbol);
-            std::vector<state_t> nextClosure = getEpsilonClosure(nextStates);
-            if (nextClosure.empty())
+            dfaSubsets->resize(stateBound());
+            for (state_t state = 0; state < dfaSubsets->size(); state++)
             {
-                continue;
-            }
-            if (std::find(newStates.begin(), newStates.end(), nextClosure) ==
-                newStates.end())
-            {
-                newStates.push_back(nextClosure);
-            }
-            auto new_state_index =
-                std::find(newStates.begin(), newStates.end(), nextClosure) -
-                newStates.begin();
-            if (newTransitions.size() <= i)
-            {
-                newTransitions.resize(i + 1);
+                (*dfaSubsets)[state] = {state};
             }
-            newTransitions[i].push_back(
-                {static_cast<state_t>(new_state_index), symbol});
         }
-        if (std::any_of(newStates[i].begin(), newStates[i].end(),
-                        [this](state_t state) { return isFinalState(state); }))
+        result.totalMs = elapsed_ms(start);
+        return *this;
+    }
+
+    state_t stateCount = stateBound();
+    std::vector<bool> finalMask(stateCount, false);
+    for (state_t state : finalStates)
+    {
+        finalMask[state] = true;
+    }
+
+    precomputeClosures();
+    result.closureIndexMs = elapsed_ms(start);
+    unsigned threads = options.threads != 0
+                           ? options.threads
+                           : std::max(1u, std::thread::hardware_concurrency());
+    if (threads > 1)
+    {
+        return determinizeParallel(options, threads, finalMask, result,
+                                   dfaSubsets, start);
+    }
+    auto exploreStart = std::chrono::steady_clock::now();
+
+    SubsetTable subsets;
+    std::vector<std::vector<Transition>> newTransitions;
+    auto check = [&](state_t processed)
+    {
+        result.subsets = subsets.size();
+        result.memoryBytes =
+            subsets.getMemoryBytes() +
+            newTransitions.capacity() * sizeof(std::vector<Transition>) +
+            result.transitions * sizeof(Transition);
+        // Reading the clock costs more than the other checks, so the
+        // deadline is only looked at every 64 subsets.
+        if (auto reason = exceeded_limit(options, result, processed % 64 == 0))
+        {
+            result.totalMs = elapsed_ms(start);
+            throw DeterminizeAborted(*reason, result);
+        }
+    };
+
+    ByteClasses classes(getTransitionView());
+    SubsetExpansion expansion(stateCount, classes.getCount());
+    std::vector<state_t> closure = {this->initialState};
+    closeSubset(closure, expansion.marks, ++expansion.stamp);
+    expansion.closureComputations++;
+    expansion.peakSubsetSize = closure.size();
+    subsets.intern(closure);
+
+    std::vector<state_t> newFinalStates;
+    size_t nextProgress = options.progressInterval;
+    for (state_t i = 0; i < subsets.size(); i++)
+    {
+        check(i);
+        if (options.progress && options.progressInterval != 0 &&
+            subsets.size() >= nextProgress)
+        {
+            nextProgress = subsets.size() + options.progressInterval;
+            result.closureComputations = expansion.closureComputations;
+            result.peakSubsetSize = expansion.peakSubsetSize;
+            result.exploreMs = elapsed_ms(exploreStart);
+            result.totalMs = elapsed_ms(start);
+            options.progress(result);
+        }
+
+        if (expandSubset(subsets.get(i), classes, finalMask, expansion))
         {
             newFinalStates.push_back(i);
         }
+        newTransitions.resize(subsets.size());
+        for (uint8_t symbolClass : expansion.symbolClasses)
+        {
+            std::vector<state_t> &target = expansion.targets[symbolClass];
+            state_t next = subsets.intern(target);
+            target.clear();
+            result.transitions +=
+                append_class_edge(newTransitions[i], next, classes, symbolClass);
+        }
     }
-    auto initialStateIndex =
-        std::find(newStates.begin(), newStates.end(), initialState) -
-        newStates.begin();
-    for (auto &newState : newStates)
+    result.closureComputations = expansion.closureComputations;
+    result.peakSubsetSize = expansion.peakSubsetSize;
+    newTransitions.resize(subsets.size());
+    check(0);
+    result.exploreMs = elapsed_ms(exploreStart);
+    if (dfaSubsets != nullptr)
     {
-        std::cout << "New state: "
-                  << std::distance(newStates.begin(),
-                                   std::find(newStates.begin(), newStates.end(),
-                                             newState))
-                  << " with ";
-        for (auto state : newState)
+        dfaSubsets->resize(subsets.size());
+        for (state_t i = 0; i < subsets.size(); i++)
         {
-            std::cout << state << " ";
+            auto subset = subsets.get(i);
+            (*dfaSubsets)[i].assign(subset.begin(), subset.end());
         }
-        std::cout << std::endl;
     }
-    return Automaton(newTransitions, newFinalStates, initialStateIndex);
-}
 
-std::vector<state_t> Automaton::getStates() { return states; }
+    auto buildStart = std::chrono::steady_clock::now();
+    Automaton dfa(std::move(newTransitions), std::move(newFinalStates), 0);
+    result.buildMs = elapsed_ms(buildStart);
+    result.totalMs = elapsed_ms(start);
+    return dfa;
+}
 
-std::vector<std::vector<Transition>> Automaton::getTransitions()
+// Subsets stored back to back with their ids, as found during one level of
+// the parallel construction.
+struct SubsetList
 {
-    return transitions;
-}
+    std::vector<state_t> ids;
+    std::vector<state_t> pool;
+    std::vector<size_t> offsets = {0};
 
-std::vector<state_t> Automaton::getFinalStates() { return finalStates; }
+    size_t size() const { return ids.size(); }
+    std::span<const state_t> get(size_t k) const
+    {
+        return {pool.data() + offsets[k], pool.data() + offsets[k + 1]};
+    }
+    void push(state_t id, std::span<const state_t> subset)
+    {
+        ids.push_back(id);
+        pool.insert(pool.end(), subset.begin(), subset.end());
+        offsets.push_back(pool.size());
+    }
+    void append(const SubsetList &other)
+    {
+        for (size_t k = 0; k < other.size(); k++)
+        {
+            push(other.ids[k], other.get(k));
+        }
+    }
+    void clear()
+    {
+        ids.clear();
+        pool.clear();
+        offsets.assign(1, 0);
+    }
+};
 
-void Automaton::output()
+// SubsetTables behind one mutex each, picked by the subset's hash. A
+// subset's provisional id is its id within its shard times the shard count
+// plus the shard's index. Shards also hold the DFA row and final flag of
+// each of their subsets; the slots are added between levels by growRows(),
+// so threads fill them in without locking.
+class ShardedSubsetTable
 {
-    std::cout << "States: ";
-    for (state_t state : states)
+   public:
+    explicit ShardedSubsetTable(size_t shardCount) : shards(shardCount) {}
+
+    // Returns the provisional id and whether the subset was new.
+    std::pair<state_t, bool> intern(std::span<const state_t> subset)
     {
-        std::cout << state << " ";
+        // High bits of the remixed hash, since each shard's table buckets
+        // by the low ones.
+        uint64_t hash = SubsetTable::hash(subset) * 0x9E3779B97F4A7C15ull;
+        size_t index = (hash >> 32) % shards.size();
+        Shard &shard = shards[index];
+        std::lock_guard<std::mutex> lock(shard.mutex);
+        state_t size = shard.table.size();
+        state_t id = shard.table.intern(subset);
+        return {static_cast<state_t>(id * shards.size() + index), id == size};
     }
-    std::cout << "\nInitial state: " << initialState << std::endl;
-    std::cout << "Final states: ";
-    for (state_t state : finalStates)
+
+    std::span<const state_t> get(state_t id) const
     {
-        std::cout << state << " ";
+        return shards[id % shards.size()].table.get(id / shards.size());
     }
-    std::cout << std::endl;
-    for (state_t i = 0; i < transitions.size(); i++)
+    std::vector<Transition> &getRow(state_t id)
     {
-        for (Transition transition : transitions[i])
+        return shards[id % shards.size()].rows[id / shards.size()];
+    }
+    void setFinal(state_t id)
+    {
+        shards[id % shards.size()].finals[id / shards.size()] = true;
+    }
+    bool isFinal(state_t id) const
+    {
+        return shards[id % shards.size()].finals[id / shards.size()];
+    }
+
+    void growRows()
+    {
+        for (Shard &shard : shards)
+        {
+            shard.rows.resize(shard.table.size());
+            shard.finals.resize(shard.table.size());
+        }
+    }
+
+    // One past the largest provisional id.
+    state_t getIdBound() const
+    {
+        size_t bound = 0;
+        for (size_t index = 0; index < shards.size(); index++)
+        {
+            state_t size = shards[index].table.size();
+            if (size > 0)
+            {
+                bound = std::max(bound, (size - 1) * shards.size() + index + 1);
+            }
+        }
+        return static_cast<state_t>(bound);
+    }
+
+    size_t getMemoryBytes() const
+    {
+        size_t bytes = 0;
+        for (const Shard &shard : shards)
+        {
+            bytes += shard.table.getMemoryBytes() +
+                     shard.rows.capacity() * sizeof(std::vector<Transition>) +
+                     shard.finals.capacity();
+        }
+        return bytes;
+    }
+
+   private:
+    struct Shard
+    {
+        std::mutex mutex;
+        SubsetTable table;
+        std::vector<std::vector<Transition>> rows;
+        std::vector<char> finals;
+    };
+
+    std::vector<Shard> shards;
+};
+
+// Levels with fewer subsets than this are expanded on the calling thread
+// alone, where starting threads would cost more than they save.
+static constexpr size_t parallel_level_size = 256;
+// Subsets a thread takes from the level at a time.
+static constexpr size_t level_chunk = 16;
+
+// Level-synchronous subset construction. The subsets found in one level
+// are expanded by `threads` threads, which take chunks of the level from a
+// shared counter and intern the successors into a sharded table. The DFA
+// is then numbered by a breadth-first walk over the finished rows; that
+// visits subsets in the order the sequential loop discovers them, so the
+// result is the same as determinize() on one thread.
+Automaton Automaton::determinizeParallel(
+    const DeterminizeOptions &options, unsigned threads,
+    const std::vector<bool> &finalMask, DeterminizeStats &result,
+    std::vector<std::vector<state_t>> *dfaSubsets,
+    std::chrono::steady_clock::time_point start)
+{
+    using Reason = DeterminizeAborted::Reason;
+    auto exploreStart = std::chrono::steady_clock::now();
+    state_t stateCount = stateBound();
+    ByteClasses classes(getTransitionView());
+    ShardedSubsetTable subsets(threads * 8);
+
+    struct Worker
+    {
+        SubsetExpansion expansion;
+        SubsetList found;
+        size_t transitions = 0;
+        size_t processed = 0;
+    };
+    std::vector<Worker> workers;
+    workers.reserve(threads);
+    for (unsigned w = 0; w < threads; w++)
+    {
+        workers.push_back({SubsetExpansion(stateCount, classes.getCount())});
+    }
+
+    SubsetList frontier;
+    std::vector<state_t> closure = {this->initialState};
+    SubsetExpansion &first = workers[0].expansion;
+    closeSubset(closure, first.marks, ++first.stamp);
+    first.closureComputations++;
+    first.peakSubsetSize = closure.size();
+    state_t initialId = subsets.intern(closure).first;
+    frontier.push(initialId, closure);
+    subsets.growRows();
+
+    std::atomic<size_t> subsetCount = 1;
+    // Bytes added since the last level boundary, on top of memoryBytes.
+    std::atomic<size_t> addedBytes = 0;
+    size_t memoryBytes = 0;
+    std::atomic<size_t> nextChunk = 0;
+    std::atomic<bool> stop = false;
+    std::mutex failureMutex;
+    std::optional<Reason> aborted;
+    std::exception_ptr failure;
+    auto fail = [&](std::optional<Reason> reason, std::exception_ptr error)
+    {
+        std::lock_guard<std::mutex> lock(failureMutex);
+        if (!aborted && !failure)
+        {
+            aborted = reason;
+            failure = error;
+        }
+        stop = true;
+    };
+    // The counters as of the last level boundary, with live totals.
+    auto running = [&]
+    {
+        DeterminizeStats stats = result;
+        stats.subsets = subsetCount;
+        stats.memoryBytes = memoryBytes + addedBytes;
+        stats.exploreMs = elapsed_ms(exploreStart);
+        stats.totalMs = elapsed_ms(start);
+        return stats;
+    };
+
+    size_t nextProgress = options.progressInterval;
+    auto explore = [&](Worker &worker, bool callingThread)
+    {
+        SubsetExpansion &expansion = worker.expansion;
+        try
+        {
+            for (;;)
+            {
+                size_t begin = nextChunk.fetch_add(level_chunk);
+                if (begin >= frontier.size() || stop) return;
+                size_t end = std::min(begin + level_chunk, frontier.size());
+                for (size_t k = begin; k < end; k++)
+                {
+                    if (++worker.processed % 64 == 0)
+                    {
+                        DeterminizeStats stats = running();
+                        if (auto reason = exceeded_limit(options, stats, true))
+                        {
+                            fail(reason, nullptr);
+                            return;
+                        }
+                        if (callingThread && options.progress &&
+                            options.progressInterval != 0 &&
+                            stats.subsets >= nextProgress)
+                        {
+                            nextProgress =
+                                stats.subsets + options.progressInterval;
+                            options.progress(stats);
+                        }
+                    }
+
+                    state_t id = frontier.ids[k];
+                    if (expandSubset(frontier.get(k), classes, finalMask,
+                                     expansion))
+                    {
+                        subsets.setFinal(id);
+                    }
+                    std::vector<Transition> &row = subsets.getRow(id);
+                    for (uint8_t symbolClass : expansion.symbolClasses)
+                    {
+                        std::vector<state_t> &target =
+                            expansion.targets[symbolClass];
+                        auto [next, added] = subsets.intern(target);
+                        if (added)
+                        {
+                            worker.found.push(next, target);
+                            addedBytes += target.size() * sizeof(state_t) +
+                                          4 * sizeof(void *);
+                            size_t count = ++subsetCount;
+                            if (options.maxStates != 0 &&
+                                count > options.maxStates)
+                            {
+                                fail(Reason::MaxStates, nullptr);
+                            }
+                        }
+                        target.clear();
+                        worker.transitions += append_class_edge(
+                            row, next, classes, symbolClass);
+                    }
+                    addedBytes += row.size() * sizeof(Transition);
+                }
+            }
+        }
+        catch (...)
+        {
+            fail(std::nullopt, std::current_exception());
+        }
+    };
+
+    while (frontier.size() != 0)
+    {
+        nextChunk = 0;
+        if (frontier.size() < parallel_level_size)
+        {
+            explore(workers[0], true);
+        }
+        else
+        {
+            std::vector<std::jthread> helpers;
+            for (unsigned w = 1; w < threads; w++)
+            {
+                helpers.emplace_back([&, w] { explore(workers[w], false); });
+            }
+            explore(workers[0], true);
+        }
+
+        result.subsets = subsetCount;
+        result.closureComputations = 0;
+        result.transitions = 0;
+        for (const Worker &worker : workers)
+        {
+            result.closureComputations += worker.expansion.closureComputations;
+            result.peakSubsetSize = std::max(result.peakSubsetSize,
+                                             worker.expansion.peakSubsetSize);
+            result.transitions += worker.transitions;
+        }
+        subsets.growRows();
+        memoryBytes = subsets.getMemoryBytes() +
+                      result.transitions * sizeof(Transition);
+        addedBytes = 0;
+        result.memoryBytes = memoryBytes;
+        if (failure)
+        {
+            std::rethrow_exception(failure);
+        }
+        if (!aborted)
+        {
+            aborted = exceeded_limit(options, result, true);
+        }
+        if (aborted)
+        {
+            result.exploreMs = elapsed_ms(exploreStart);
+            result.totalMs = elapsed_ms(start);
+            throw DeterminizeAborted(*aborted, result);
+        }
+
+        frontier.clear();
+        for (Worker &worker : workers)
+        {
+            frontier.append(worker.found);
+            worker.found.clear();
+        }
+    }
+    result.exploreMs = elapsed_ms(exploreStart);
+
+    auto buildStart = std::chrono::steady_clock::now();
+    std::vector<state_t> number(subsets.getIdBound(), -1);
+    std::vector<state_t> order = {initialId};
+    number[initialId] = 0;
+    std::vector<std::vector<Transition>> newTransitions(result.subsets);
+    std::vector<state_t> newFinalStates;
+    if (dfaSubsets != nullptr)
+    {
+        dfaSubsets->resize(result.subsets);
+    }
+    for (size_t i = 0; i < order.size(); i++)
+    {
+        state_t id = order[i];
+        if (dfaSubsets != nullptr)
         {
-            std::cout << i << " -> " << transition.to << " on "
-                      << transition.symbol << std::endl;
+            auto subset = subsets.get(id);
+            (*dfaSubsets)[i].assign(subset.begin(), subset.end());
+        }
+        std::vector<Transition> &row = newTransitions[i];
+        row = std::move(subsets.getRow(id));
+        for (Transition &transition : row)
+        {
+            if (number[transition.to] < 0)
+            {
+                number[transition.to] = order.size();
+                order.push_back(transition.to);
+            }
+            transition.to = number[transition.to];
+        }
+        if (subsets.isFinal(id))
+        {
+            newFinalStates.push_back(i);
+        }
+    }
+    Automaton dfa(std::move(newTransitions), std::move(newFinalStates), 0);
+    result.buildMs = elapsed_ms(buildStart);
+    result.totalMs = elapsed_ms(start);
+    return dfa;
+}
+
+// Sorts a deterministic row by range and joins neighbouring or repeated
+// ranges that lead to the same state.
+static void merge_ranges(std::vector<Transition> &row)
+{
+    std::sort(row.begin(), row.end(), [](Transition a, Transition b)
+              { return a.getFirst() < b.getFirst(); });
+    size_t kept = 0;
+    for (size_t k = 0; k < row.size(); k++)
+    {
+        if (kept > 0 && row[kept - 1].to == row[k].to &&
+            row[k].getFirst() <= row[kept - 1].getLast() + 1)
+        {
+            row[kept - 1].last = row[k].last;
+            continue;
+        }
+        row[kept++] = row[k];
+    }
+    row.resize(kept);
+}
+
+// Hopcroft's partition refinement on a trimmed partial DFA. Missing
+// transitions implicitly lead to a dead state that is never materialized:
+// because every remaining state can reach a final state, none of them is
+// equivalent to it, and seeding the worklist with every initial block makes
+// the "process the smaller half" rule sound without a complete table.
+Automaton Automaton::minimize()
+{
+    if (!isDeterministic())
+    {
+        return determinize().minimize();
+    }
+    return minimize({});
+}
+
+Automaton Automaton::minimize(const std::vector<state_t> &acceptClasses,
+                              std::vector<state_t> *representatives)
+{
+    if (!isDeterministic())
+    {
+        throw std::invalid_argument("minimize with accept classes needs a DFA");
+    }
+    state_t stateCount = stateBound();
+    if (!acceptClasses.empty() && acceptClasses.size() < stateCount)
+    {
+        throw std::invalid_argument("acceptClasses has fewer entries than "
+                                    "there are states");
+    }
+    TransitionView transitions = getTransitionView();
+    std::vector<std::vector<state_t>> predecessors(stateCount);
+    for (state_t from = 0; from < transitions.size(); from++)
+    {
+        for (Transition transition : transitions[from])
+        {
+            predecessors[transition.to].push_back(from);
+        }
+    }
+
+    std::vector<bool> reachable(stateCount, false);
+    std::vector<state_t> stack = {initialState};
+    reachable[initialState] = true;
+    while (!stack.empty())
+    {
+        state_t state = stack.back();
+        stack.pop_back();
+        if (transitions.size() <= state) continue;
+        for (Transition transition : transitions[state])
+        {
+            if (!reachable[transition.to])
+            {
+                reachable[transition.to] = true;
+                stack.push_back(transition.to);
+            }
+        }
+    }
+
+    std::vector<bool> live(stateCount, false);
+    for (state_t state : finalStates)
+    {
+        if (reachable[state] && !live[state])
+        {
+            live[state] = true;
+            stack.push_back(state);
+        }
+    }
+    while (!stack.empty())
+    {
+        state_t state = stack.back();
+        stack.pop_back();
+        for (state_t from : predecessors[state])
+        {
+            if (reachable[from] && !live[from])
+            {
+                live[from] = true;
+                stack.push_back(from);
+            }
+        }
+    }
+    if (!live[initialState])
+    {
+        if (representatives != nullptr)
+        {
+            *representatives = {initialState};
+        }
+        return Automaton(std::vector<std::vector<Transition>>(1), {}, 0);
+    }
+
+    // Incoming live edges grouped by target, in CSR form, with one entry
+    // per byte class that an edge covers.
+    ByteClasses classes(transitions);
+    struct Incoming
+    {
+        state_t from;
+        uint8_t symbolClass;
+    };
+    auto class_span = [&classes](Transition transition)
+    {
+        return classes.get(transition.getLast()) -
+               classes.get(transition.getFirst()) + 1;
+    };
+    std::vector<size_t> inOffsets(stateCount + 1, 0);
+    for (state_t from = 0; from < transitions.size(); from++)
+    {
+        if (!live[from]) continue;
+        for (Transition transition : transitions[from])
+        {
+            if (live[transition.to])
+            {
+                inOffsets[transition.to + 1] += class_span(transition);
+            }
+        }
+    }
+    for (state_t state = 0; state < stateCount; state++)
+    {
+        inOffsets[state + 1] += inOffsets[state];
+    }
+    std::vector<Incoming> incoming(inOffsets[stateCount]);
+    std::vector<size_t> fill(inOffsets.begin(), inOffsets.end() - 1);
+    for (state_t from = 0; from < transitions.size(); from++)
+    {
+        if (!live[from]) continue;
+        for (Transition transition : transitions[from])
+        {
+            if (!live[transition.to]) continue;
+            int firstClass = classes.get(transition.getFirst());
+            for (int k = 0; k < class_span(transition); k++)
+            {
+                incoming[fill[transition.to]++] = {
+                    from, static_cast<uint8_t>(firstClass + k)};
+            }
+        }
+    }
+
+    // Refinable partition: each block is a contiguous range of `elements`;
+    // marked members of a block are swapped into [first, mid).
+    std::vector<state_t> elements;
+    std::vector<size_t> location(stateCount);
+    std::vector<state_t> blockOf(stateCount, -1);
+    std::vector<size_t> first, mid, end;
+    std::vector<bool> finalMask(stateCount, false);
+    for (state_t state : finalStates)
+    {
+        finalMask[state] = true;
+    }
+    // Final states start with one block per accept class, ahead of one
+    // block of the other live states.
+    auto initial_block = [&](state_t state)
+    {
+        if (!finalMask[state])
+        {
+            return std::numeric_limits<state_t>::max();
+        }
+        return acceptClasses.empty() ? 0 : acceptClasses[state];
+    };
+    for (state_t state = 0; state < stateCount; state++)
+    {
+        if (live[state])
+        {
+            elements.push_back(state);
+        }
+    }
+    std::stable_sort(elements.begin(), elements.end(),
+                     [&](state_t a, state_t b)
+                     { return initial_block(a) < initial_block(b); });
+    for (size_t i = 0; i < elements.size(); i++)
+    {
+        state_t state = elements[i];
+        if (i == 0 || initial_block(state) != initial_block(elements[i - 1]))
+        {
+            first.push_back(i);
+            mid.push_back(i);
+            end.push_back(i);
+        }
+        location[state] = i;
+        blockOf[state] = first.size() - 1;
+        end.back() = i + 1;
+    }
+
+    std::vector<state_t> worklist;
+    std::vector<bool> inWorklist(first.size(), true);
+    for (state_t block = 0; block < first.size(); block++)
+    {
+        worklist.push_back(block);
+    }
+
+    std::vector<Incoming> splitter;
+    std::vector<state_t> touched;
+    while (!worklist.empty())
+    {
+        state_t block = worklist.back();
+        worklist.pop_back();
+        inWorklist[block] = false;
+
+        splitter.clear();
+        for (size_t i = first[block]; i < end[block]; i++)
+        {
+            state_t state = elements[i];
+            splitter.insert(splitter.end(), incoming.begin() + inOffsets[state],
+                            incoming.begin() + inOffsets[state + 1]);
+        }
+        std::sort(splitter.begin(), splitter.end(),
+                  [](Incoming a, Incoming b)
+                  { return a.symbolClass < b.symbolClass; });
+
+        for (size_t i = 0; i < splitter.size();)
+        {
+            size_t j = i;
+            for (; j < splitter.size() &&
+                   splitter[j].symbolClass == splitter[i].symbolClass;
+                 j++)
+            {
+                state_t state = splitter[j].from;
+                state_t target = blockOf[state];
+                if (location[state] < mid[target]) continue;
+                if (mid[target] == first[target]) touched.push_back(target);
+                std::swap(elements[location[state]], elements[mid[target]]);
+                location[elements[location[state]]] = location[state];
+                location[state] = mid[target]++;
+            }
+            i = j;
+
+            for (state_t target : touched)
+            {
+                if (mid[target] == end[target])
+                {
+                    mid[target] = first[target];
+                    continue;
+                }
+                state_t split = first.size();
+                first.push_back(first[target]);
+                mid.push_back(first[target]);
+                end.push_back(mid[target]);
+                first[target] = mid[target];
+                for (size_t k = first[split]; k < end[split]; k++)
+                {
+                    blockOf[elements[k]] = split;
+                }
+                if (inWorklist[target] ||
+                    end[split] - first[split] <= end[target] - first[target])
+                {
+                    worklist.push_back(split);
+                    inWorklist.push_back(true);
+                }
+                else
+                {
+                    worklist.push_back(target);
+                    inWorklist[target] = true;
+                    inWorklist.push_back(false);
+                }
+            }
+            touched.clear();
+        }
+    }
+
+    // Renumber blocks in breadth-first order from the initial block.
+    std::vector<state_t> newId(first.size(), -1);
+    std::vector<state_t> order = {blockOf[initialState]};
+    newId[order[0]] = 0;
+    std::vector<std::vector<Transition>> newTransitions;
+    std::vector<state_t> newFinalStates;
+    if (representatives != nullptr)
+    {
+        representatives->clear();
+    }
+    for (state_t i = 0; i < order.size(); i++)
+    {
+        state_t representative = elements[first[order[i]]];
+        if (representatives != nullptr)
+        {
+            representatives->push_back(representative);
+        }
+        if (finalMask[representative])
+        {
+            newFinalStates.push_back(i);
+        }
+        newTransitions.emplace_back();
+        if (transitions.size() <= representative) continue;
+        for (Transition transition : transitions[representative])
+        {
+            if (!live[transition.to]) continue;
+            state_t target = blockOf[transition.to];
+            if (newId[target] == -1)
+            {
+                newId[target] = order.size();
+                order.push_back(target);
+            }
+            transition.to = newId[target];
+            newTransitions[i].push_back(transition);
+        }
+        merge_ranges(newTransitions[i]);
+    }
+    return Automaton(newTransitions, newFinalStates, 0);
+}
+
+CompiledDFA Automaton::compile()
+{
+    if (!isDeterministic())
+    {
+        return determinize().compile();
+    }
+    return CompiledDFA(getTransitionView(), finalStates, initialState,
+                       stateBound());
+}
+
+void Automaton::freeze()
+{
+    if (frozen) return;
+    size_t edgeCount = 0;
+    for (const std::vector<Transition> &row : rows)
+    {
+        edgeCount += row.size();
+    }
+    edgeOffsets.reserve(rows.size() + 1);
+    edgeOffsets.assign(1, 0);
+    edges.reserve(edgeCount);
+    for (const std::vector<Transition> &row : rows)
+    {
+        edges.insert(edges.end(), row.begin(), row.end());
+        edgeOffsets.push_back(edges.size());
+    }
+    rows.clear();
+    rows.shrink_to_fit();
+    frozen = true;
+    sortFrozenEdges();
+}
+
+// Frozen order: epsilon edges first, then by first byte, last byte and
+// target.
+bool Automaton::frozenEdgeBefore(Transition a, Transition b)
+{
+    return std::tuple(!a.epsilon, a.getFirst(), a.getLast(), a.to) <
+           std::tuple(!b.epsilon, b.getFirst(), b.getLast(), b.to);
+}
+
+// Sorts one state's edges into frozen order and moves the ones that are
+// not repeats to the front. Returns how many were kept.
+size_t Automaton::sortEdges(Transition *begin, Transition *end)
+{
+    std::sort(begin, end, frozenEdgeBefore);
+    Transition *kept = begin;
+    for (Transition *edge = begin; edge != end; ++edge)
+    {
+        if (kept != begin)
+        {
+            Transition previous = kept[-1];
+            if (previous.to == edge->to && previous.epsilon == edge->epsilon &&
+                (edge->epsilon || (previous.symbol == edge->symbol &&
+                                   previous.last == edge->last)))
+            {
+                continue;
+            }
+        }
+        *kept++ = *edge;
+    }
+    return kept - begin;
+}
+
+// Sorts each state's frozen edges, drops repeated ones and records the
+// widest range.
+void Automaton::sortFrozenEdges()
+{
+    size_t kept = 0;
+    widestRange = 0;
+    for (size_t state = 0; state + 1 < edgeOffsets.size(); state++)
+    {
+        size_t begin = edgeOffsets[state];
+        size_t count =
+            sortEdges(edges.data() + begin, edges.data() + edgeOffsets[state + 1]);
+        if (kept != begin)
+        {
+            std::copy(edges.begin() + begin, edges.begin() + begin + count,
+                      edges.begin() + kept);
+        }
+        edgeOffsets[state] = kept;
+        for (size_t k = kept; k < kept + count; k++)
+        {
+            if (!edges[k].epsilon)
+            {
+                widestRange = std::max<int>(
+                    widestRange, edges[k].getLast() - edges[k].getFirst());
+            }
+        }
+        kept += count;
+    }
+    edgeOffsets.back() = kept;
+    edges.resize(kept);
+    edges.shrink_to_fit();
+}
+
+void Automaton::thaw()
+{
+    if (!frozen) return;
+    rows.resize(edgeOffsets.size() - 1);
+    for (state_t state = 0; state < rows.size(); state++)
+    {
+        rows[state].assign(edges.begin() + edgeOffsets[state],
+                           edges.begin() + edgeOffsets[state + 1]);
+    }
+    edgeOffsets.clear();
+    edgeOffsets.shrink_to_fit();
+    edges.clear();
+    edges.shrink_to_fit();
+    frozen = false;
+}
+
+size_t Automaton::getMemoryBytes() const
+{
+    size_t bytes = states.capacity() * sizeof(state_t) +
+                   finalStates.capacity() * sizeof(state_t) +
+                   (stateSeen.capacity() + finalMask.capacity()) / 8 +
+                   edgeOffsets.capacity() * sizeof(size_t) +
+                   edges.capacity() * sizeof(Transition) +
+                   rows.capacity() * sizeof(std::vector<Transition>);
+    for (const std::vector<Transition> &row : rows)
+    {
+        bytes += row.capacity() * sizeof(Transition);
+    }
+    return bytes;
+}
+
+TransitionView Automaton::getTransitionView() const
+{
+    if (frozen)
+    {
+        return TransitionView(edgeOffsets, edges);
+    }
+    return TransitionView(rows);
+}
+
+std::vector<std::vector<Transition>> Automaton::getTransitions()
+{
+    if (!frozen)
+    {
+        return rows;
+    }
+    TransitionView transitions = getTransitionView();
+    std::vector<std::vector<Transition>> copy(transitions.size());
+    for (state_t state = 0; state < transitions.size(); state++)
+    {
+        copy[state].assign(transitions[state].begin(),
+                           transitions[state].end());
+    }
+    return copy;
+}
+
+TransitionArrays Automaton::exportTransitions()
+{
+    TransitionView transitions = getTransitionView();
+    state_t stateCount = stateBound();
+    TransitionArrays arrays;
+    arrays.offsets.reserve(stateCount + 1);
+    arrays.offsets.push_back(0);
+    for (state_t state = 0; state < stateCount; state++)
+    {
+        if (state < transitions.size())
+        {
+            for (Transition transition : transitions[state])
+            {
+                arrays.targets.push_back(transition.to);
+                arrays.symbols.push_back(transition.getFirst());
+                arrays.lasts.push_back(transition.getLast());
+                arrays.epsilon.push_back(transition.epsilon);
+            }
+        }
+        arrays.offsets.push_back(arrays.targets.size());
+    }
+    return arrays;
+}
+
+ByteClasses Automaton::getByteClasses()
+{
+    return ByteClasses(getTransitionView());
+}
+
+void Automaton::output()
+{
+    TransitionView transitions = getTransitionView();
+    std::cout << "States: ";
+    for (state_t state : states)
+    {
+        std::cout << state << " ";
+    }
+    std::cout << "\nInitial state: " << initialState << std::endl;
+    std::cout << "Final states: ";
+    for (state_t state : finalStates)
+    {
+        std::cout << state << " ";
+    }
+    std::cout << std::endl;
+    for (state_t i = 0; i < transitions.size(); i++)
+    {
+        for (Transition transition : transitions[i])
+        {
+            std::cout << i << " -> " << transition.to << " on ";
+            if (transition.epsilon)
+            {
+                std::cout << "epsilon";
+            }
+            else if (transition.symbol == transition.last)
+            {
+                std::cout << transition.symbol;
+            }
+            else
+            {
+                std::cout << transition.symbol << "-" << transition.last;
+            }
+            std::cout << std::endl;
         }
     }
 }
\ No newline at end of file
@@ -0,0 +1,363 @@
+#include <algorithm>
+#include <cstddef>
+#include <cstring>
+#include <fstream>
+#include <numeric>
+#include <stdexcept>
+#include <tuple>
+
+#include "Automaton/Automaton.h"
+#include "Automaton/MappedFile.h"
+
+// Binary layout, in native byte order with a byte-order marker to reject
+// foreign files. Every section starts on an 8-byte boundary:
+//
+//   FileHeader
+//   int64_t offsets[stateCount + 1]   CSR row offsets into the edges
+//   FileEdge edges[edgeCount]
+//   int32_t finals[finalCount]
+//
+// Each state's edges are written in frozen order without repeats, and a
+// FileEdge has the layout of a Transition, so load() copies the offsets
+// and edges as they are. It still checks every edge in one linear pass,
+// so a damaged file is rejected rather than indexed out of bounds, but it
+// neither sorts nor rebuilds anything.
+//
+// Version 2 files store the edges as separate sections instead:
+//
+//   int32_t targets[edgeCount]
+//   uint8_t symbols[edgeCount]        first byte of each edge's range
+//   uint8_t lasts[edgeCount]          last byte
+//   uint8_t flags[edgeCount]          edge_epsilon
+//
+// and version 1 files only have targets and symbols, with single-byte
+// edges and 0 standing for epsilon. Both are still read, in any edge
+// order, and sorted on load.
+struct FileHeader
+{
+    char magic[8];
+    uint32_t byteOrder;
+    uint32_t version;
+    int32_t initialState;
+    uint32_t reserved;
+    int64_t stateCount;
+    int64_t edgeCount;
+    int64_t finalCount;
+    uint64_t sourceHash;
+};
+
+struct FileEdge
+{
+    int32_t to;
+    uint8_t first;
+    uint8_t last;
+    uint8_t flags;
+    uint8_t padding;
+};
+static_assert(sizeof(FileEdge) == sizeof(Transition) &&
+                  offsetof(FileEdge, to) == offsetof(Transition, to) &&
+                  offsetof(FileEdge, first) == offsetof(Transition, symbol) &&
+                  offsetof(FileEdge, last) == offsetof(Transition, last) &&
+                  offsetof(FileEdge, flags) == offsetof(Transition, epsilon),
+              "FileEdge must have the layout of Transition");
+
+static constexpr char file_magic[8] = {'N', '2', 'D', 'A', 'U', 'T', 'O', '\0'};
+static constexpr uint32_t byte_order_marker = 0x01020304;
+static constexpr uint32_t file_version = 3;
+static constexpr uint8_t edge_epsilon = 1;
+
+static size_t align8(size_t size) { return (size + 7) & ~size_t{7}; }
+
+static void write_section(std::ofstream &out, const void *data, size_t size)
+{
+    static const char padding[8] = {};
+    out.write(static_cast<const char *>(data), size);
+    out.write(padding, align8(size) - size);
+}
+
+void Automaton::save(const std::string &path, uint64_t sourceHash)
+{
+    TransitionView transitions = getTransitionView();
+    state_t stateCount = stateBound();
+    std::vector<int64_t> offsets;
+    offsets.reserve(stateCount + 1);
+    offsets.push_back(0);
+    std::vector<FileEdge> fileEdges;
+    std::vector<Transition> row;
+    for (state_t state = 0; state < stateCount; state++)
+    {
+        // Frozen edges are already in order.
+        std::span<const Transition> stateEdges = transitions[state];
+        if (!frozen)
+        {
+            row.assign(stateEdges.begin(), stateEdges.end());
+            row.resize(sortEdges(row.data(), row.data() + row.size()));
+            stateEdges = row;
+        }
+        for (Transition transition : stateEdges)
+        {
+            fileEdges.push_back({transition.to, transition.getFirst(),
+                                 transition.getLast(),
+                                 transition.epsilon ? edge_epsilon : uint8_t{0},
+                                 0});
+        }
+        offsets.push_back(fileEdges.size());
+    }
+
+    FileHeader header = {};
+    std::memcpy(header.magic, file_magic, sizeof(file_magic));
+    header.byteOrder = byte_order_marker;
+    header.version = file_version;
+    header.initialState = initialState;
+    header.stateCount = stateCount;
+    header.edgeCount = fileEdges.size();
+    header.finalCount = finalStates.size();
+    header.sourceHash = sourceHash;
+
+    std::ofstream out(path, std::ios::binary | std::ios::trunc);
+    if (!out)
+    {
+        throw std::runtime_error("cannot write " + path);
+    }
+    write_section(out, &header, sizeof(header));
+    write_section(out, offsets.data(), offsets.size() * sizeof(int64_t));
+    write_section(out, fileEdges.data(), fileEdges.size() * sizeof(FileEdge));
+    write_section(out, finalStates.data(), finalStates.size() * sizeof(state_t));
+    if (!out.flush())
+    {
+        throw std::runtime_error("cannot write " + path);
+    }
+}
+
+// Versions 1 and 2: the edges are gathered from their sections and sorted
+// into frozen order.
+static void read_edge_sections(const std::string &path,
+                               const FileHeader &header, const char *cursor,
+                               std::vector<Transition> &edges)
+{
+    auto *targets = reinterpret_cast<const state_t *>(cursor);
+    cursor += align8(header.edgeCount * sizeof(state_t));
+    auto *symbols = cursor;
+    cursor += align8(header.edgeCount);
+    const char *lasts = nullptr;
+    const char *flags = nullptr;
+    if (header.version != 1)
+    {
+        lasts = cursor;
+        cursor += align8(header.edgeCount);
+        flags = cursor;
+    }
+    edges.reserve(header.edgeCount);
+    for (int64_t k = 0; k < header.edgeCount; k++)
+    {
+        if (targets[k] < 0 || targets[k] >= header.stateCount)
+        {
+            throw std::runtime_error(path + " has corrupt targets");
+        }
+        if (lasts == nullptr)
+        {
+            edges.push_back({targets[k], symbols[k]});
+            continue;
+        }
+        bool epsilon = flags[k] & edge_epsilon;
+        if (!epsilon && static_cast<unsigned char>(symbols[k]) >
+                            static_cast<unsigned char>(lasts[k]))
+        {
+            throw std::runtime_error(path + " has corrupt symbols");
+        }
+        edges.push_back({targets[k], symbols[k], lasts[k], epsilon});
+    }
+}
+
+Automaton Automaton::load(const std::string &path, uint64_t *sourceHash)
+{
+    MappedFile file(path);
+    const char *data = file.getData();
+    FileHeader header;
+    if (file.getSize() < sizeof(header))
+    {
+        throw std::runtime_error(path + " is not an automaton file");
+    }
+    std::memcpy(&header, data, sizeof(header));
+    if (std::memcmp(header.magic, file_magic, sizeof(file_magic)) != 0 ||
+        header.byteOrder != byte_order_marker)
+    {
+        throw std::runtime_error(path + " is not an automaton file");
+    }
+    if (header.version < 1 || header.version > file_version)
+    {
+        throw std::runtime_error(path + " has unsupported version " +
+                                 std::to_string(header.version));
+    }
+    int64_t limit = file.getSize();
+    if (header.stateCount < 0 || header.edgeCount < 0 ||
+        header.finalCount < 0 || header.stateCount > limit ||
+        header.edgeCount > limit || header.finalCount > limit)
+    {
+        throw std::runtime_error(path + " is truncated");
+    }
+    size_t edgeBytes;
+    if (header.version == file_version)
+    {
+        edgeBytes = align8(header.edgeCount * sizeof(FileEdge));
+    }
+    else
+    {
+        // Version 1 has only the symbols section per edge.
+        int byteSections = header.version == 1 ? 1 : 3;
+        edgeBytes = align8(header.edgeCount * sizeof(state_t)) +
+                    byteSections * align8(header.edgeCount);
+    }
+    if (file.getSize() < align8(sizeof(header)) +
+                             align8((header.stateCount + 1) * sizeof(int64_t)) +
+                             edgeBytes +
+                             align8(header.finalCount * sizeof(state_t)))
+    {
+        throw std::runtime_error(path + " is truncated");
+    }
+    // save() writes stateBound() as the state count, so every state the
+    // file names lies below it.
+    if (header.initialState < 0 || header.initialState >= header.stateCount)
+    {
+        throw std::runtime_error(path + " has a corrupt initial state");
+    }
+
+    const char *cursor = data + align8(sizeof(header));
+    auto *offsets = reinterpret_cast<const int64_t *>(cursor);
+    cursor += align8((header.stateCount + 1) * sizeof(int64_t));
+    const char *edgeSection = cursor;
+    auto *finals = reinterpret_cast<const state_t *>(cursor + edgeBytes);
+    if (offsets[0] != 0 || offsets[header.stateCount] != header.edgeCount)
+    {
+        throw std::runtime_error(path + " has corrupt offsets");
+    }
+    for (int64_t state = 0; state < header.stateCount; state++)
+    {
+        if (offsets[state] > offsets[state + 1])
+        {
+            throw std::runtime_error(path + " has corrupt offsets");
+        }
+    }
+    for (int64_t i = 0; i < header.finalCount; i++)
+    {
+        if (finals[i] < 0 || finals[i] >= header.stateCount)
+        {
+            throw std::runtime_error(path + " has corrupt final states");
+        }
+    }
+
+    // The file is already in CSR form, so the automaton is loaded frozen.
+    Automaton automaton;
+    automaton.initialState = header.initialState;
+    automaton.frozen = true;
+    automaton.edgeOffsets.assign(offsets, offsets + header.stateCount + 1);
+    if (header.version == file_version)
+    {
+        auto *fileEdges = reinterpret_cast<const FileEdge *>(edgeSection);
+        for (int64_t state = 0; state < header.stateCount; state++)
+        {
+            for (int64_t k = offsets[state]; k < offsets[state + 1]; k++)
+            {
+                FileEdge edge = fileEdges[k];
+                bool epsilon = edge.flags == edge_epsilon;
+                if (edge.to < 0 || edge.to >= header.stateCount ||
+                    (edge.flags != 0 && !epsilon) ||
+                    (!epsilon && edge.first > edge.last))
+                {
+                    throw std::runtime_error(path + " has corrupt edges");
+                }
+                if (k > offsets[state] &&
+                    frozenEdgeBefore({edge.to, static_cast<char>(edge.first),
+                                      static_cast<char>(edge.last), epsilon},
+                                     {fileEdges[k - 1].to,
+                                      static_cast<char>(fileEdges[k - 1].first),
+                                      static_cast<char>(fileEdges[k - 1].last),
+                                      fileEdges[k - 1].flags == edge_epsilon}))
+                {
+                    throw std::runtime_error(path + " has unsorted edges");
+                }
+                if (!epsilon)
+                {
+                    automaton.widestRange = std::max<int>(
+                        automaton.widestRange, edge.last - edge.first);
+                }
+            }
+        }
+        automaton.edges.resize(header.edgeCount);
+        std::memcpy(automaton.edges.data(), fileEdges,
+                    header.edgeCount * sizeof(FileEdge));
+    }
+    else
+    {
+        read_edge_sections(path, header, edgeSection, automaton.edges);
+        automaton.sortFrozenEdges();
+    }
+
+    // Every state below the state count has a row, so every one of them is
+    // a state; only the finals need registering.
+    automaton.states.resize(header.stateCount);
+    std::iota(automaton.states.begin(), automaton.states.end(), 0);
+    automaton.stateSeen.assign(header.stateCount, true);
+    for (int64_t i = 0; i < header.finalCount; i++)
+    {
+        automaton.addFinalState(finals[i]);
+    }
+    if (sourceHash != nullptr)
+    {
+        *sourceHash = header.sourceHash;
+    }
+    return automaton;
+}
+
+// FNV-1a over the sorted, de-duplicated edge list, final states and
+// initial state, so insertion order and repeated edges do not matter.
+uint64_t Automaton::structureHash()
+{
+    // Epsilon edges are recorded as the range [1, 0], which no byte edge
+    // can have.
+    TransitionView transitions = getTransitionView();
+    std::vector<std::tuple<state_t, state_t, uint8_t, uint8_t>> edges;
+    for (state_t from = 0; from < transitions.size(); from++)
+    {
+        for (Transition transition : transitions[from])
+        {
+            if (transition.epsilon)
+            {
+                edges.emplace_back(from, transition.to, 1, 0);
+                continue;
+            }
+            edges.emplace_back(from, transition.to, transition.getFirst(),
+                               transition.getLast());
+        }
+    }
+    std::sort(edges.begin(), edges.end());
+    edges.erase(std::unique(edges.begin(), edges.end()), edges.end());
+    std::vector<state_t> finals = finalStates;
+    std::sort(finals.begin(), finals.end());
+    finals.erase(std::unique(finals.begin(), finals.end()), finals.end());
+
+    uint64_t hash = 14695981039346656037ull;
+    auto mix = [&hash](uint64_t value)
+    {
+        for (int i = 0; i < 8; i++)
+        {
+            hash = (hash ^ ((value >> (8 * i)) & 0xff)) * 1099511628211ull;
+        }
+    };
+    mix(file_version);
+    mix(static_cast<uint32_t>(initialState));
+    mix(edges.size());
+    for (auto [from, to, first, last] : edges)
+    {
+        mix(static_cast<uint32_t>(from));
+        mix(static_cast<uint32_t>(to));
+        mix(first);
+        mix(last);
+    }
+    mix(finals.size());
+    for (state_t state : finals)
+    {
+        mix(static_cast<uint32_t>(state));
+    }
+    return hash;
+}
@@ -0,0 +1,376 @@
+#include <algorithm>
+#include <unordered_map>
+
+#include "Automaton/Automaton.h"
+#include "Automaton/ByteClasses.h"
+#include "Automaton/EpsilonClosureIndex.h"
+#include "Automaton/PatternSet.h"
+#include "Automaton/SubsetTable.h"
+
+static constexpr state_t unknown_state = -1;
+
+// The DFA states of an automaton, built only as they are reached: each
+// closed subset gets an id when it is first seen, with the empty subset as
+// the dead state. Successors are cached per byte class.
+class SubsetExplorer
+{
+   public:
+    SubsetExplorer(TransitionView transitions,
+                   std::shared_ptr<const EpsilonClosureIndex> closureIndex,
+                   const std::vector<state_t> &finalStates,
+                   state_t initialState, state_t stateCount,
+                   const ByteClasses &classes)
+        : transitions(transitions),
+          closureIndex(std::move(closureIndex)),
+          classes(classes),
+          finalMask(stateCount, false),
+          marks(stateCount, 0)
+    {
+        for (state_t state : finalStates)
+        {
+            finalMask[state] = true;
+        }
+        scratch = {initialState};
+        initial = add(scratch);
+    }
+
+    state_t getInitial() const { return initial; }
+    bool isFinal(state_t id) const { return finals[id]; }
+    std::span<const state_t> get(state_t id) const { return table.get(id); }
+
+    // The successor of subset `id` on any byte of `symbolClass`.
+    state_t step(state_t id, int symbolClass)
+    {
+        size_t slot = static_cast<size_t>(id) * classes.getCount() + symbolClass;
+        if (next[slot] != unknown_state)
+        {
+            return next[slot];
+        }
+        unsigned char byte = classes.getFirst(symbolClass);
+        scratch.clear();
+        for (state_t state : table.get(id))
+        {
+            for (Transition transition : transitions[state])
+            {
+                if (transition.matches(byte))
+                {
+                    scratch.push_back(transition.to);
+                }
+            }
+        }
+        state_t successor = add(scratch);
+        next[slot] = successor;
+        return successor;
+    }
+
+   private:
+    TransitionView transitions;
+    std::shared_ptr<const EpsilonClosureIndex> closureIndex;
+    const ByteClasses &classes;
+    std::vector<bool> finalMask;
+    std::vector<unsigned> marks;
+    unsigned stamp = 0;
+    SubsetTable table;
+    std::vector<bool> finals;
+    std::vector<state_t> next;
+    std::vector<state_t> scratch;
+    std::vector<state_t> closed;
+    state_t initial;
+
+    // Closes `subset` and returns its id.
+    state_t add(const std::vector<state_t> &subset)
+    {
+        stamp++;
+        closed.clear();
+        bool isFinal = false;
+        for (state_t state : subset)
+        {
+            closureIndex->appendClosure(state, closed, marks, stamp);
+        }
+        for (state_t member : closed)
+        {
+            isFinal = isFinal || finalMask[member];
+        }
+        std::sort(closed.begin(), closed.end());
+        state_t size = table.size();
+        state_t id = table.intern(closed);
+        if (id == size)
+        {
+            finals.push_back(isFinal);
+            next.resize(next.size() + classes.getCount(), unknown_state);
+        }
+        return id;
+    }
+};
+
+// Steps of a breadth-first search, each remembering the byte that led to
+// it from its parent, so that the input reaching any step can be spelled
+// out.
+struct SearchStep
+{
+    state_t left;
+    state_t right;
+    size_t parent;
+    unsigned char byte;
+};
+
+static std::string spell_path(const std::vector<SearchStep> &steps,
+                              size_t step)
+{
+    std::string input;
+    for (; steps[step].parent != step; step = steps[step].parent)
+    {
+        input += static_cast<char>(steps[step].byte);
+    }
+    std::reverse(input.begin(), input.end());
+    return input;
+}
+
+Automaton Automaton::intersect(Automaton &other)
+{
+    std::vector<bool> leftFinal(stateBound(), false);
+    std::vector<bool> rightFinal(other.stateBound(), false);
+    for (state_t state : finalStates)
+    {
+        leftFinal[state] = true;
+    }
+    for (state_t state : other.finalStates)
+    {
+        rightFinal[state] = true;
+    }
+
+    std::unordered_map<uint64_t, state_t> ids;
+    std::vector<std::pair<state_t, state_t>> pairs;
+    auto pair_id = [&](state_t left, state_t right)
+    {
+        uint64_t key = static_cast<uint64_t>(static_cast<uint32_t>(left)) << 32 |
+                       static_cast<uint32_t>(right);
+        auto [found, added] = ids.emplace(key, pairs.size());
+        if (added)
+        {
+            pairs.emplace_back(left, right);
+        }
+        return found->second;
+    };
+    pair_id(initialState, other.initialState);
+
+    TransitionView transitions = getTransitionView();
+    TransitionView otherTransitions = other.getTransitionView();
+    std::vector<std::vector<Transition>> product;
+    std::vector<state_t> productFinals;
+    for (state_t i = 0; i < pairs.size(); i++)
+    {
+        auto [left, right] = pairs[i];
+        std::span<const Transition> leftEdges = transitions[left];
+        std::span<const Transition> rightEdges = otherTransitions[right];
+        // Either side may take an epsilon move on its own; a byte is read
+        // by both at once.
+        std::vector<Transition> row;
+        for (Transition edge : leftEdges)
+        {
+            if (edge.epsilon)
+            {
+                row.push_back({pair_id(edge.to, right), '\0', '\0', true});
+            }
+        }
+        for (Transition edge : rightEdges)
+        {
+            if (edge.epsilon)
+            {
+                row.push_back({pair_id(left, edge.to), '\0', '\0', true});
+            }
+        }
+        for (Transition leftEdge : leftEdges)
+        {
+            if (leftEdge.epsilon) continue;
+            for (Transition rightEdge : rightEdges)
+            {
+                if (rightEdge.epsilon) continue;
+                unsigned char first =
+                    std::max(leftEdge.getFirst(), rightEdge.getFirst());
+                unsigned char last =
+                    std::min(leftEdge.getLast(), rightEdge.getLast());
+                if (first > last) continue;
+                row.push_back({pair_id(leftEdge.to, rightEdge.to),
+                               static_cast<char>(first),
+                               static_cast<char>(last), false});
+            }
+        }
+        product.push_back(std::move(row));
+        if (leftFinal[left] && rightFinal[right])
+        {
+            productFinals.push_back(i);
+        }
+    }
+    return Automaton(std::move(product), std::move(productFinals), 0);
+}
+
+Automaton Automaton::unite(Automaton &other)
+{
+    std::vector<Automaton> operands = {*this, other};
+    return PatternSet::unite(operands);
+}
+
+Automaton Automaton::complement()
+{
+    Automaton dfa = determinize();
+    TransitionView transitions = dfa.getTransitionView();
+    state_t stateCount = dfa.stateBound();
+    std::vector<bool> finalMask(stateCount, false);
+    for (state_t state : dfa.finalStates)
+    {
+        finalMask[state] = true;
+    }
+
+    // Bytes without a transition go to a rejecting sink, which becomes
+    // accepting once final and non-final states are swapped.
+    state_t sink = stateCount;
+    bool needsSink = false;
+    std::vector<std::vector<Transition>> rows(stateCount);
+    for (state_t state = 0; state < stateCount; state++)
+    {
+        std::vector<Transition> sorted(transitions[state].begin(),
+                                       transitions[state].end());
+        std::sort(sorted.begin(), sorted.end(), [](Transition a, Transition b)
+                  { return a.getFirst() < b.getFirst(); });
+        int uncovered = 0;
+        for (Transition transition : sorted)
+        {
+            if (transition.getFirst() > uncovered)
+            {
+                rows[state].push_back(
+                    {sink, static_cast<char>(uncovered),
+                     static_cast<char>(transition.getFirst() - 1), false});
+                needsSink = true;
+            }
+            rows[state].push_back(transition);
+            uncovered = transition.getLast() + 1;
+        }
+        if (uncovered <= 255)
+        {
+            rows[state].push_back(
+                {sink, static_cast<char>(uncovered), '\xff', false});
+            needsSink = true;
+        }
+    }
+
+    std::vector<state_t> complementFinals;
+    for (state_t state = 0; state < stateCount; state++)
+    {
+        if (!finalMask[state])
+        {
+            complementFinals.push_back(state);
+        }
+    }
+    if (needsSink)
+    {
+        rows.push_back({{sink, '\0', '\xff', false}});
+        complementFinals.push_back(sink);
+    }
+    return Automaton(std::move(rows), std::move(complementFinals),
+                     dfa.initialState);
+}
+
+bool Automaton::isEmpty()
+{
+    state_t stateCount = stateBound();
+    std::vector<bool> finalMask(stateCount, false);
+    for (state_t state : finalStates)
+    {
+        finalMask[state] = true;
+    }
+    std::vector<bool> seen(stateCount, false);
+    std::vector<state_t> stack = {initialState};
+    seen[initialState] = true;
+    while (!stack.empty())
+    {
+        state_t state = stack.back();
+        stack.pop_back();
+        if (finalMask[state])
+        {
+            return false;
+        }
+        for (Transition transition : getOutgoing(state))
+        {
+            if (!seen[transition.to])
+            {
+                seen[transition.to] = true;
+                stack.push_back(transition.to);
+            }
+        }
+    }
+    return true;
+}
+
+// Hopcroft and Karp's check on the subset automata of both sides: pairs of
+// DFA states reached by the same input are merged in a union-find, and a
+// pair only needs exploring if its two states are not already known to be
+// equivalent. The search is breadth-first, so the first pair that differs
+// in acceptance yields a short counterexample.
+std::optional<std::string> Automaton::findDifference(Automaton &other)
+{
+    precomputeClosures();
+    other.precomputeClosures();
+    ByteClasses classes(getTransitionView(), other.getTransitionView());
+    SubsetExplorer left(getTransitionView(), closureIndex, finalStates,
+                        initialState, stateBound(), classes);
+    SubsetExplorer right(other.getTransitionView(), other.closureIndex,
+                         other.finalStates, other.initialState,
+                         other.stateBound(), classes);
+
+    // Left subsets are the even union-find nodes, right subsets the odd.
+    std::vector<size_t> parent;
+    auto find = [&](size_t node)
+    {
+        if (parent.size() <= node)
+        {
+            size_t size = parent.size();
+            parent.resize(std::max(node + 1, 2 * size));
+            for (size_t k = size; k < parent.size(); k++)
+            {
+                parent[k] = k;
+            }
+        }
+        while (parent[node] != node)
+        {
+            parent[node] = parent[parent[node]];
+            node = parent[node];
+        }
+        return node;
+    };
+
+    std::vector<SearchStep> steps = {
+        {left.getInitial(), right.getInitial(), 0, 0}};
+    size_t rightRoot = find(2 * size_t(right.getInitial()) + 1);
+    parent[find(2 * size_t(left.getInitial()))] = rightRoot;
+    for (size_t i = 0; i < steps.size(); i++)
+    {
+        SearchStep step = steps[i];
+        if (left.isFinal(step.left) != right.isFinal(step.right))
+        {
+            return spell_path(steps, i);
+        }
+        for (int symbolClass = 0; symbolClass < classes.getCount();
+             symbolClass++)
+        {
+            state_t leftNext = left.step(step.left, symbolClass);
+            state_t rightNext = right.step(step.right, symbolClass);
+            size_t leftRoot = find(2 * size_t(leftNext));
+            size_t rightRoot = find(2 * size_t(rightNext) + 1);
+            if (leftRoot == rightRoot) continue;
+            parent[leftRoot] = rightRoot;
+            steps.push_back(
+                {leftNext, rightNext, i, classes.getFirst(symbolClass)});
+        }
+    }
+    return std::nullopt;
+}
+
+// L(this) is included in L(other) exactly when L(this | other) equals
+// L(other), and any input telling those two apart is accepted here and
+// rejected by `other`.
+std::optional<std::string> Automaton::findInclusionCounterexample(
+    Automaton &other)
+{
+    return unite(other).findDifference(other);
+}
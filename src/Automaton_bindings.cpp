@@ -1,25 +1,327 @@
 #include <pybind11/complex.h>
 #include <pybind11/functional.h>
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
+#include <chrono>
+#include <optional>
+#include <string_view>
+
 #include "Automaton/Automaton.h"
+#include "Automaton/ByteClasses.h"
+#include "Automaton/CompiledDFA.h"
+#include "Automaton/DFACache.h"
+#include "Automaton/IncrementalDFA.h"
+#include "Automaton/LazyDFA.h"
+#include "Automaton/PatternSet.h"
+#include "Automaton/StreamMatcher.h"
 
 namespace py = pybind11;
 
+// Borrows the UTF-8 or byte contents of each item; `keepAlive` holds the
+// references so the views stay valid while the GIL is released.
+static std::vector<std::string_view> borrow_strings(
+    const py::sequence &inputs, std::vector<py::object> &keepAlive)
+{
+    std::vector<std::string_view> views;
+    views.reserve(inputs.size());
+    keepAlive.reserve(inputs.size());
+    for (py::handle item : inputs)
+    {
+        keepAlive.push_back(py::reinterpret_borrow<py::object>(item));
+        if (PyUnicode_Check(item.ptr()))
+        {
+            Py_ssize_t size;
+            const char *data = PyUnicode_AsUTF8AndSize(item.ptr(), &size);
+            if (data == nullptr)
+            {
+                throw py::error_already_set();
+            }
+            views.emplace_back(data, size);
+        }
+        else if (PyBytes_Check(item.ptr()))
+        {
+            views.emplace_back(PyBytes_AS_STRING(item.ptr()),
+                               PyBytes_GET_SIZE(item.ptr()));
+        }
+        else
+        {
+            throw py::type_error("matchMany expects str or bytes items");
+        }
+    }
+    return views;
+}
+
+// Views the bytes of a one-dimensional contiguous buffer.
+static std::string_view contiguous_bytes(const py::buffer_info &buffer)
+{
+    if (buffer.ndim > 1 ||
+        (buffer.ndim == 1 && buffer.strides[0] != buffer.itemsize))
+    {
+        throw py::value_error("data must be a contiguous buffer");
+    }
+    return {static_cast<const char *>(buffer.ptr),
+            static_cast<size_t>(buffer.size * buffer.itemsize)};
+}
+
+static py::object optional_bytes(const std::optional<std::string> &value)
+{
+    if (!value)
+    {
+        return py::none();
+    }
+    return py::bytes(*value);
+}
+
+// Hands the vector's storage to NumPy without copying it.
+template <typename T>
+static py::array_t<T> to_array(std::vector<T> &&values)
+{
+    auto *owner = new std::vector<T>(std::move(values));
+    py::capsule release(owner, [](void *pointer)
+                        { delete static_cast<std::vector<T> *>(pointer); });
+    return py::array_t<T>(owner->size(), owner->data(), release);
+}
+
+using state_array =
+    py::array_t<state_t, py::array::c_style | py::array::forcecast>;
+
+// Checks that `states` is one-dimensional with non-negative entries.
+static void check_states(const state_array &states, const char *name)
+{
+    if (states.ndim() != 1)
+    {
+        throw py::value_error(std::string(name) + " must be 1-D");
+    }
+    const state_t *data = states.data();
+    for (py::ssize_t i = 0; i < states.size(); i++)
+    {
+        if (data[i] < 0)
+        {
+            throw py::value_error(std::string(name) +
+                                  " must not contain negative states");
+        }
+    }
+}
+
+// Views a buffer of single bytes with `count` entries.
+static std::string_view byte_buffer(const py::buffer &buffer, const char *name,
+                                    size_t count)
+{
+    py::buffer_info info = buffer.request();
+    if (info.itemsize != 1)
+    {
+        throw py::value_error(std::string(name) +
+                              " must be a buffer of single bytes");
+    }
+    std::string_view bytes = contiguous_bytes(info);
+    if (bytes.size() != count)
+    {
+        throw py::value_error(
+            "sources, targets and symbol arrays must have equal lengths");
+    }
+    return bytes;
+}
+
+// Without `lasts`, each edge is the single byte symbols[k] and 0 stands for
+// epsilon; with it, edges are ranges and `epsilon` flags the epsilon edges.
+static void add_transitions(Automaton &automaton, const state_array &sources,
+                            const state_array &targets,
+                            const py::buffer &symbols,
+                            const std::optional<py::buffer> &lasts,
+                            const std::optional<py::buffer> &epsilon)
+{
+    check_states(sources, "sources");
+    check_states(targets, "targets");
+    if (sources.size() != targets.size())
+    {
+        throw py::value_error(
+            "sources, targets and symbol arrays must have equal lengths");
+    }
+    size_t count = sources.size();
+    std::string_view firsts = byte_buffer(symbols, "symbols", count);
+    if (!lasts)
+    {
+        if (epsilon)
+        {
+            throw py::value_error("epsilon requires lasts");
+        }
+        automaton.addTransitions(sources.data(), targets.data(), firsts.data(),
+                                 count);
+        return;
+    }
+    std::string_view lastBytes = byte_buffer(*lasts, "lasts", count);
+    std::string_view flags;
+    if (epsilon)
+    {
+        flags = byte_buffer(*epsilon, "epsilon", count);
+    }
+    automaton.addTransitions(
+        sources.data(), targets.data(), firsts.data(), lastBytes.data(),
+        epsilon ? reinterpret_cast<const uint8_t *>(flags.data()) : nullptr,
+        count);
+}
+
+static py::dict stats_dict(const DeterminizeStats &stats)
+{
+    py::dict result;
+    result["subsets"] = stats.subsets;
+    result["closureComputations"] = stats.closureComputations;
+    result["transitions"] = stats.transitions;
+    result["peakSubsetSize"] = stats.peakSubsetSize;
+    result["memoryBytes"] = stats.memoryBytes;
+    result["closureIndexMs"] = stats.closureIndexMs;
+    result["exploreMs"] = stats.exploreMs;
+    result["buildMs"] = stats.buildMs;
+    result["totalMs"] = stats.totalMs;
+    return result;
+}
+
 PYBIND11_MODULE(Automaton_bindings, m)
 {
+    py::class_<CancellationToken>(m, "CancellationToken")
+        .def(py::init<>())
+        .def("cancel", &CancellationToken::cancel)
+        .def("isCancelled", &CancellationToken::isCancelled);
+
+    py::class_<DeterminizeStats>(m, "DeterminizeStats")
+        .def_readonly("subsets", &DeterminizeStats::subsets)
+        .def_readonly("closureComputations",
+                      &DeterminizeStats::closureComputations)
+        .def_readonly("transitions", &DeterminizeStats::transitions)
+        .def_readonly("peakSubsetSize", &DeterminizeStats::peakSubsetSize)
+        .def_readonly("memoryBytes", &DeterminizeStats::memoryBytes)
+        .def_readonly("closureIndexMs", &DeterminizeStats::closureIndexMs)
+        .def_readonly("exploreMs", &DeterminizeStats::exploreMs)
+        .def_readonly("buildMs", &DeterminizeStats::buildMs)
+        .def_readonly("totalMs", &DeterminizeStats::totalMs)
+        .def("toDict", &stats_dict);
+
+    py::class_<DeterminizeOptions>(m, "DeterminizeOptions")
+        .def(py::init<>())
+        .def_readwrite("maxStates", &DeterminizeOptions::maxStates)
+        .def_readwrite("memoryBudget", &DeterminizeOptions::memoryBudget)
+        .def_readwrite("cancellation", &DeterminizeOptions::cancellation)
+        .def_readwrite("progress", &DeterminizeOptions::progress)
+        .def_readwrite("progressInterval",
+                       &DeterminizeOptions::progressInterval)
+        .def_readwrite("threads", &DeterminizeOptions::threads)
+        // Seconds from now; None removes the deadline.
+        .def_property(
+            "timeout", [](const DeterminizeOptions &) { return py::none(); },
+            [](DeterminizeOptions &options, std::optional<double> seconds)
+            {
+                using clock = std::chrono::steady_clock;
+                options.deadline =
+                    seconds ? clock::now() +
+                                  std::chrono::duration_cast<clock::duration>(
+                                      std::chrono::duration<double>(*seconds))
+                            : clock::time_point::max();
+            });
+
+    // DeterminizeAborted carries `reason` and `stats` attributes.
+    static py::handle aborted =
+        py::exception<DeterminizeAborted>(m, "DeterminizeAborted",
+                                          PyExc_RuntimeError)
+            .release();
+    py::register_exception_translator(
+        [](std::exception_ptr pointer)
+        {
+            try
+            {
+                if (pointer) std::rethrow_exception(pointer);
+            }
+            catch (const DeterminizeAborted &error)
+            {
+                static const char *reasons[] = {"maxStates", "memoryBudget",
+                                                 "deadline", "cancelled"};
+                py::object instance = aborted(error.what());
+                instance.attr("reason") =
+                    reasons[static_cast<int>(error.getReason())];
+                instance.attr("stats") = py::cast(error.getStats());
+                PyErr_SetObject(aborted.ptr(), instance.ptr());
+            }
+        });
+
     py::class_<Transition>(m, "Transition")
         .def(py::init<>())
+        .def(py::init(
+                 [](state_t to, char symbol, std::optional<char> last,
+                    std::optional<bool> epsilon)
+                 {
+                     Transition transition{to, symbol};
+                     transition.last = last.value_or(symbol);
+                     transition.epsilon = epsilon.value_or(
+                         !last.has_value() && symbol == '\0');
+                     return transition;
+                 }),
+             py::arg("to"), py::arg("symbol"), py::arg("last") = py::none(),
+             py::arg("epsilon") = py::none())
         .def_readwrite("to", &Transition::to)
-        .def_readwrite("symbol", &Transition::symbol);
+        .def_readwrite("symbol", &Transition::symbol)
+        .def_readwrite("last", &Transition::last)
+        .def_readwrite("epsilon", &Transition::epsilon);
+
+    py::class_<ByteClasses>(m, "ByteClasses")
+        .def_property_readonly("count", &ByteClasses::getCount)
+        .def("get", &ByteClasses::get)
+        .def("getFirst", &ByteClasses::getFirst)
+        .def("getLast", &ByteClasses::getLast)
+        .def("classOf",
+             [](const ByteClasses &classes)
+             {
+                 const auto &classOf = classes.getClassOf();
+                 return to_array(
+                     std::vector<uint8_t>(classOf.begin(), classOf.end()));
+             });
 
     py::class_<Automaton>(m, "Automaton")
         .def(py::init<>())
         .def(py::init<std::vector<std::vector<Transition>>,
                       std::vector<state_t>, state_t>())
-        .def("addTransition", &Automaton::addTransition)
+        .def("addTransition",
+             py::overload_cast<state_t, state_t, char>(&Automaton::addTransition))
+        .def("addTransition", py::overload_cast<state_t, state_t, char, char>(
+                                  &Automaton::addTransition),
+             py::arg("source"), py::arg("target"), py::arg("first"),
+             py::arg("last"))
+        .def("addEpsilonTransition", &Automaton::addEpsilonTransition)
+        .def("addCodePointTransition", &Automaton::addCodePointTransition,
+             py::arg("source"), py::arg("target"), py::arg("first"),
+             py::arg("last"))
+        .def("reserveStates", &Automaton::reserveStates)
+        .def("addTransitions", &add_transitions, py::arg("sources"),
+             py::arg("targets"), py::arg("symbols"),
+             py::arg("lasts") = py::none(), py::arg("epsilon") = py::none())
         .def("addFinalState", &Automaton::addFinalState)
+        .def(
+            "addFinalStates",
+            [](Automaton &automaton, const state_array &states)
+            {
+                check_states(states, "states");
+                automaton.addFinalStates(states.data(), states.size());
+            },
+            py::arg("states"))
+        .def_static(
+            "fromArrays",
+            [](const state_array &sources, const state_array &targets,
+               const py::buffer &symbols, const state_array &finalStates,
+               state_t initialState, const std::optional<py::buffer> &lasts,
+               const std::optional<py::buffer> &epsilon)
+            {
+                Automaton automaton;
+                add_transitions(automaton, sources, targets, symbols, lasts,
+                                epsilon);
+                check_states(finalStates, "finalStates");
+                automaton.addFinalStates(finalStates.data(),
+                                         finalStates.size());
+                automaton.setInitialState(initialState);
+                return automaton;
+            },
+            py::arg("sources"), py::arg("targets"), py::arg("symbols"),
+            py::arg("finalStates"), py::arg("initialState"),
+            py::arg("lasts") = py::none(), py::arg("epsilon") = py::none())
         .def("setInitialState", &Automaton::setInitialState)
         .def("isFinalState", &Automaton::isFinalState)
         .def("getInitialState", &Automaton::getInitialState)
@@ -29,6 +331,7 @@ PYBIND11_MODULE(Automaton_bindings, m)
              py::overload_cast<std::string>(&Automaton::isAccepted))
         .def("isAccepted",
              py::overload_cast<std::string, state_t>(&Automaton::isAccepted))
+        .def("precomputeClosures", &Automaton::precomputeClosures)
         .def("getEpsilonClosure",
              py::overload_cast<state_t>(&Automaton::getEpsilonClosure))
         .def("getEpsilonClosure", py::overload_cast<std::vector<state_t>>(
@@ -37,9 +340,348 @@ PYBIND11_MODULE(Automaton_bindings, m)
              py::overload_cast<state_t, char>(&Automaton::getTransitions))
         .def("getTransitions", py::overload_cast<std::vector<state_t>, char>(
                                    &Automaton::getTransitions))
-        .def("determinize", &Automaton::determinize)
+        .def(
+            "determinize",
+            [](Automaton &automaton, unsigned threads)
+            {
+                DeterminizeOptions options;
+                options.threads = threads;
+                return automaton.determinize(options);
+            },
+            py::arg("threads") = 1, py::call_guard<py::gil_scoped_release>())
+        .def(
+            "determinize",
+            [](Automaton &automaton, const DeterminizeOptions &options)
+            {
+                DeterminizeStats stats;
+                Automaton dfa = [&]
+                {
+                    py::gil_scoped_release release;
+                    return automaton.determinize(options, &stats);
+                }();
+                return py::make_tuple(std::move(dfa), stats);
+            },
+            py::arg("options"))
+        .def("minimize", py::overload_cast<>(&Automaton::minimize))
+        .def("intersect", &Automaton::intersect, py::arg("other"),
+             py::call_guard<py::gil_scoped_release>())
+        .def("unite", &Automaton::unite, py::arg("other"),
+             py::call_guard<py::gil_scoped_release>())
+        .def("complement", &Automaton::complement,
+             py::call_guard<py::gil_scoped_release>())
+        .def("isEmpty", &Automaton::isEmpty)
+        .def("isEquivalent", &Automaton::isEquivalent, py::arg("other"),
+             py::call_guard<py::gil_scoped_release>())
+        .def("isSubsetOf", &Automaton::isSubsetOf, py::arg("other"),
+             py::call_guard<py::gil_scoped_release>())
+        // Counterexamples are bytes, or None when there is none.
+        .def(
+            "findDifference",
+            [](Automaton &automaton, Automaton &other)
+            {
+                std::optional<std::string> difference;
+                {
+                    py::gil_scoped_release release;
+                    difference = automaton.findDifference(other);
+                }
+                return optional_bytes(difference);
+            },
+            py::arg("other"))
+        .def(
+            "findInclusionCounterexample",
+            [](Automaton &automaton, Automaton &other)
+            {
+                std::optional<std::string> counterexample;
+                {
+                    py::gil_scoped_release release;
+                    counterexample =
+                        automaton.findInclusionCounterexample(other);
+                }
+                return optional_bytes(counterexample);
+            },
+            py::arg("other"))
+        .def("compile", &Automaton::compile)
         .def("getStates", &Automaton::getStates)
         .def("getTransitions", py::overload_cast<>(&Automaton::getTransitions))
+        .def("getOutgoing",
+             [](const Automaton &automaton, state_t state)
+             {
+                 auto edges = automaton.getOutgoing(state);
+                 return std::vector<Transition>(edges.begin(), edges.end());
+             })
+        .def("freeze", &Automaton::freeze)
+        .def("isFrozen", &Automaton::isFrozen)
+        .def("getMemoryBytes", &Automaton::getMemoryBytes)
         .def("getFinalStates", &Automaton::getFinalStates)
+        .def("exportTransitions",
+             [](Automaton &automaton)
+             {
+                 TransitionArrays arrays = automaton.exportTransitions();
+                 return py::make_tuple(to_array(std::move(arrays.offsets)),
+                                       to_array(std::move(arrays.targets)),
+                                       to_array(std::move(arrays.symbols)),
+                                       to_array(std::move(arrays.lasts)),
+                                       to_array(std::move(arrays.epsilon)));
+             })
+        .def("getByteClasses", &Automaton::getByteClasses)
+        .def("save", &Automaton::save, py::arg("path"),
+             py::arg("sourceHash") = 0)
+        .def_static(
+            "load", [](const std::string &path)
+            { return Automaton::load(path); }, py::arg("path"))
+        .def("structureHash", &Automaton::structureHash)
+        .def("exportFinalStates",
+             [](Automaton &automaton)
+             {
+                 return to_array(
+                     std::vector<state_t>(automaton.getFinalStates()));
+             })
         .def_static("convertQx2Int", &Automaton::convertQx2Int);
+
+    py::class_<DFACache>(m, "DFACache")
+        .def(py::init<std::string>(), py::arg("directory"))
+        .def("determinize", &DFACache::determinize)
+        .def("minimize", &DFACache::minimize)
+        .def("getPath", &DFACache::getPath)
+        .def("getDirectory", &DFACache::getDirectory)
+        .def("getHits", &DFACache::getHits)
+        .def("getMisses", &DFACache::getMisses);
+
+    // The dense tables are not bounds-checked in C++; states outside
+    // [0, getStateCount()) raise IndexError here.
+    auto check_dfa_state = [](int32_t stateCount, int32_t state)
+    {
+        if (state < 0 || state >= stateCount)
+        {
+            throw py::index_error("DFA state " + std::to_string(state) +
+                                  " is out of range");
+        }
+    };
+    py::class_<CompiledDFA>(m, "CompiledDFA")
+        .def("getInitialState", &CompiledDFA::getInitialState)
+        .def("getStateCount", &CompiledDFA::getStateCount)
+        .def("getByteClasses", &CompiledDFA::getByteClasses)
+        .def("getNextState",
+             [check_dfa_state](const CompiledDFA &dfa, int32_t state,
+                               unsigned char symbol)
+             {
+                 check_dfa_state(dfa.getStateCount(), state);
+                 return dfa.getNextState(state, symbol);
+             })
+        // Negative states are the dead state, which is not final.
+        .def("isFinalState",
+             [check_dfa_state](const CompiledDFA &dfa, int32_t state)
+             {
+                 if (state >= 0)
+                 {
+                     check_dfa_state(dfa.getStateCount(), state);
+                 }
+                 return dfa.isFinalState(state);
+             })
+        .def("isAccepted", &CompiledDFA::isAccepted)
+        .def(
+            "matchMany",
+            [](const CompiledDFA &dfa, const py::sequence &inputs,
+               unsigned threads)
+            {
+                std::vector<py::object> keepAlive;
+                auto views = borrow_strings(inputs, keepAlive);
+                py::array_t<bool> results(views.size());
+                auto *out = reinterpret_cast<uint8_t *>(results.mutable_data());
+                {
+                    py::gil_scoped_release release;
+                    dfa.matchMany(views.data(), views.size(), out, threads);
+                }
+                return results;
+            },
+            py::arg("inputs"), py::arg("threads") = 0)
+        .def(
+            "matchBuffer",
+            [](const CompiledDFA &dfa, const py::buffer &data,
+               py::array_t<int64_t, py::array::c_style | py::array::forcecast>
+                   offsets,
+               unsigned threads)
+            {
+                py::buffer_info buffer = data.request();
+                std::string_view bytes = contiguous_bytes(buffer);
+                if (offsets.ndim() != 1 || offsets.size() == 0)
+                {
+                    throw py::value_error(
+                        "offsets must be a non-empty 1-D array");
+                }
+                size_t count = offsets.size() - 1;
+                py::array_t<bool> results(count);
+                auto *out = reinterpret_cast<uint8_t *>(results.mutable_data());
+                {
+                    py::gil_scoped_release release;
+                    dfa.matchBuffer(bytes.data(), bytes.size(),
+                                    offsets.data(), count, out, threads);
+                }
+                return results;
+            },
+            py::arg("data"), py::arg("offsets"), py::arg("threads") = 0)
+        .def(
+            "scanFile",
+            [](const CompiledDFA &dfa, const std::string &path, bool lineMode)
+            {
+                std::vector<int64_t> matches;
+                {
+                    py::gil_scoped_release release;
+                    matches = scanFile(dfa, path, lineMode);
+                }
+                return to_array(std::move(matches));
+            },
+            py::arg("path"), py::arg("lineMode") = false);
+
+    py::class_<PatternSet>(m, "PatternSet")
+        .def(py::init(
+                 [](std::vector<Automaton> patterns,
+                    std::optional<DeterminizeOptions> options)
+                 {
+                     py::gil_scoped_release release;
+                     return PatternSet::build(
+                         patterns, options.value_or(DeterminizeOptions()));
+                 }),
+             py::arg("patterns"), py::arg("options") = py::none())
+        .def_static(
+            "unite", [](std::vector<Automaton> patterns)
+            { return PatternSet::unite(patterns); }, py::arg("patterns"))
+        .def("getPatternCount", &PatternSet::getPatternCount)
+        .def("getStateCount", &PatternSet::getStateCount)
+        .def("getDFA", &PatternSet::getDFA, py::return_value_policy::copy)
+        // Negative states are the dead state that run() returns, with no ids.
+        .def("getAcceptIds",
+             [check_dfa_state](const PatternSet &patterns, int32_t state)
+             {
+                 if (state >= 0)
+                 {
+                     check_dfa_state(patterns.getStateCount(), state);
+                 }
+                 auto ids = patterns.getAcceptIds(state);
+                 return std::vector<int32_t>(ids.begin(), ids.end());
+             })
+        .def("run", &PatternSet::run)
+        .def("match",
+             [](const PatternSet &patterns, std::string_view input)
+             {
+                 auto ids = patterns.match(input);
+                 return std::vector<int32_t>(ids.begin(), ids.end());
+             })
+        .def("matchFirst", &PatternSet::matchFirst)
+        // A list with the matched ids of each input.
+        .def(
+            "matchMany",
+            [](const PatternSet &patterns, const py::sequence &inputs)
+            {
+                std::vector<py::object> keepAlive;
+                auto views = borrow_strings(inputs, keepAlive);
+                std::vector<int32_t> states(views.size());
+                {
+                    py::gil_scoped_release release;
+                    patterns.runMany(views.data(), views.size(), states.data());
+                }
+                py::list results(views.size());
+                for (size_t i = 0; i < states.size(); i++)
+                {
+                    auto ids = patterns.getAcceptIds(states[i]);
+                    results[i] = py::cast(
+                        std::vector<int32_t>(ids.begin(), ids.end()));
+                }
+                return results;
+            },
+            py::arg("inputs"));
+
+    py::class_<StreamMatcher>(m, "StreamMatcher")
+        .def(py::init<const CompiledDFA &, bool>(), py::arg("dfa"),
+             py::arg("lineMode") = false, py::keep_alive<1, 2>())
+        .def(
+            "feed",
+            [](StreamMatcher &matcher, const py::buffer &data)
+            {
+                py::buffer_info buffer = data.request();
+                std::string_view bytes = contiguous_bytes(buffer);
+                std::vector<int64_t> matches;
+                {
+                    py::gil_scoped_release release;
+                    matcher.feed(bytes.data(), bytes.size(), matches);
+                }
+                return to_array(std::move(matches));
+            },
+            py::arg("data"))
+        .def("finish",
+             [](StreamMatcher &matcher)
+             {
+                 std::vector<int64_t> matches;
+                 matcher.finish(matches);
+                 return to_array(std::move(matches));
+             })
+        .def("reset", &StreamMatcher::reset)
+        .def("isAccepting", &StreamMatcher::isAccepting)
+        .def_property_readonly("state", &StreamMatcher::getState)
+        .def_property_readonly("offset", &StreamMatcher::getOffset)
+        .def_property_readonly("lineMode", &StreamMatcher::isLineMode);
+
+    py::class_<LazyDFA>(m, "LazyDFA")
+        .def(py::init<Automaton, size_t>(), py::arg("automaton"),
+             py::arg("cacheBytes") = 1 << 20)
+        .def("isAccepted", &LazyDFA::isAccepted)
+        .def("clearCache", &LazyDFA::clearCache)
+        .def("getCacheBytes", &LazyDFA::getCacheBytes)
+        .def("getCacheUsage", &LazyDFA::getCacheUsage)
+        .def("getCachedStateCount", &LazyDFA::getCachedStateCount)
+        .def("getCacheClears", &LazyDFA::getCacheClears)
+        .def("getFallbackCount", &LazyDFA::getFallbackCount);
+
+    py::class_<DFAChanges>(m, "DFAChanges")
+        .def_readonly("added", &DFAChanges::added)
+        .def_readonly("removed", &DFAChanges::removed)
+        .def_readonly("changed", &DFAChanges::changed)
+        .def_readonly("initialChanged", &DFAChanges::initialChanged);
+
+    // Lookups on DFA states that are not reachable raise IndexError.
+    auto reachable_state = [](const IncrementalDFA &dfa, state_t state)
+    {
+        if (!dfa.isReachable(state))
+        {
+            throw py::index_error("DFA state " + std::to_string(state) +
+                                  " is not reachable");
+        }
+        return state;
+    };
+    py::class_<IncrementalDFA>(m, "IncrementalDFA")
+        .def(py::init<Automaton>(), py::arg("nfa"))
+        .def(
+            "addTransition",
+            [](IncrementalDFA &dfa, state_t source, state_t target, char first,
+               std::optional<char> last)
+            {
+                return dfa.addTransition(source, target, first,
+                                         last.value_or(first));
+            },
+            py::arg("source"), py::arg("target"), py::arg("first"),
+            py::arg("last") = py::none())
+        .def("addEpsilonTransition", &IncrementalDFA::addEpsilonTransition,
+             py::arg("source"), py::arg("target"))
+        .def("setFinalState", &IncrementalDFA::setFinalState, py::arg("state"),
+             py::arg("final") = true)
+        .def("setInitialState", &IncrementalDFA::setInitialState)
+        .def("getInitialState", &IncrementalDFA::getInitialState)
+        .def("getStateCount", &IncrementalDFA::getStateCount)
+        .def("getSubsetCount", &IncrementalDFA::getSubsetCount)
+        .def("isReachable", &IncrementalDFA::isReachable)
+        .def("getStates", &IncrementalDFA::getStates)
+        .def("getTransitions",
+             [=](const IncrementalDFA &dfa, state_t state)
+             { return dfa.getTransitions(reachable_state(dfa, state)); })
+        .def("isFinalState",
+             [=](const IncrementalDFA &dfa, state_t state)
+             { return dfa.isFinalState(reachable_state(dfa, state)); })
+        .def("getSubset",
+             [=](const IncrementalDFA &dfa, state_t state)
+             {
+                 auto subset = dfa.getSubset(reachable_state(dfa, state));
+                 return std::vector<state_t>(subset.begin(), subset.end());
+             })
+        .def("getNFA", &IncrementalDFA::getNFA)
+        .def("getDFA", &IncrementalDFA::getDFA);
 }
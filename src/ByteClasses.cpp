@@ -0,0 +1,54 @@
+#include "Automaton/ByteClasses.h"
+
+ByteClasses::ByteClasses() : count(1)
+{
+    classOf.fill(0);
+    starts.fill(256);
+    starts[0] = 0;
+}
+
+// Sets boundary[b] for every byte b at which a transition range starts or
+// after which one ends.
+static void mark_boundaries(TransitionView transitions,
+                            std::array<bool, 257> &boundary)
+{
+    for (state_t state = 0; state < transitions.size(); state++)
+    {
+        for (Transition transition : transitions[state])
+        {
+            if (transition.epsilon) continue;
+            boundary[transition.getFirst()] = true;
+            boundary[transition.getLast() + 1] = true;
+        }
+    }
+}
+
+ByteClasses::ByteClasses(TransitionView transitions)
+{
+    std::array<bool, 257> boundary = {};
+    mark_boundaries(transitions, boundary);
+    split(boundary);
+}
+
+ByteClasses::ByteClasses(TransitionView transitions, TransitionView others)
+{
+    std::array<bool, 257> boundary = {};
+    mark_boundaries(transitions, boundary);
+    mark_boundaries(others, boundary);
+    split(boundary);
+}
+
+// Starts a new class at every marked byte.
+void ByteClasses::split(const std::array<bool, 257> &boundary)
+{
+    count = 0;
+    starts.fill(256);
+    for (int byte = 0; byte < 256; byte++)
+    {
+        if (byte == 0 || boundary[byte])
+        {
+            starts[count++] = byte;
+        }
+        classOf[byte] = count - 1;
+    }
+}
@@ -0,0 +1,117 @@
+#include "Automaton/CompiledDFA.h"
+
+#include <algorithm>
+#include <stdexcept>
+#include <thread>
+
+static constexpr size_t min_batch_per_thread = 4096;
+
+// Splits [0, count) into contiguous chunks, one per worker thread.
+template <typename Function>
+static void parallel_for(size_t count, unsigned threads, Function function)
+{
+    if (threads == 0)
+    {
+        threads = std::max(1u, std::thread::hardware_concurrency());
+    }
+    size_t workers = std::min<size_t>(
+        threads, std::max<size_t>(1, count / min_batch_per_thread));
+    if (workers <= 1)
+    {
+        function(0, count);
+        return;
+    }
+    std::vector<std::thread> pool;
+    size_t chunk = (count + workers - 1) / workers;
+    for (size_t begin = chunk; begin < count; begin += chunk)
+    {
+        pool.emplace_back(function, begin, std::min(count, begin + chunk));
+    }
+    function(0, std::min(count, chunk));
+    for (std::thread &thread : pool)
+    {
+        thread.join();
+    }
+}
+
+CompiledDFA::CompiledDFA(TransitionView transitions,
+                         const std::vector<state_t> &finalStates,
+                         state_t initialState, state_t stateCount)
+    : classes(transitions),
+      stride(classes.getCount()),
+      table(static_cast<size_t>(stateCount) * stride, -1),
+      finalBits((stateCount + 63) / 64, 0),
+      initialState(initialState),
+      stateCount(stateCount)
+{
+    for (state_t from = 0; from < transitions.size(); from++)
+    {
+        for (Transition transition : transitions[from])
+        {
+            int32_t *row = table.data() + static_cast<size_t>(from) * stride;
+            int lastClass = classes.get(transition.getLast());
+            for (int symbolClass = classes.get(transition.getFirst());
+                 symbolClass <= lastClass; symbolClass++)
+            {
+                row[symbolClass] = transition.to;
+            }
+        }
+    }
+    for (state_t state : finalStates)
+    {
+        finalBits[state >> 6] |= uint64_t{1} << (state & 63);
+    }
+}
+
+bool CompiledDFA::isAccepted(std::string_view input) const
+{
+    int32_t state = initialState;
+    for (char symbol : input)
+    {
+        state = getNextState(state, static_cast<unsigned char>(symbol));
+        if (state < 0)
+        {
+            return false;
+        }
+    }
+    return isFinalState(state);
+}
+
+void CompiledDFA::matchMany(const std::string_view *inputs, size_t count,
+                            uint8_t *results, unsigned threads) const
+{
+    parallel_for(count, threads,
+                 [this, inputs, results](size_t begin, size_t end)
+                 {
+                     for (size_t i = begin; i < end; i++)
+                     {
+                         results[i] = isAccepted(inputs[i]);
+                     }
+                 });
+}
+
+void CompiledDFA::matchBuffer(const char *data, size_t size,
+                              const int64_t *offsets, size_t count,
+                              uint8_t *results, unsigned threads) const
+{
+    for (size_t i = 0; i < count; i++)
+    {
+        if (offsets[i] < 0 || offsets[i] > offsets[i + 1])
+        {
+            throw std::invalid_argument("offsets must be non-decreasing");
+        }
+    }
+    if (count > 0 && static_cast<size_t>(offsets[count]) > size)
+    {
+        throw std::invalid_argument("offsets exceed the buffer size");
+    }
+    parallel_for(count, threads,
+                 [this, data, offsets, results](size_t begin, size_t end)
+                 {
+                     for (size_t i = begin; i < end; i++)
+                     {
+                         results[i] = isAccepted(std::string_view(
+                             data + offsets[i], offsets[i + 1] - offsets[i]));
+                     }
+                 });
+}
@@ -0,0 +1,65 @@
+#include "Automaton/DFACache.h"
+
+#include <cstdio>
+#include <filesystem>
+#include <random>
+#include <stdexcept>
+
+DFACache::DFACache(std::string directory) : directory(std::move(directory))
+{
+    std::filesystem::create_directories(this->directory);
+}
+
+std::string DFACache::getPath(uint64_t hash, const std::string &name) const
+{
+    char file[40];
+    std::snprintf(file, sizeof(file), "%016llx.%s.nfa2dfa",
+                  static_cast<unsigned long long>(hash), name.c_str());
+    return (std::filesystem::path(directory) / file).string();
+}
+
+template <typename Operation>
+Automaton DFACache::lookup(Automaton &nfa, const char *name,
+                           Operation operation)
+{
+    uint64_t hash = nfa.structureHash();
+    std::string path = getPath(hash, name);
+    if (std::filesystem::exists(path))
+    {
+        try
+        {
+            uint64_t sourceHash = 0;
+            Automaton cached = Automaton::load(path, &sourceHash);
+            if (sourceHash == hash)
+            {
+                hits++;
+                return cached;
+            }
+        }
+        catch (const std::runtime_error &)
+        {
+            // Truncated or foreign files are recomputed and overwritten.
+        }
+    }
+
+    misses++;
+    Automaton result = operation(nfa);
+    // Write under a temporary name so concurrent readers never see a
+    // partial file.
+    std::string temporary = path + "." + std::to_string(std::random_device{}());
+    result.save(temporary, hash);
+    std::filesystem::rename(temporary, path);
+    return result;
+}
+
+Automaton DFACache::determinize(Automaton &nfa)
+{
+    return lookup(nfa, "dfa",
+                  [](Automaton &automaton) { return automaton.determinize(); });
+}
+
+Automaton DFACache::minimize(Automaton &nfa)
+{
+    return lookup(nfa, "min",
+                  [](Automaton &automaton) { return automaton.minimize(); });
+}
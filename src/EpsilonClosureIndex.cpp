@@ -0,0 +1,143 @@
+#include "Automaton/EpsilonClosureIndex.h"
+
+#include <algorithm>
+#include <utility>
+
+// Iterative Tarjan over the epsilon edges. Components are finished in
+// reverse topological order, so every successor of a component already has
+// its id when the component is emitted.
+EpsilonClosureIndex::EpsilonClosureIndex(TransitionView transitions,
+                                         state_t stateCount)
+    : componentOf(stateCount, -1), memberOffsets(1, 0), successorOffsets(1, 0)
+{
+    std::vector<state_t> order(stateCount, -1);
+    std::vector<state_t> lowLink(stateCount, 0);
+    std::vector<bool> onStack(stateCount, false);
+    std::vector<state_t> stack;
+    std::vector<std::pair<state_t, size_t>> callStack;
+    std::vector<state_t> componentSeen;
+    members.reserve(stateCount);
+    state_t counter = 0;
+
+    auto visit = [&](state_t state)
+    {
+        order[state] = lowLink[state] = counter++;
+        stack.push_back(state);
+        onStack[state] = true;
+        callStack.push_back({state, 0});
+    };
+
+    for (state_t root = 0; root < stateCount; root++)
+    {
+        if (order[root] != -1) continue;
+        visit(root);
+        while (!callStack.empty())
+        {
+            auto [state, edge] = callStack.back();
+            if (state < transitions.size() && edge < transitions[state].size())
+            {
+                callStack.back().second++;
+                Transition transition = transitions[state][edge];
+                if (!transition.epsilon) continue;
+                if (order[transition.to] == -1)
+                {
+                    visit(transition.to);
+                }
+                else if (onStack[transition.to])
+                {
+                    lowLink[state] =
+                        std::min(lowLink[state], order[transition.to]);
+                }
+                continue;
+            }
+
+            callStack.pop_back();
+            if (!callStack.empty())
+            {
+                state_t parent = callStack.back().first;
+                lowLink[parent] = std::min(lowLink[parent], lowLink[state]);
+            }
+            if (lowLink[state] != order[state]) continue;
+
+            state_t component = getComponentCount();
+            componentSeen.push_back(component);
+            size_t first = members.size();
+            state_t member;
+            do
+            {
+                member = stack.back();
+                stack.pop_back();
+                onStack[member] = false;
+                componentOf[member] = component;
+                members.push_back(member);
+            } while (member != state);
+            memberOffsets.push_back(members.size());
+
+            for (size_t i = first; i < members.size(); i++)
+            {
+                member = members[i];
+                if (transitions.size() <= member) continue;
+                for (Transition transition : transitions[member])
+                {
+                    if (!transition.epsilon) continue;
+                    state_t successor = componentOf[transition.to];
+                    if (componentSeen[successor] == component) continue;
+                    componentSeen[successor] = component;
+                    successors.push_back(successor);
+                }
+            }
+            successorOffsets.push_back(successors.size());
+        }
+    }
+}
+
+// Breadth-first over the condensation, using the appended states as the
+// queue: each component's members are appended together, and the queue
+// skips from one component's first member to the next component's.
+void EpsilonClosureIndex::appendClosure(state_t state,
+                                        std::vector<state_t> &closure,
+                                        std::vector<unsigned> &marks,
+                                        unsigned stamp) const
+{
+    if (marks[state] == stamp) return;
+    if (getStateCount() <= state)
+    {
+        marks[state] = stamp;
+        closure.push_back(state);
+        return;
+    }
+    size_t next = closure.size();
+    auto appendComponent = [&](state_t component)
+    {
+        size_t end = memberOffsets[component + 1];
+        for (size_t k = memberOffsets[component]; k < end; k++)
+        {
+            marks[members[k]] = stamp;
+            closure.push_back(members[k]);
+        }
+    };
+    appendComponent(componentOf[state]);
+    while (next < closure.size())
+    {
+        state_t component = componentOf[closure[next]];
+        next += memberOffsets[component + 1] - memberOffsets[component];
+        size_t end = successorOffsets[component + 1];
+        for (size_t k = successorOffsets[component]; k < end; k++)
+        {
+            state_t successor = successors[k];
+            if (marks[members[memberOffsets[successor]]] != stamp)
+            {
+                appendComponent(successor);
+            }
+        }
+    }
+}
+
+size_t EpsilonClosureIndex::getMemoryBytes() const
+{
+    return componentOf.capacity() * sizeof(state_t) +
+           memberOffsets.capacity() * sizeof(size_t) +
+           members.capacity() * sizeof(state_t) +
+           successorOffsets.capacity() * sizeof(size_t) +
+           successors.capacity() * sizeof(state_t);
+}
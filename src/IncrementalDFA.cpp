@@ -0,0 +1,348 @@
+#include "Automaton/IncrementalDFA.h"
+
+#include <algorithm>
+#include <stdexcept>
+
+static bool same_row(const std::vector<Transition> &a,
+                     const std::vector<Transition> &b)
+{
+    return std::equal(a.begin(), a.end(), b.begin(), b.end(),
+                      [](Transition x, Transition y)
+                      {
+                          return x.to == y.to && x.symbol == y.symbol &&
+                                 x.last == y.last;
+                      });
+}
+
+IncrementalDFA::IncrementalDFA(Automaton nfa)
+    : transitions(nfa.getTransitions()), initialState(nfa.getInitialState())
+{
+    state_t bound = std::max<state_t>(transitions.size(), initialState + 1);
+    for (const std::vector<Transition> &stateTransitions : transitions)
+    {
+        for (Transition transition : stateTransitions)
+        {
+            bound = std::max(bound, transition.to + 1);
+        }
+    }
+    const std::vector<state_t> &finalStates = nfa.getFinalStates();
+    for (state_t state : finalStates)
+    {
+        bound = std::max(bound, state + 1);
+    }
+    reserveStates(bound);
+    for (state_t state : finalStates)
+    {
+        finalMask[state] = true;
+    }
+    closureIndex = std::make_unique<EpsilonClosureIndex>(transitions, bound);
+    classes = ByteClasses(transitions);
+    targets.resize(256);
+
+    scratch = {initialState};
+    initial = addSubset(scratch);
+    update(initial);
+}
+
+void IncrementalDFA::reserveStates(state_t bound)
+{
+    if (finalMask.size() < bound)
+    {
+        finalMask.resize(bound, false);
+        containing.resize(bound);
+        marks.resize(bound, 0);
+    }
+}
+
+// Closes `subset` and returns its id, registering it if it is new.
+state_t IncrementalDFA::addSubset(const std::vector<state_t> &subset)
+{
+    stamp++;
+    std::vector<state_t> closed;
+    bool isFinal = false;
+    for (state_t state : subset)
+    {
+        closureIndex->appendClosure(state, closed, marks, stamp);
+    }
+    for (state_t member : closed)
+    {
+        isFinal = isFinal || finalMask[member];
+    }
+    std::sort(closed.begin(), closed.end());
+    state_t size = subsets.size();
+    state_t id = subsets.intern(closed);
+    if (id == size)
+    {
+        rows.emplace_back();
+        finals.push_back(isFinal);
+        expanded.push_back(false);
+        reachable.push_back(false);
+        for (state_t member : closed)
+        {
+            containing[member].push_back(id);
+        }
+    }
+    return id;
+}
+
+// Recomputes the row of subset `id` and returns whether it changed.
+// Neighbouring classes with the same successor share one edge, so a row
+// does not depend on how finely the bytes are split.
+bool IncrementalDFA::expand(state_t id)
+{
+    symbolClasses.clear();
+    for (state_t state : subsets.get(id))
+    {
+        if (transitions.size() <= state) continue;
+        for (Transition transition : transitions[state])
+        {
+            if (transition.epsilon) continue;
+            int lastClass = classes.get(transition.getLast());
+            for (int symbolClass = classes.get(transition.getFirst());
+                 symbolClass <= lastClass; symbolClass++)
+            {
+                if (targets[symbolClass].empty())
+                {
+                    symbolClasses.push_back(symbolClass);
+                }
+                targets[symbolClass].push_back(transition.to);
+            }
+        }
+    }
+
+    std::sort(symbolClasses.begin(), symbolClasses.end());
+    std::vector<Transition> row;
+    for (uint8_t symbolClass : symbolClasses)
+    {
+        state_t next = addSubset(targets[symbolClass]);
+        targets[symbolClass].clear();
+        auto first = static_cast<char>(classes.getFirst(symbolClass));
+        auto last = static_cast<char>(classes.getLast(symbolClass));
+        if (!row.empty() && row.back().to == next &&
+            row.back().getLast() + 1 == classes.getFirst(symbolClass))
+        {
+            row.back().last = last;
+            continue;
+        }
+        row.push_back({next, first, last, false});
+    }
+    expanded[id] = true;
+    if (same_row(row, rows[id]))
+    {
+        return false;
+    }
+    rows[id] = std::move(row);
+    return true;
+}
+
+// Walks the DFA from its initial state, expanding the subsets whose rows
+// are stale or missing, and compares what is reachable with the previous
+// walk.
+DFAChanges IncrementalDFA::update(state_t previousInitial)
+{
+    DFAChanges changes;
+    changes.initialChanged = initial != previousInitial;
+    std::vector<bool> seen(subsets.size(), false);
+    std::vector<state_t> queue = {initial};
+    seen[initial] = true;
+    for (size_t i = 0; i < queue.size(); i++)
+    {
+        state_t id = queue[i];
+        if (!expanded[id] && expand(id) && reachable[id])
+        {
+            changes.changed.push_back(id);
+        }
+        seen.resize(subsets.size(), false);
+        for (Transition transition : rows[id])
+        {
+            if (!seen[transition.to])
+            {
+                seen[transition.to] = true;
+                queue.push_back(transition.to);
+            }
+        }
+    }
+
+    for (state_t id = 0; id < subsets.size(); id++)
+    {
+        if (seen[id] && !reachable[id])
+        {
+            changes.added.push_back(id);
+        }
+        else if (!seen[id] && reachable[id])
+        {
+            changes.removed.push_back(id);
+        }
+    }
+    std::erase_if(changes.changed, [&](state_t id) { return !seen[id]; });
+    std::sort(changes.changed.begin(), changes.changed.end());
+    reachable = std::move(seen);
+    reachableCount = queue.size();
+    return changes;
+}
+
+DFAChanges IncrementalDFA::addTransition(state_t from, state_t to, char first,
+                                         char last)
+{
+    if (from < 0 || to < 0)
+    {
+        throw std::invalid_argument("negative state id");
+    }
+    Transition transition{to, first, last, false};
+    if (transition.getFirst() > transition.getLast())
+    {
+        throw std::invalid_argument("empty symbol range");
+    }
+    reserveStates(std::max(from, to) + 1);
+    if (transitions.size() <= from)
+    {
+        transitions.resize(from + 1);
+    }
+    transitions[from].push_back(transition);
+
+    // The classes only need rebuilding when the range splits one of them.
+    if (classes.getFirst(classes.get(transition.getFirst())) !=
+            transition.getFirst() ||
+        (transition.getLast() < 255 &&
+         classes.getFirst(classes.get(transition.getLast() + 1)) !=
+             transition.getLast() + 1))
+    {
+        classes = ByteClasses(transitions);
+    }
+    for (state_t id : containing[from])
+    {
+        expanded[id] = false;
+    }
+    return update(initial);
+}
+
+DFAChanges IncrementalDFA::addEpsilonTransition(state_t from, state_t to)
+{
+    if (from < 0 || to < 0)
+    {
+        throw std::invalid_argument("negative state id");
+    }
+    reserveStates(std::max(from, to) + 1);
+    if (transitions.size() <= from)
+    {
+        transitions.resize(from + 1);
+    }
+    transitions[from].push_back({to, '\0', '\0', true});
+
+    // Closures only grow if `to` was not already reachable from `from`.
+    scratch.clear();
+    closureIndex->appendClosure(from, scratch, marks, ++stamp);
+    if (marks[to] == stamp)
+    {
+        return {};
+    }
+    closureIndex =
+        std::make_unique<EpsilonClosureIndex>(transitions, finalMask.size());
+    expanded.assign(expanded.size(), false);
+    state_t previousInitial = initial;
+    scratch = {initialState};
+    initial = addSubset(scratch);
+    return update(previousInitial);
+}
+
+DFAChanges IncrementalDFA::setFinalState(state_t state, bool final)
+{
+    if (state < 0)
+    {
+        throw std::invalid_argument("negative state id");
+    }
+    reserveStates(state + 1);
+    DFAChanges changes;
+    if (finalMask[state] == final)
+    {
+        return changes;
+    }
+    finalMask[state] = final;
+    for (state_t id : containing[state])
+    {
+        bool isFinal = false;
+        for (state_t member : subsets.get(id))
+        {
+            isFinal = isFinal || finalMask[member];
+        }
+        if (finals[id] != isFinal)
+        {
+            finals[id] = isFinal;
+            if (reachable[id])
+            {
+                changes.changed.push_back(id);
+            }
+        }
+    }
+    std::sort(changes.changed.begin(), changes.changed.end());
+    return changes;
+}
+
+DFAChanges IncrementalDFA::setInitialState(state_t state)
+{
+    if (state < 0)
+    {
+        throw std::invalid_argument("negative state id");
+    }
+    reserveStates(state + 1);
+    initialState = state;
+    state_t previousInitial = initial;
+    scratch = {initialState};
+    initial = addSubset(scratch);
+    return update(previousInitial);
+}
+
+std::vector<state_t> IncrementalDFA::getStates() const
+{
+    std::vector<state_t> states;
+    states.reserve(reachableCount);
+    for (state_t id = 0; id < reachable.size(); id++)
+    {
+        if (reachable[id])
+        {
+            states.push_back(id);
+        }
+    }
+    return states;
+}
+
+Automaton IncrementalDFA::getNFA() const
+{
+    std::vector<state_t> finalStates;
+    for (state_t state = 0; state < finalMask.size(); state++)
+    {
+        if (finalMask[state])
+        {
+            finalStates.push_back(state);
+        }
+    }
+    return Automaton(transitions, std::move(finalStates), initialState);
+}
+
+Automaton IncrementalDFA::getDFA() const
+{
+    std::vector<state_t> number(subsets.size(), -1);
+    std::vector<state_t> order = {initial};
+    number[initial] = 0;
+    std::vector<std::vector<Transition>> dfaTransitions;
+    std::vector<state_t> dfaFinals;
+    for (size_t i = 0; i < order.size(); i++)
+    {
+        state_t id = order[i];
+        std::vector<Transition> &row = dfaTransitions.emplace_back(rows[id]);
+        for (Transition &transition : row)
+        {
+            if (number[transition.to] < 0)
+            {
+                number[transition.to] = order.size();
+                order.push_back(transition.to);
+            }
+            transition.to = number[transition.to];
+        }
+        if (finals[id])
+        {
+            dfaFinals.push_back(i);
+        }
+    }
+    return Automaton(std::move(dfaTransitions), std::move(dfaFinals), 0);
+}
@@ -0,0 +1,241 @@
+#include "Automaton/LazyDFA.h"
+
+#include <algorithm>
+#include <bit>
+
+static constexpr int32_t unknown_state = -2;
+static constexpr int32_t dead_state = -1;
+// Bytes charged per cached state on top of its transition row and subset:
+// the hash node and the bookkeeping vectors.
+static constexpr size_t state_overhead = 96;
+// A clear counts as thrashing when fewer than this many bytes per cached
+// state were scanned since the previous one; this many in a row give up.
+static constexpr size_t min_bytes_per_state = 10;
+static constexpr int max_thrash_count = 3;
+// After giving up, this much input is simulated before the cache is tried
+// again.
+static constexpr size_t fallback_window = 1 << 20;
+
+size_t LazyDFA::SubsetHash::operator()(const std::vector<state_t> &subset) const
+{
+    uint64_t hash = 14695981039346656037ull;
+    for (state_t state : subset)
+    {
+        hash = (hash ^ static_cast<uint32_t>(state)) * 1099511628211ull;
+    }
+    return static_cast<size_t>(hash ^ (hash >> 32));
+}
+
+LazyDFA::LazyDFA(Automaton automaton, size_t cacheBytes)
+    : nfa(std::move(automaton)), cacheBytes(cacheBytes)
+{
+    closureIndex = nfa.getClosureIndex();
+
+    // One transition column per byte class. A class covering bytes on no
+    // edge simply resolves to the dead state the first time it is used.
+    TransitionView transitions = nfa.getTransitionView();
+    classes = ByteClasses(transitions);
+    // getClosureIndex() covers every state the NFA mentions.
+    state_t stateCount = closureIndex->getStateCount();
+    edgeOffsets.assign(stateCount + 1, 0);
+    for (state_t state = 0; state < stateCount; state++)
+    {
+        if (state < transitions.size())
+        {
+            for (Transition transition : transitions[state])
+            {
+                if (transition.epsilon) continue;
+                edges.push_back(transition);
+            }
+        }
+        edgeOffsets[state + 1] = edges.size();
+    }
+
+    nfaFinalBits.assign((stateCount + 63) / 64, 0);
+    for (state_t state : nfa.getFinalStates())
+    {
+        nfaFinalBits[state >> 6] |= uint64_t{1} << (state & 63);
+    }
+    marks.assign(stateCount, 0);
+    startSubset = nfa.getEpsilonClosure(nfa.getInitialState());
+}
+
+void LazyDFA::clearCache()
+{
+    ids.clear();
+    subsets.clear();
+    next.clear();
+    finals.clear();
+    startState = unknown_state;
+    cacheUsage = 0;
+}
+
+// Returns the id of `subset`, caching it first if needed. Returns
+// unknown_state when the caller should fall back to NFA simulation.
+int32_t LazyDFA::addState(const std::vector<state_t> &subset, size_t progress)
+{
+    auto found = ids.find(subset);
+    if (found != ids.end())
+    {
+        return found->second;
+    }
+    size_t bytes = classes.getCount() * sizeof(int32_t) + state_overhead +
+                   2 * subset.size() * sizeof(state_t);
+    if (cacheUsage + bytes > cacheBytes)
+    {
+        if (progress - bytesAtClear < min_bytes_per_state * subsets.size())
+        {
+            thrashCount++;
+        }
+        else
+        {
+            thrashCount = 0;
+        }
+        bytesAtClear = progress;
+        cacheClears++;
+        clearCache();
+        if (thrashCount >= max_thrash_count || bytes > cacheBytes)
+        {
+            thrashCount = 0;
+            simulateUntil = progress + fallback_window;
+            return unknown_state;
+        }
+    }
+
+    int32_t id = subsets.size();
+    auto inserted = ids.emplace(subset, id).first;
+    subsets.push_back(&inserted->first);
+    next.resize(next.size() + classes.getCount(), unknown_state);
+    bool final = false;
+    for (state_t state : subset)
+    {
+        final = final || (nfaFinalBits[state >> 6] >> (state & 63)) & 1;
+    }
+    finals.push_back(final);
+    cacheUsage += bytes;
+    return id;
+}
+
+bool LazyDFA::isAccepted(std::string_view input)
+{
+    if (bytesScanned < simulateUntil)
+    {
+        bytesScanned += input.size();
+        return simulate(startSubset, input);
+    }
+    if (startState == unknown_state)
+    {
+        startState = addState(startSubset, bytesScanned);
+        if (startState == unknown_state)
+        {
+            bytesScanned += input.size();
+            fallbackCount++;
+            return simulate(startSubset, input);
+        }
+    }
+
+    size_t stride = classes.getCount();
+    int32_t state = startState;
+    for (size_t i = 0; i < input.size(); i++)
+    {
+        uint8_t symbolClass = classes.get(static_cast<unsigned char>(input[i]));
+        int32_t target = next[state * stride + symbolClass];
+        if (target == unknown_state)
+        {
+            std::vector<state_t> step;
+            for (state_t member : *subsets[state])
+            {
+                for (size_t k = edgeOffsets[member];
+                     k < edgeOffsets[member + 1]; k++)
+                {
+                    if (edges[k].matches(input[i]))
+                    {
+                        step.push_back(edges[k].to);
+                    }
+                }
+            }
+            std::vector<state_t> subset = nfa.getEpsilonClosure(step);
+            if (subset.empty())
+            {
+                target = dead_state;
+            }
+            else
+            {
+                size_t clears = cacheClears;
+                target = addState(subset, bytesScanned + i);
+                if (target == unknown_state)
+                {
+                    bytesScanned += input.size();
+                    fallbackCount++;
+                    return simulate(subset, input.substr(i + 1));
+                }
+                if (clears != cacheClears)
+                {
+                    state = target;
+                    continue;
+                }
+            }
+            next[state * stride + symbolClass] = target;
+        }
+        if (target == dead_state)
+        {
+            bytesScanned += input.size();
+            return false;
+        }
+        state = target;
+    }
+    bytesScanned += input.size();
+    return finals[state];
+}
+
+// Steps a bitset of active NFA states over `input`, starting from the
+// epsilon-closed `subset`.
+bool LazyDFA::simulate(const std::vector<state_t> &subset,
+                       std::string_view input)
+{
+    current.assign(nfaFinalBits.size(), 0);
+    following.assign(nfaFinalBits.size(), 0);
+    for (state_t state : subset)
+    {
+        current[state >> 6] |= uint64_t{1} << (state & 63);
+    }
+    for (char symbol : input)
+    {
+        bool any = false;
+        stamp++;
+        reached.clear();
+        for (size_t word = 0; word < current.size(); word++)
+        {
+            for (uint64_t bits = current[word]; bits != 0; bits &= bits - 1)
+            {
+                state_t state = word * 64 + std::countr_zero(bits);
+                for (size_t k = edgeOffsets[state]; k < edgeOffsets[state + 1];
+                     k++)
+                {
+                    if (!edges[k].matches(symbol)) continue;
+                    closureIndex->appendClosure(edges[k].to, reached, marks,
+                                                stamp);
+                    any = true;
+                }
+            }
+            current[word] = 0;
+        }
+        for (state_t member : reached)
+        {
+            following[member >> 6] |= uint64_t{1} << (member & 63);
+        }
+        if (!any)
+        {
+            return false;
+        }
+        current.swap(following);
+    }
+    for (size_t word = 0; word < current.size(); word++)
+    {
+        if (current[word] & nfaFinalBits[word])
+        {
+            return true;
+        }
+    }
+    return false;
+}
@@ -0,0 +1,100 @@
+#include "Automaton/MappedFile.h"
+
+#include <stdexcept>
+
+#ifdef _WIN32
+#define WIN32_LEAN_AND_MEAN
+#include <windows.h>
+#else
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include <cerrno>
+#include <cstring>
+#endif
+
+#ifdef _WIN32
+
+MappedFile::MappedFile(const std::string &path)
+{
+    file = CreateFileA(path.c_str(), GENERIC_READ, FILE_SHARE_READ, nullptr,
+                       OPEN_EXISTING, FILE_FLAG_SEQUENTIAL_SCAN, nullptr);
+    if (file == INVALID_HANDLE_VALUE)
+    {
+        file = nullptr;
+        throw std::runtime_error("cannot open " + path);
+    }
+    LARGE_INTEGER fileSize;
+    if (!GetFileSizeEx(file, &fileSize))
+    {
+        CloseHandle(file);
+        throw std::runtime_error("cannot stat " + path);
+    }
+    size = static_cast<size_t>(fileSize.QuadPart);
+    if (size == 0)
+    {
+        return;
+    }
+    mapping = CreateFileMappingA(file, nullptr, PAGE_READONLY, 0, 0, nullptr);
+    if (mapping != nullptr)
+    {
+        data = static_cast<const char *>(
+            MapViewOfFile(mapping, FILE_MAP_READ, 0, 0, 0));
+    }
+    if (data == nullptr)
+    {
+        if (mapping != nullptr) CloseHandle(mapping);
+        CloseHandle(file);
+        throw std::runtime_error("cannot map " + path);
+    }
+}
+
+MappedFile::~MappedFile()
+{
+    if (data != nullptr) UnmapViewOfFile(data);
+    if (mapping != nullptr) CloseHandle(mapping);
+    if (file != nullptr) CloseHandle(file);
+}
+
+#else
+
+MappedFile::MappedFile(const std::string &path)
+{
+    descriptor = open(path.c_str(), O_RDONLY);
+    if (descriptor < 0)
+    {
+        throw std::runtime_error("cannot open " + path + ": " +
+                                 std::strerror(errno));
+    }
+    struct stat status;
+    if (fstat(descriptor, &status) != 0)
+    {
+        close(descriptor);
+        throw std::runtime_error("cannot stat " + path + ": " +
+                                 std::strerror(errno));
+    }
+    size = static_cast<size_t>(status.st_size);
+    if (size == 0)
+    {
+        return;
+    }
+    void *address = mmap(nullptr, size, PROT_READ, MAP_PRIVATE, descriptor, 0);
+    if (address == MAP_FAILED)
+    {
+        close(descriptor);
+        throw std::runtime_error("cannot map " + path + ": " +
+                                 std::strerror(errno));
+    }
+    madvise(address, size, MADV_SEQUENTIAL);
+    data = static_cast<const char *>(address);
+}
+
+MappedFile::~MappedFile()
+{
+    if (data != nullptr) munmap(const_cast<char *>(data), size);
+    if (descriptor >= 0) close(descriptor);
+}
+
+#endif
@@ -0,0 +1,137 @@
+#include "Automaton/PatternSet.h"
+
+#include <algorithm>
+#include <map>
+
+PatternSet::PatternSet(CompiledDFA dfa, std::vector<int32_t> acceptOffsets,
+                       std::vector<int32_t> acceptIds, int32_t patternCount)
+    : dfa(std::move(dfa)),
+      acceptOffsets(std::move(acceptOffsets)),
+      acceptIds(std::move(acceptIds)),
+      patternCount(patternCount)
+{
+}
+
+Automaton PatternSet::unite(std::vector<Automaton> &patterns,
+                            std::vector<int32_t> *patternOf)
+{
+    std::vector<std::vector<Transition>> transitions(1);
+    std::vector<state_t> finalStates;
+    if (patternOf != nullptr)
+    {
+        patternOf->assign(1, -1);
+    }
+    for (int32_t id = 0; id < patterns.size(); id++)
+    {
+        Automaton &pattern = patterns[id];
+        TransitionArrays arrays = pattern.exportTransitions();
+        state_t base = transitions.size();
+        transitions[0].push_back(
+            {base + pattern.getInitialState(), '\0', '\0', true});
+        for (state_t state = 0; state + 1 < arrays.offsets.size(); state++)
+        {
+            std::vector<Transition> &row = transitions.emplace_back();
+            for (int64_t k = arrays.offsets[state];
+                 k < arrays.offsets[state + 1]; k++)
+            {
+                row.push_back({base + arrays.targets[k],
+                               static_cast<char>(arrays.symbols[k]),
+                               static_cast<char>(arrays.lasts[k]),
+                               arrays.epsilon[k] != 0});
+            }
+        }
+        for (state_t state : pattern.getFinalStates())
+        {
+            finalStates.push_back(base + state);
+        }
+        if (patternOf != nullptr)
+        {
+            patternOf->resize(transitions.size(), id);
+        }
+    }
+    return Automaton(std::move(transitions), std::move(finalStates), 0);
+}
+
+PatternSet PatternSet::build(std::vector<Automaton> &patterns,
+                             const DeterminizeOptions &options,
+                             DeterminizeStats *stats)
+{
+    std::vector<int32_t> patternOf;
+    Automaton nfa = unite(patterns, &patternOf);
+    std::vector<bool> finalMask(patternOf.size(), false);
+    for (state_t state : nfa.getFinalStates())
+    {
+        finalMask[state] = true;
+    }
+    std::vector<std::vector<state_t>> subsets;
+    Automaton dfa = nfa.determinize(options, stats, &subsets);
+
+    // Each distinct set of accepted ids becomes one accept class, so that
+    // minimization only merges states accepting the same patterns.
+    std::map<std::vector<int32_t>, state_t> classOf = {{{}, 0}};
+    std::vector<state_t> acceptClasses(subsets.size());
+    std::vector<int32_t> ids;
+    for (state_t state = 0; state < subsets.size(); state++)
+    {
+        ids.clear();
+        for (state_t member : subsets[state])
+        {
+            if (finalMask[member])
+            {
+                ids.push_back(patternOf[member]);
+            }
+        }
+        std::sort(ids.begin(), ids.end());
+        ids.erase(std::unique(ids.begin(), ids.end()), ids.end());
+        acceptClasses[state] = classOf.emplace(ids, classOf.size()).first->second;
+    }
+    subsets.clear();
+    std::vector<const std::vector<int32_t> *> classIds(classOf.size());
+    for (const auto &[members, acceptClass] : classOf)
+    {
+        classIds[acceptClass] = &members;
+    }
+
+    std::vector<state_t> representatives;
+    Automaton minimal = dfa.minimize(acceptClasses, &representatives);
+    std::vector<int32_t> acceptOffsets = {0};
+    std::vector<int32_t> acceptIds;
+    for (state_t representative : representatives)
+    {
+        const std::vector<int32_t> &members =
+            *classIds[acceptClasses[representative]];
+        acceptIds.insert(acceptIds.end(), members.begin(), members.end());
+        acceptOffsets.push_back(acceptIds.size());
+    }
+    return PatternSet(minimal.compile(), std::move(acceptOffsets),
+                      std::move(acceptIds), patterns.size());
+}
+
+int32_t PatternSet::run(std::string_view input) const
+{
+    int32_t state = dfa.getInitialState();
+    for (char symbol : input)
+    {
+        state = dfa.getNextState(state, static_cast<unsigned char>(symbol));
+        if (state < 0)
+        {
+            return -1;
+        }
+    }
+    return state;
+}
+
+int32_t PatternSet::matchFirst(std::string_view input) const
+{
+    std::span<const int32_t> ids = match(input);
+    return ids.empty() ? -1 : ids.front();
+}
+
+void PatternSet::runMany(const std::string_view *inputs, size_t count,
+                         int32_t *states) const
+{
+    for (size_t i = 0; i < count; i++)
+    {
+        states[i] = run(inputs[i]);
+    }
+}
@@ -0,0 +1,101 @@
+#include "Automaton/StreamMatcher.h"
+
+#include <cstring>
+
+#include "Automaton/MappedFile.h"
+
+StreamMatcher::StreamMatcher(const CompiledDFA &dfa, bool lineMode)
+    : dfa(&dfa), lineMode(lineMode), state(dfa.getInitialState())
+{
+}
+
+// Reports the empty match at offset 0 once per stream.
+void StreamMatcher::reportStart(std::vector<int64_t> &matches)
+{
+    if (!startReported)
+    {
+        startReported = true;
+        if (dfa->isFinalState(dfa->getInitialState()))
+        {
+            matches.push_back(0);
+        }
+    }
+}
+
+void StreamMatcher::feed(const char *data, size_t size,
+                         std::vector<int64_t> &matches)
+{
+    if (!lineMode)
+    {
+        reportStart(matches);
+        for (size_t i = 0; i < size && state >= 0; i++)
+        {
+            state = dfa->getNextState(state, static_cast<unsigned char>(data[i]));
+            if (dfa->isFinalState(state))
+            {
+                matches.push_back(offset + i + 1);
+            }
+        }
+        offset += size;
+        return;
+    }
+
+    const char *begin = data;
+    const char *end = data + size;
+    while (data < end)
+    {
+        auto *newline = static_cast<const char *>(
+            std::memchr(data, '\n', end - data));
+        const char *lineEnd = newline != nullptr ? newline : end;
+        for (; data < lineEnd && state >= 0; data++)
+        {
+            state = dfa->getNextState(state, static_cast<unsigned char>(*data));
+        }
+        if (newline == nullptr)
+        {
+            break;
+        }
+        if (dfa->isFinalState(state))
+        {
+            matches.push_back(line);
+        }
+        line++;
+        state = dfa->getInitialState();
+        data = newline + 1;
+        lineStart = offset + (data - begin);
+    }
+    offset += size;
+}
+
+void StreamMatcher::finish(std::vector<int64_t> &matches)
+{
+    if (!lineMode)
+    {
+        reportStart(matches);
+        return;
+    }
+    if (offset > lineStart && dfa->isFinalState(state))
+    {
+        matches.push_back(line);
+    }
+}
+
+void StreamMatcher::reset()
+{
+    state = dfa->getInitialState();
+    offset = 0;
+    line = 1;
+    lineStart = 0;
+    startReported = false;
+}
+
+std::vector<int64_t> scanFile(const CompiledDFA &dfa, const std::string &path,
+                              bool lineMode)
+{
+    MappedFile file(path);
+    StreamMatcher matcher(dfa, lineMode);
+    std::vector<int64_t> matches;
+    matcher.feed(file.getData(), file.getSize(), matches);
+    matcher.finish(matches);
+    return matches;
+}
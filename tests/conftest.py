@@ -0,0 +1,7 @@
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The bindings are installed into python_package/ by the Release build.
+sys.path.append(os.path.join(root, "python_package"))
+sys.path.insert(0, os.path.join(root, "scripts"))
@@ -0,0 +1,105 @@
+#include <climits>
+#include <cstdint>
+#include <cstdio>
+#include <filesystem>
+#include <fstream>
+
+#include "Automaton/Automaton.h"
+#include "Automaton/DFACache.h"
+
+static int failures = 0;
+
+static void check(bool condition, const char *what)
+{
+    if (!condition)
+    {
+        std::fprintf(stderr, "FAILED: %s\n", what);
+        failures++;
+    }
+}
+
+static size_t align8(size_t size) { return (size + 7) & ~size_t{7}; }
+
+static void writeInt32(const std::string &path, size_t offset, int32_t value)
+{
+    std::fstream file(path, std::ios::binary | std::ios::in | std::ios::out);
+    file.seekp(offset);
+    file.write(reinterpret_cast<const char *>(&value), sizeof(value));
+}
+
+static int64_t readInt64(const std::string &path, size_t offset)
+{
+    int64_t value = 0;
+    std::ifstream file(path, std::ios::binary);
+    file.seekg(offset);
+    file.read(reinterpret_cast<char *>(&value), sizeof(value));
+    return value;
+}
+
+// (a|b)*b
+static Automaton makeNFA()
+{
+    Automaton nfa;
+    nfa.addTransition(0, 0, 'a');
+    nfa.addTransition(0, 0, 'b');
+    nfa.addTransition(0, 1, 'b');
+    nfa.addFinalState(1);
+    return nfa;
+}
+
+// Header fields sit at fixed offsets: initialState at 16, stateCount at
+// 24 and edgeCount at 32, with the sections starting at 56.
+static void testCorruptEntriesAreRecomputed()
+{
+    std::string directory =
+        (std::filesystem::temp_directory_path() / "nfa2dfa_cache_test")
+            .string();
+    std::filesystem::remove_all(directory);
+    DFACache cache(directory);
+    Automaton nfa = makeNFA();
+    cache.determinize(nfa);
+    std::string path = cache.getPath(nfa.structureHash(), "dfa");
+
+    int64_t stateCount = readInt64(path, 24);
+    int64_t edgeCount = readInt64(path, 32);
+    // Edges are 8-byte records: target, first byte, last byte, flags.
+    size_t edges = 56 + align8((stateCount + 1) * sizeof(int64_t));
+    size_t finals = edges + 8 * edgeCount;
+    struct
+    {
+        const char *what;
+        size_t offset;
+        int32_t value;
+    } corruptions[] = {
+        {"negative initial state", 16, -7},
+        {"huge initial state", 16, INT_MAX},
+        {"huge target", edges, INT_MAX},
+        {"bad edge flags", edges + 4, 0x00076161},
+        {"unsorted edges", edges + 8 + 4, 0x00000000},
+        {"negative final state", finals, -7},
+        {"huge final state", finals, INT_MAX},
+    };
+    size_t misses = cache.getMisses();
+    for (auto corruption : corruptions)
+    {
+        writeInt32(path, corruption.offset, corruption.value);
+        try
+        {
+            Automaton dfa = cache.determinize(nfa);
+            check(dfa.isAccepted("abab") && !dfa.isAccepted("aba"),
+                  corruption.what);
+        }
+        catch (const std::exception &)
+        {
+            check(false, corruption.what);
+        }
+        check(cache.getMisses() == ++misses, corruption.what);
+    }
+    std::filesystem::remove_all(directory);
+}
+
+int main()
+{
+    testCorruptEntriesAreRecomputed();
+    return failures == 0 ? 0 : 1;
+}
@@ -0,0 +1,70 @@
+#include <cstdio>
+
+#include "Automaton/Automaton.h"
+#include "Automaton/EpsilonClosureIndex.h"
+
+static int failures = 0;
+
+static void check(bool condition, const char *what)
+{
+    if (!condition)
+    {
+        std::fprintf(stderr, "FAILED: %s\n", what);
+        failures++;
+    }
+}
+
+// Closures on an epsilon chain add up to n^2 / 2 states, so an index that
+// stored them would need gigabytes here.
+static void testLongEpsilonChain()
+{
+    const state_t n = 100000;
+    Automaton nfa;
+    for (state_t state = 0; state + 1 < n; state++)
+    {
+        nfa.addEpsilonTransition(state, state + 1);
+    }
+    nfa.addTransition(n - 1, n, 'a');
+    nfa.addFinalState(n);
+
+    auto index = nfa.getClosureIndex();
+    check(index->getComponentCount() == n + 1, "one component per state");
+    check(index->getMemoryBytes() < 64 * size_t{n}, "index is linear in n");
+    check(nfa.getEpsilonClosure(0).size() == n, "closure of the head");
+    check(nfa.getEpsilonClosure(n / 2).size() == n - n / 2,
+          "closure of the middle");
+    check(nfa.getEpsilonClosure(n - 1).size() == 1, "closure of the tail");
+
+    Automaton dfa = nfa.determinize();
+    check(dfa.isAccepted("a"), "DFA accepts a");
+    check(!dfa.isAccepted("") && !dfa.isAccepted("aa"), "DFA rejects others");
+}
+
+// Epsilon cycles share one component, whichever member the walk starts at.
+static void testEpsilonCycles()
+{
+    Automaton nfa;
+    nfa.addEpsilonTransition(0, 1);
+    nfa.addEpsilonTransition(1, 2);
+    nfa.addEpsilonTransition(2, 0);
+    nfa.addEpsilonTransition(2, 3);
+    nfa.addEpsilonTransition(4, 1);
+    nfa.addTransition(3, 5, 'a');
+
+    auto index = nfa.getClosureIndex();
+    check(index->getComponent(0) == index->getComponent(2), "cycle merged");
+    check(nfa.getEpsilonClosure(1) == std::vector<state_t>({0, 1, 2, 3}),
+          "closure of a cycle member");
+    check(nfa.getEpsilonClosure(4) == std::vector<state_t>({0, 1, 2, 3, 4}),
+          "closure into a cycle");
+    check(nfa.getEpsilonClosure(std::vector<state_t>{3, 1, 5}) ==
+              std::vector<state_t>({0, 1, 2, 3, 5}),
+          "union of closures");
+}
+
+int main()
+{
+    testLongEpsilonChain();
+    testEpsilonCycles();
+    return failures == 0 ? 0 : 1;
+}
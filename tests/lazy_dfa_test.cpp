@@ -0,0 +1,43 @@
+#include <cstdio>
+#include <string>
+
+#include "Automaton/Automaton.h"
+#include "Automaton/LazyDFA.h"
+
+static int failures = 0;
+
+static void check(bool condition, const char *what)
+{
+    if (!condition)
+    {
+        std::fprintf(stderr, "FAILED: %s\n", what);
+        failures++;
+    }
+}
+
+// Edges and final states added after precomputeClosures() reach states the
+// closure index was not built for.
+static void testStatesAddedAfterClosureIndex()
+{
+    Automaton nfa;
+    nfa.addEpsilonTransition(0, 1);
+    nfa.precomputeClosures();
+    for (state_t state = 1; state < 300; state++)
+    {
+        nfa.addTransition(state, state + 1, 'x');
+    }
+    nfa.addFinalState(300);
+
+    std::string input(299, 'x');
+    check(nfa.determinize().isAccepted(input), "determinize accepts x^299");
+    check(LazyDFA(nfa).isAccepted(input), "LazyDFA accepts x^299");
+    check(!LazyDFA(nfa).isAccepted(input + "x"), "LazyDFA rejects x^300");
+    // A cache too small for one state makes every match simulate the NFA.
+    check(LazyDFA(nfa, 1).isAccepted(input), "simulated match accepts x^299");
+}
+
+int main()
+{
+    testStatesAddedAfterClosureIndex();
+    return failures == 0 ? 0 : 1;
+}
@@ -0,0 +1,33 @@
+import pytest
+
+Automaton = pytest.importorskip("Automaton_bindings")
+
+
+def ab_dfa():
+    nfa = Automaton.Automaton()
+    nfa.addTransition(0, 1, "a")
+    nfa.addTransition(1, 2, "b")
+    nfa.addFinalState(2)
+    return nfa.determinize().compile()
+
+
+def test_next_state_in_range():
+    dfa = ab_dfa()
+    state = dfa.getNextState(dfa.getInitialState(), ord("a"))
+    assert 0 <= state < dfa.getStateCount()
+    assert dfa.isFinalState(dfa.getNextState(state, ord("b")))
+
+
+@pytest.mark.parametrize("state", [-1, 3, 1 << 30])
+def test_next_state_out_of_range_raises(state):
+    dfa = ab_dfa()
+    assert dfa.getStateCount() == 3
+    with pytest.raises(IndexError):
+        dfa.getNextState(state, ord("a"))
+
+
+def test_final_state_out_of_range():
+    dfa = ab_dfa()
+    assert not dfa.isFinalState(-1)
+    with pytest.raises(IndexError):
+        dfa.isFinalState(dfa.getStateCount())
@@ -0,0 +1,22 @@
+import nfa_json
+import pytest
+
+Automaton = pytest.importorskip("Automaton_bindings")
+
+
+def test_round_trip_keeps_target_only_final_state():
+    document = {"states": {"q0": nfa_json.grid_position(0), "q1": nfa_json.grid_position(1)},
+                "transitions": [{"from": "q0", "to": "q1", "char": "a"}],
+                "start_state": "q0",
+                "final_states": ["q1"]}
+    encoded = nfa_json.from_automaton(nfa_json.to_automaton(Automaton, document))
+    assert encoded == document
+    assert nfa_json.to_automaton(Automaton, encoded).isAccepted("a")
+
+
+def test_states_without_edges_are_listed():
+    automaton = Automaton.Automaton()
+    automaton.setInitialState(2)
+    automaton.addFinalState(5)
+    encoded = nfa_json.from_automaton(automaton)
+    assert sorted(encoded["states"]) == ["q2", "q5"]
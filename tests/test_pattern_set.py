@@ -0,0 +1,25 @@
+import pytest
+
+Automaton = pytest.importorskip("Automaton_bindings")
+
+
+def literal(text):
+    nfa = Automaton.Automaton()
+    for i, symbol in enumerate(text):
+        nfa.addTransition(i, i + 1, symbol)
+    nfa.addFinalState(len(text))
+    return nfa
+
+
+def test_accept_ids():
+    patterns = Automaton.PatternSet([literal("ab"), literal("ab"), literal("b")])
+    assert patterns.getAcceptIds(patterns.run("ab")) == [0, 1]
+    assert patterns.getAcceptIds(patterns.run("b")) == [2]
+    assert patterns.getAcceptIds(patterns.run("c")) == []
+
+
+@pytest.mark.parametrize("offset", [0, 1, 1 << 30])
+def test_accept_ids_out_of_range_raises(offset):
+    patterns = Automaton.PatternSet([literal("ab"), literal("b")])
+    with pytest.raises(IndexError):
+        patterns.getAcceptIds(patterns.getStateCount() + offset)
@@ -0,0 +1,31 @@
+import pytest
+
+Automaton = pytest.importorskip("Automaton_bindings")
+
+
+def a_star():
+    nfa = Automaton.Automaton()
+    nfa.addTransition(0, 0, "a")
+    nfa.addFinalState(0)
+    return nfa.determinize().compile()
+
+
+def test_empty_match_reported_once():
+    matcher = Automaton.StreamMatcher(a_star())
+    assert list(matcher.feed(b"aa")) == [0, 1, 2]
+    assert list(matcher.feed(b"a")) == [3]
+    assert list(matcher.finish()) == []
+
+
+def test_empty_match_after_reset():
+    matcher = Automaton.StreamMatcher(a_star())
+    matcher.feed(b"ab")
+    matcher.reset()
+    assert list(matcher.feed(b"")) == [0]
+    assert list(matcher.feed(b"a")) == [1]
+
+
+def test_empty_match_without_feed():
+    matcher = Automaton.StreamMatcher(a_star())
+    assert list(matcher.finish()) == [0]
+    assert list(matcher.finish()) == []